@@ -1,11 +1,20 @@
+import asyncio
+import logging
+
 from agno.tools import tool
 
 from app.api.models.candidate_profile import CandidateProfile
 from app.api.models.search_request import SearchRequest
-from app.api.routers.feed_candidate import feed_candidate_profiles
-from app.api.routers.search_candidate import search_candidate_profiles
+from app.api.services.feed_candidate_service import feed_candidate_to_vespa
 from app.api.services.job_service import search_job
+from app.api.services.match_service import build_job_search_request
+from app.api.services.match_store import schedule_refresh
 from app.api.services.parse_candidate_service import parse_file_with_llm
+from app.api.services.search_cache import search_cache
+from app.api.services.search_candidate_service import search_candidates
+from app.api.utils.derive_fields import build_candidate_vespa_payload
+
+logger = logging.getLogger(__name__)
 
 @tool(instructions="""
     - ** means to bold the text in markdown.
@@ -21,10 +30,15 @@ from app.api.services.parse_candidate_service import parse_file_with_llm
 )
 async def search_api(search_params: dict):
     """Call the search API with the given search params."""
-    print("IM IN SEARCH API TOOL ",search_params)
+    return await search_profiles(search_params)
+
+
+async def search_profiles(search_params: dict):
+    """Plain callable behind search_api, also used by the /chat fast path."""
+    logger.info(f"Searching candidates for {search_params}")
     params = SearchRequest(**search_params)
-    response = await search_candidate_profiles(request_body=params)
-    print(len(response))
+    response, _ = await search_candidates(request_body=params)
+    logger.info(f"Candidate search returned {len(response or [])} results")
     return response
 
 @tool(instructions="""
@@ -38,13 +52,19 @@ async def search_api(search_params: dict):
             **<job_title>** at **<company>** in <location> requiring <experience> years of experience with a salary of <salary>. \\n Brief description: <description> \\n
     - If no jobs found, return a message: "No matching jobs found for your profile: <candidate_id>"
     - If feed fails, return a message: "Failed to save your profile **<candidate_id>** to database. Please try again."
+    - If feed_success is null, the profile is still being saved in the background; say so instead of reporting success or failure.
     - Do not just return the raw JSON unless explicitly asked for it.
     - Use proper line breaks and spacing for better readability.
     """
 )
-async def parse_api(file_path: str | None):
+async def parse_api(file_path: str | None, wait_for_feed: bool = True):
     """Call the parse_resume method with the given file if present, else return error."""
-    print("IM IN PARSE API TOOL")
+    return await parse_and_feed_resume(file_path, wait_for_feed=wait_for_feed)
+
+
+async def parse_and_feed_resume(file_path: str | None, wait_for_feed: bool = True):
+    """Plain callable behind parse_api, also used by the /chat fast path."""
+    logger.info(f"Parsing and feeding resume {file_path}")
     if file_path is None:
         return "Error: No file provided for parsing."
     try:
@@ -52,45 +72,48 @@ async def parse_api(file_path: str | None):
             tmp_file_path=str(file_path),
         )
         candidate_profile = CandidateProfile(**result)
-        feed_response = await feed_candidate_profiles(candidate_profile)
-        print("GOT FEED RESPONSE: ",feed_response)
+        candidate_id = result.get('id', 'Unknown')
+        payload = build_candidate_vespa_payload(candidate_profile)
+
+        # The job match only needs the parsed profile, so it runs alongside the feed instead of after it.
+        if not wait_for_feed:
+            feed_task = asyncio.create_task(feed_parsed_profile(candidate_profile.id, payload))
+            _background_feeds.add(feed_task)
+            feed_task.add_done_callback(_on_background_feed_done)
+            jobs = await match_jobs(payload)
+            return {
+                "parsed_profile": result,
+                "feed_status": f"Saving candidate {candidate_id} to database in the background",
+                "feed_success": None,
+                "feed_response": None,
+                "jobs": jobs,
+            }
+
+        feed_outcome, jobs = await asyncio.gather(
+            feed_parsed_profile(candidate_profile.id, payload),
+            match_jobs(payload),
+            return_exceptions=True,
+        )
         feed_success = False
         feed_message = "Failed to feed to database"
-        candidate_id = result.get('id', 'Unknown')
-        
-        if feed_response and isinstance(feed_response, dict):
-            if feed_response.get('message') == 'Document fed successfully':
-                feed_success = True
-                vespa_id = feed_response.get('vespa_response', {}).get('id', '')
-                feed_message = f"Successfully saved candidate {candidate_id} to database (Vespa ID: {vespa_id})"
-                payload= feed_response.get('vespa_payload', {})
-                location = payload.get("preferred_and_current_cities")
-                job_search_request = SearchRequest(
-                    searchType="both",
-                    searchParams={
-                        "skills": payload.get("skills", []) or [],
-                        "jobRole": [payload["latest_role"]] if payload.get("latest_role") else [],
-                        "jobTitle": [payload["latest_job_title"]] if payload.get("latest_job_title") else [],
-                        "location": location if isinstance(location, list) else [location] if location else [],
-                        "experienceMin": (
-                            int(payload["total_months_of_experience"]) // 12
-                            if payload.get("total_months_of_experience") is not None
-                            else None
-                        ),
-                        "expectedSalaryMin": int(payload["expected_annual_ctc"]) if payload.get("expected_annual_ctc") else None,
-                    }
-                )
-                jobs = search_job(job_search_request)
-            else:
-                feed_message = f"Feed failed: {feed_response.get('message', 'Unknown error')}"
-        
+        feed_response = None
+        if isinstance(feed_outcome, Exception):
+            feed_message = f"Feed failed: {feed_outcome}"
+        else:
+            feed_success = True
+            feed_response = {"message": "Document fed successfully", "vespa_response": feed_outcome, "vespa_payload": payload}
+            vespa_id = feed_outcome.get('id', '') if isinstance(feed_outcome, dict) else ''
+            feed_message = f"Successfully saved candidate {candidate_id} to database (Vespa ID: {vespa_id})"
+        logger.info(feed_message)
+        logger.debug(f"Feed response: {feed_response}")
+
         # Create response with parsed details and feed status
         response = {
             "parsed_profile": result,  # Original dict for display
             "feed_status": feed_message,
             "feed_success": feed_success,
             "feed_response": feed_response,
-            "jobs": jobs if feed_success else []
+            "jobs": jobs
         }
         
         return response
@@ -98,6 +121,40 @@ async def parse_api(file_path: str | None):
         return f"Exception occurred while calling parse_resume: {ex}"
 
 
+_background_feeds: set[asyncio.Task] = set()
+
+
+async def match_jobs(payload: dict) -> list:
+    """Top jobs for a parsed candidate payload; a profile with no usable filters or a failed search gives []."""
+    try:
+        return await search_job(build_job_search_request(payload))
+    except Exception as ex:
+        logger.warning(f"Job search for parsed profile failed: {ex}")
+        return []
+
+
+async def feed_parsed_profile(candidate_id: str, payload: dict) -> dict:
+    """Feed a parsed candidate payload, invalidate cached candidate searches and refresh its stored matches."""
+    vespa_response = await feed_candidate_to_vespa(
+        schema="candidate_profile",
+        data_id=candidate_id,
+        fields=payload,
+    )
+    search_cache.invalidate("candidate_profile")
+    schedule_refresh(candidate_ids=[candidate_id])
+    return vespa_response
+
+
+def _on_background_feed_done(task: asyncio.Task):
+    _background_feeds.discard(task)
+    if task.cancelled():
+        logger.warning("Background candidate feed was cancelled")
+    elif task.exception() is not None:
+        logger.error(f"Background candidate feed failed: {task.exception()}")
+    else:
+        logger.info(f"Background candidate feed completed: {task.result()}")
+
+
 def apply_for_job(job_id: str, candidate_id: str):
     """Simulate applying for a job."""
     # In a real implementation, this would involve more complex logic
@@ -7,20 +7,27 @@ logger = logging.getLogger(__name__)
 
 
 class JobResponseBuilder:
-    def from_query_results(self, query_result: Dict[str, Any]) -> JobResponse:
+    def to_dict(self, query_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a single Vespa hit straight to the JSON-ready dict of a JobResponse, without building the model."""
         try:
             fields = query_result.get("fields", query_result)
-            return JobResponse(
-                id=fields.get("id"),
-                relevance_score=int(query_result.get("relevance") * 100) if query_result.get("relevance") else None,
-                company=fields.get("company_name"),
-                location=fields.get("location"),
-                experience_required=int(fields.get("total_months_of_experience")//12) if fields.get("total_months_of_experience") is not None else None,
-                salary=fields.get("annual_ctc"),
-                description=fields.get("job_summary"),
-                role=fields.get("job_role"),
-                title=fields.get("job_title"),
-            )
+            relevance = query_result.get("relevance")
+            months = fields.get("total_months_of_experience")
+            salary = fields.get("annual_ctc")
+            return {
+                "id": fields.get("id") or fields.get("job_id"),
+                "relevance_score": int(relevance * 100) if relevance else None,
+                "company": fields.get("company_name"),
+                "location": fields.get("location"),
+                "experience_required": float(int(months // 12)) if months is not None else None,
+                "salary": float(salary) if salary is not None else None,
+                "description": fields.get("job_summary"),
+                "role": fields.get("job_role"),
+                "title": fields.get("job_title"),
+            }
         except Exception as ex:
             logger.error(f"Error building Response object from vespa_response: {ex} | Data: {query_result}")
-            raise RuntimeError(f"Error building Response object: {ex}") from ex
\ No newline at end of file
+            raise RuntimeError(f"Error building Response object: {ex}") from ex
+
+    def from_query_results(self, query_result: Dict[str, Any]) -> JobResponse:
+        return JobResponse(**self.to_dict(query_result))
@@ -11,6 +11,12 @@ class ResponseBuilder:
     Builder class to construct Response objects from Vespa result dicts.
     """
 
+    MAPPED_FIELDS = {
+        "id", "first_name", "last_name", "primary_email", "primary_mobile_number", "current_city", "latest_role",
+        "latest_job_title", "total_months_of_experience", "skills", "created_at", "created_by", "sddocname",
+        "documentid",
+    }
+
     @staticmethod
     def _format_name(first_name: Optional[str], last_name: Optional[str]) -> Optional[str]:
         if first_name and last_name:
@@ -30,31 +36,52 @@ class ResponseBuilder:
             logger.warning(f"Invalid created_at value: {created_at} ({ex})")
             return None
 
-    def from_query_results(self, query_result: Dict[str, Any]) -> Response:
+    @staticmethod
+    def _details(fields: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value for key, value in fields.items()
+            if key not in ResponseBuilder.MAPPED_FIELDS and not key.endswith("features")
+        }
+
+    def to_dict(self, query_result: Dict[str, Any], detailed: bool = False) -> Dict[str, Any]:
         """
-        Build a Response object from a single Vespa response dict.
+        Map a single Vespa hit straight to the JSON-ready dict of a Response, without building the model.
+        Scores come from matchfeatures (lean search_hit summary) or summaryfeatures (full document summary).
+        With detailed=True the remaining document fields are returned under `details`.
         """
         try:
             fields = query_result.get("fields", query_result)
-            name = self._format_name(fields.get("first_name"), fields.get("last_name"))
-            created_at = self._format_created_at(fields.get("created_at"))
-            return Response(
-                id=fields.get("id"),
-                relevance_score=query_result.get("relevance") * 100 if query_result.get("relevance") else None,
-                name=name,
-                email=fields.get("primary_email"),
-                mobile_number=fields.get("primary_mobile_number"),
-                current_city=fields.get("current_city"),
-                job_role=fields.get("latest_role"),
-                job_title=fields.get("latest_job_title"),
-                total_months_of_experience=fields.get("total_months_of_experience"),
-                skills=fields.get("skills"),
-                job_role_score=fields.get("summaryfeatures", {}).get("latest_role_score") * 100 if fields.get("summaryfeatures", {}).get("latest_role_score") is not None else None,
-                job_title_score=fields.get("summaryfeatures", {}).get("latest_title_score") * 100 if fields.get("summaryfeatures", {}).get("latest_title_score") is not None else None,
-                skills_score=fields.get("summaryfeatures", {}).get("skills_score") * 100 if fields.get("summaryfeatures", {}).get("skills_score") is not None else None,
-                created_at=created_at,
-                created_by=fields.get("created_by"),
-            )
+            features = fields.get("matchfeatures") or fields.get("summaryfeatures") or {}
+            relevance = query_result.get("relevance")
+            role_score = features.get("latest_role_score")
+            title_score = features.get("latest_title_score")
+            skills_score = features.get("skills_score")
+            hit = {
+                "id": fields.get("id"),
+                "relevance_score": relevance * 100 if relevance else None,
+                "name": self._format_name(fields.get("first_name"), fields.get("last_name")),
+                "email": fields.get("primary_email"),
+                "mobile_number": fields.get("primary_mobile_number"),
+                "current_city": fields.get("current_city"),
+                "job_role": fields.get("latest_role"),
+                "job_title": fields.get("latest_job_title"),
+                "total_months_of_experience": fields.get("total_months_of_experience"),
+                "skills": fields.get("skills"),
+                "job_role_score": role_score * 100 if role_score is not None else None,
+                "job_title_score": title_score * 100 if title_score is not None else None,
+                "skills_score": skills_score * 100 if skills_score is not None else None,
+                "created_at": self._format_created_at(fields.get("created_at")),
+                "created_by": fields.get("created_by"),
+            }
+            if detailed:
+                hit["details"] = self._details(fields)
+            return hit
         except Exception as ex:
             logger.error(f"Error building Response object from vespa_response: {ex} | Data: {query_result}")
-            raise RuntimeError(f"Error building Response object: {ex}") from ex
\ No newline at end of file
+            raise RuntimeError(f"Error building Response object: {ex}") from ex
+
+    def from_query_results(self, query_result: Dict[str, Any], detailed: bool = False) -> Response:
+        """
+        Build a Response object from a single Vespa response dict.
+        """
+        return Response(**self.to_dict(query_result, detailed=detailed))
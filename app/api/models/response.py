@@ -21,6 +21,7 @@ class Response(BaseModel):
     skills_score: Optional[float] = None
     created_at: Optional[str] = None
     created_by: Optional[str] = None
+    details: Optional[dict] = None
 
 class JobResponse(BaseModel):
     id: Optional[str] = None
@@ -45,6 +45,22 @@ class SearchType(Enum):
     semantic = "semantic"
     both = "both"   
 
+class RankProfile(Enum):
+    default = "default"
+    two_phase = "two_phase"
+
+class VectorPrecision(Enum):
+    float = "float"
+    bfloat16 = "bfloat16"
+    binary = "binary"
+
 class SearchRequest(BaseModel):
     searchType: Optional[SearchType]= SearchType.both 
     searchParams: SearchParams
+    rankProfile: Optional[RankProfile] = RankProfile.default
+    rerankCount: Optional[int] = Field(None, ge=1, le=10000)
+    vectorPrecision: Optional[VectorPrecision] = VectorPrecision.float
+    detailed: Optional[bool] = False
+
+class SearchBatchRequest(BaseModel):
+    queries: List[SearchRequest] = Field(..., min_length=1, max_length=50)
@@ -3,6 +3,7 @@ import json
 import logging
 import os
 import shutil
+import time
 from typing import Optional
 import aiofiles
 from fastapi import APIRouter, File, HTTPException, UploadFile
@@ -10,12 +11,33 @@ from fastapi.params import Form
 from pydantic import BaseModel
 
 from app.api.agent.agent import agent
+from app.api.agent.tools import parse_and_feed_resume, search_profiles
 from app.api.services.call_api import call_api_based_on_intent
-from app.api.services.parse_message import parse_query
+from app.api.services.intent_router import ChatIntent, chat_route_stats, route_chat_message
+from app.api.services.parse_message import parse_query, search_request_from_parse
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Messages the fast path cannot route get one cached LLM parse before falling back to the agent.
+CHAT_QUERY_PARSE_ENABLED = os.environ.get("CHAT_QUERY_PARSE_ENABLED", "true").lower() == "true"
+
+async def parse_chat_search(text: str) -> Optional[dict]:
+    """Search request from the cached query parser, or None to let the agent handle the message."""
+    try:
+        return search_request_from_parse(await parse_query(text))
+    except Exception as ex:
+        logger.warning(f"Chat query parse failed, falling back to the agent: {ex}")
+        return None
+
+async def run_chat_intent(intent: ChatIntent, file_path: Optional[str]):
+    """Answer a message the fast-path router understood by calling the tools directly, without the agent."""
+    if intent.intent == "search":
+        return await search_profiles(intent.search_params)
+    if intent.intent == "parse":
+        return await parse_and_feed_resume(file_path)
+    return intent.reply
+
 @router.post("/chat")
 async def chat(
     text: Optional[str] = Form(""),
@@ -34,8 +56,23 @@ async def chat(
                 content = await file.read()
                 await tmp.write(content)
                 tmp_path = tmp.name
+        start_time = time.perf_counter()
+        intent = await route_chat_message(text, has_file=tmp_path is not None)
+        if intent is not None:
+            logger.info(f"Chat fast path: {intent.intent} {intent.slots or ''}")
+            result = await run_chat_intent(intent, tmp_path)
+            chat_route_stats.record(intent.intent, time.perf_counter() - start_time)
+            return result
+        if CHAT_QUERY_PARSE_ENABLED and text and tmp_path is None:
+            search_params = await parse_chat_search(text)
+            if search_params is not None:
+                logger.info(f"Chat parsed search: {search_params['searchParams']}")
+                result = await search_profiles(search_params)
+                chat_route_stats.record("parsed_search", time.perf_counter() - start_time)
+                return result
         print("BEFORE AGENT RUN")
         response = await agent.arun(message=f"{text}, file_path:{tmp_path}", conversation_id="test_user")
+        chat_route_stats.record("agent", time.perf_counter() - start_time)
         print("response: ",response)
         try:
             json_response = json.loads(json.dumps(response.content))
@@ -47,4 +84,9 @@ async def chat(
             return response.content
     except Exception as e:
         logger.error(f"Unexpected error occurred: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/chat/stats")
+async def get_chat_stats():
+    """Fast-path coverage and estimated agent time saved."""
+    return chat_route_stats.stats()
@@ -1,10 +1,13 @@
-from datetime import datetime
-from fastapi import APIRouter, HTTPException
+import json
+from fastapi import APIRouter, HTTPException, Request
 import logging
+from pydantic import ValidationError
 
 from app.api.models.candidate_profile import CandidateProfile
-from app.api.services.feed_candidate_service import feed_candidate_to_vespa
-from app.api.utils.derive_fields import derive_highest_education, derive_latest_job_fields
+from app.api.services.feed_candidate_service import FEED_MAX_IN_FLIGHT, feed_candidate_to_vespa, feed_documents_concurrently
+from app.api.services.match_store import schedule_refresh
+from app.api.services.search_cache import search_cache
+from app.api.utils.derive_fields import build_candidate_vespa_payload
 
 logger = logging.getLogger(__name__)
 
@@ -16,41 +19,16 @@ async def feed_candidate_profiles(profile: CandidateProfile):
     Endpoint to feed a candidate profile into Vespa.
     """
     try:
-        latest_job_title, latest_role = derive_latest_job_fields(profile.employment_history)
-        highest_education_level, highest_course_year_of_completion = derive_highest_education(profile.education_details)
-
-        # Prepare payload
-        vespa_payload = profile.model_dump(exclude_none=True)
-        if latest_job_title:
-            vespa_payload["latest_job_title"] = latest_job_title
-        if latest_role:
-            vespa_payload["latest_role"] = latest_role
-        if highest_education_level:
-            vespa_payload["highest_education_level"] = highest_education_level
-        if highest_course_year_of_completion:
-            vespa_payload["highest_course_year_of_completion"] = highest_course_year_of_completion
-
-        preferred_cities = vespa_payload.get("preferred_cities", [])
-        current_city = vespa_payload.get("current_city")
-        if not isinstance(preferred_cities, list):
-            preferred_cities = [preferred_cities] if preferred_cities else []
-        combined_cities = []
-        if current_city:
-            combined_cities.append(current_city)
-        combined_cities.extend(preferred_cities)
-        vespa_payload["preferred_and_current_cities"] = combined_cities
-
-        now_epoch = int(datetime.now().timestamp())
-        vespa_payload["created_at"] = now_epoch
-        vespa_payload["created_by"] = "TEST_USER"
-        vespa_payload["updated_by"] = "TEST_USER"
+        vespa_payload = build_candidate_vespa_payload(profile)
 
         # Feed into Vespa
-        vespa_response = feed_candidate_to_vespa(
+        vespa_response = await feed_candidate_to_vespa(
             schema="candidate_profile",
             data_id=profile.id,
             fields=vespa_payload
         )
+        search_cache.invalidate("candidate_profile")
+        schedule_refresh(candidate_ids=[profile.id])
 
         return {"message": "Document fed successfully", "vespa_response": vespa_response, "vespa_payload": vespa_payload}
     except Exception as ex:
@@ -59,3 +37,64 @@ async def feed_candidate_profiles(profile: CandidateProfile):
             status_code=500,
             detail=f"Exception while feeding candidate: {ex}"
         )
+
+def parse_batch_body(body: bytes, content_type: str) -> list:
+    """Parse a JSON array or an NDJSON body into a list of raw profile dicts."""
+    text = body.decode("utf-8")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    data = json.loads(text)
+    if not isinstance(data, list):
+        raise ValueError("Request body should be a JSON list of profiles")
+    return data
+
+@router.post("/feed/batch")
+async def feed_candidate_profiles_batch(request: Request, max_in_flight: int = FEED_MAX_IN_FLIGHT):
+    """
+    Endpoint to feed many candidate profiles (JSON array or NDJSON body) into Vespa concurrently.
+    Returns one result per input item, in input order.
+    """
+    try:
+        raw_profiles = parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as ex:
+        logger.error(f"Invalid batch feed body in {__file__}: {ex}")
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {ex}")
+    if max_in_flight <= 0:
+        raise HTTPException(status_code=400, detail="max_in_flight must be positive")
+
+    try:
+        results = [None] * len(raw_profiles)
+        documents = []
+        for index, raw_profile in enumerate(raw_profiles):
+            try:
+                profile = CandidateProfile(**raw_profile)
+                documents.append((index, profile.id, build_candidate_vespa_payload(profile)))
+            except (ValidationError, TypeError, RuntimeError) as ex:
+                item_id = raw_profile.get("id") if isinstance(raw_profile, dict) else None
+                results[index] = {"id": item_id, "success": False, "status_code": None, "attempts": 0, "error": str(ex)}
+
+        def _on_result(position: int, result: dict):
+            results[documents[position][0]] = result
+
+        await feed_documents_concurrently(
+            schema="candidate_profile",
+            documents=((data_id, fields) for _, data_id, fields in documents),
+            max_in_flight=max_in_flight,
+            on_result=_on_result,
+        )
+        succeeded = sum(1 for result in results if result and result["success"])
+        if succeeded:
+            search_cache.invalidate("candidate_profile")
+            schedule_refresh(candidate_ids=[result["id"] for result in results if result and result["success"]])
+        return {
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results,
+        }
+    except Exception as ex:
+        logger.error(f"Exception in {__file__} while batch feeding candidates: {ex}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Exception while batch feeding candidates: {ex}"
+        )
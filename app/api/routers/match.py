@@ -0,0 +1,69 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+
+from app.api.exceptions.document_not_found_exception import DocumentNotFoundError
+from app.api.exceptions.page_invalid_exception import PageInvalidError
+from app.api.services.match_service import match_candidates_for_job, match_jobs_for_candidate
+from app.api.services.match_store import CANDIDATE_JOBS, JOB_CANDIDATES, match_store, serves_from_store, stored_matches
+from app.api.services.query_trace import TRACE_HEADER, capture_traces
+from app.api.services.search_candidate_service import validate_pagination
+from app.api.utils.fast_json import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+async def _respond(
+    match, direction: str, document_id: str, page_number: str, page_size: str, apply_filters: bool, trace: bool = False
+):
+    try:
+        limit, offset = validate_pagination(page_number=page_number, page_size=page_size)
+        if not trace and serves_from_store(direction, limit, offset, apply_filters):
+            results, plan_description = await stored_matches(direction, document_id, limit, offset)
+            return FastJSONResponse(results, headers={"X-Search-Plan": plan_description})
+        with capture_traces(requested=trace) as traces:
+            results, plan = await match(document_id, page_number=page_number, page_size=page_size, apply_filters=apply_filters)
+        headers = {"X-Search-Plan": plan.describe()}
+        if traces.header():
+            headers[TRACE_HEADER] = traces.header()
+        return FastJSONResponse(results, headers=headers)
+    except DocumentNotFoundError as ex:
+        logger.error(f"DocumentNotFoundError in {__file__}: {ex}")
+        raise HTTPException(status_code=404, detail=ex.message)
+    except PageInvalidError as ex:
+        logger.error(f"PageInvalidError in {__file__}: {ex}")
+        raise HTTPException(status_code=400, detail=ex.message)
+    except ValueError as ex:
+        logger.error(f"Source document has nothing to match on in {__file__}: {ex}")
+        raise HTTPException(status_code=422, detail="Document has no skills, role, title or location to match on")
+    except Exception as ex:
+        logger.error(f"Unexpected exception in {__file__}: {ex}")
+        raise HTTPException(status_code=500, detail="Unexpected error occurred")
+
+@router.get("/candidates/{candidate_id}/jobs", response_class=FastJSONResponse)
+async def get_jobs_for_candidate(
+    candidate_id: str,
+    page_number: Optional[str] = "1",
+    page_size: Optional[str] = "10",
+    apply_filters: bool = True,
+    trace: bool = False,
+):
+    """Jobs matching a stored candidate, using the candidate's stored embeddings instead of re-embedding its text."""
+    return await _respond(match_jobs_for_candidate, CANDIDATE_JOBS, candidate_id, page_number, page_size, apply_filters, trace)
+
+@router.get("/jobs/{job_id}/candidates", response_class=FastJSONResponse)
+async def get_candidates_for_job(
+    job_id: str,
+    page_number: Optional[str] = "1",
+    page_size: Optional[str] = "10",
+    apply_filters: bool = True,
+    trace: bool = False,
+):
+    """Candidates matching a stored job, using the job's stored embeddings instead of re-embedding its text."""
+    return await _respond(match_candidates_for_job, JOB_CANDIDATES, job_id, page_number, page_size, apply_filters, trace)
+
+@router.get("/matches/store/stats")
+async def get_match_store_stats():
+    """Size and hit rate of the precomputed match store."""
+    return match_store.stats()
@@ -1,32 +1,165 @@
 import logging
+import time
 from typing import Optional
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
-from app.api.models.search_request import SearchRequest
-from app.api.services.search_candidate_service import build_query, fetch_results, format_response, validate_pagination
-from app.api.utils.query_builder import get_field_presence
+from app.api.exceptions.page_invalid_exception import PageInvalidError
+from app.api.models.builder.response_builder import ResponseBuilder
+from app.api.models.search_request import SearchBatchRequest, SearchRequest
+from app.api.services.query_trace import TRACE_HEADER, capture_traces
+from app.api.services.search_cache import search_cache
+from app.api.services.search_cursor_service import fetch_page_by_cursor
+from app.api.services.search_planner import selectivity_estimator
+from app.api.services.search_candidate_service import (
+    fetch_candidate_hits,
+    format_response,
+    search_candidates,
+    search_candidates_batch,
+    validate_pagination,
+)
+from app.api.utils import fast_json
+from app.api.utils.fast_json import FastJSONResponse
 from app.api.utils.search_fields_map import candidate_field_map
+from app.api.utils.yql_compiler import yql_compiler
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/search")
+@router.post("/search", response_class=FastJSONResponse)
 async def search_candidate_profiles(
     request_body: SearchRequest,
     page_number: Optional[str] = "1",
     page_size: Optional[str] = "10",
+    trace: bool = False,
 ):
+    """trace=true bypasses the result cache and returns Vespa's per-phase timings in the X-Search-Trace header."""
+    try:
+        with capture_traces(requested=trace) as traces:
+            results, plan = await search_candidates(
+                request_body, page_number=page_number, page_size=page_size, use_cache=not trace
+            )
+        headers = {"X-Search-Plan": plan}
+        if traces.header():
+            headers[TRACE_HEADER] = traces.header()
+        return FastJSONResponse(results, headers=headers)
+    except PageInvalidError as ex:
+        logger.error(f"PageInvalidError in {__file__}: {ex}")
+        raise HTTPException(status_code=400, detail=ex.message)
+    except HTTPException as ex:
+        logger.error(f"HTTPException in {__file__}: {ex}")
+        raise
+    except Exception as ex:
+        logger.error(f"Unexpected exception in {__file__}: {ex}")
+        raise HTTPException(status_code=500, detail="Unexpected error occurred")
+
+@router.post("/search/batch", response_class=FastJSONResponse)
+async def search_candidate_profiles_batch(
+    request_body: SearchBatchRequest,
+    page_number: Optional[str] = "1",
+    page_size: Optional[str] = "10",
+):
+    """
+    Run up to 50 searches in one call. Identical searches run once; results come back in request order
+    with per-query timings and plans.
+    """
+    try:
+        start_time = time.perf_counter()
+        results = await search_candidates_batch(request_body.queries, page_number=page_number, page_size=page_size)
+        return FastJSONResponse({
+            "results": results,
+            "unique_queries": sum(1 for entry in results if "duplicate_of" not in entry),
+            "elapsed_ms": (time.perf_counter() - start_time) * 1000,
+        })
+    except PageInvalidError as ex:
+        logger.error(f"PageInvalidError in {__file__}: {ex}")
+        raise HTTPException(status_code=400, detail=ex.message)
+    except Exception as ex:
+        logger.error(f"Unexpected exception in {__file__}: {ex}")
+        raise HTTPException(status_code=500, detail="Unexpected error occurred")
+
+@router.post("/search/stream")
+async def stream_candidate_profiles(
+    request_body: SearchRequest,
+    page_number: Optional[str] = "1",
+    page_size: Optional[str] = "10",
+    trace: bool = False,
+):
+    """
+    Same search as /search, written as NDJSON: one hit per line, each mapped and serialized as it is sent.
+    The Vespa round trip happens before the response starts, so errors still surface as HTTP status codes.
+    """
     try:
         limit, offset = validate_pagination(page_number=page_number, page_size=page_size)
-        query, nearest_neighbour_inputs = build_query(request_body, candidate_field_map, "candidate_profile", limit, offset)
-        field_presence = get_field_presence(request_body.searchParams)
-        query_results = fetch_results(query, nearest_neighbour_inputs, field_presence)
-        formatted_results = format_response(query_results)
-        return formatted_results
+        cache_key = search_cache.build_key(request_body, "candidate_profile", limit, offset)
+        cached_results = search_cache.get(cache_key) if not trace else None
+        if cached_results is not None:
+            lines = (fast_json.dumps(hit) + b"\n" for hit in cached_results)
+            return StreamingResponse(lines, media_type="application/x-ndjson", headers={"X-Search-Plan": "strategy=cached"})
+        with capture_traces(requested=trace) as traces:
+            query_results, plan = await fetch_candidate_hits(request_body, limit, offset)
+    except PageInvalidError as ex:
+        logger.error(f"PageInvalidError in {__file__}: {ex}")
+        raise HTTPException(status_code=400, detail=ex.message)
+    except Exception as ex:
+        logger.error(f"Unexpected exception in {__file__}: {ex}")
+        raise HTTPException(status_code=500, detail="Unexpected error occurred")
+
+    def _lines():
+        builder = ResponseBuilder()
+        detailed = bool(request_body.detailed)
+        formatted_results = []
+        for hit in query_results or []:
+            formatted_hit = builder.to_dict(hit, detailed=detailed)
+            formatted_results.append(formatted_hit)
+            yield fast_json.dumps(formatted_hit) + b"\n"
+        search_cache.put(cache_key, formatted_results if query_results else query_results)
+
+    headers = {"X-Search-Plan": plan.describe()}
+    if traces.header():
+        headers[TRACE_HEADER] = traces.header()
+    return StreamingResponse(_lines(), media_type="application/x-ndjson", headers=headers)
+
+@router.post("/search/cursor", response_class=FastJSONResponse)
+async def search_candidate_profiles_by_cursor(
+    request_body: Optional[SearchRequest] = None,
+    cursor: Optional[str] = None,
+    page_size: Optional[str] = "10",
+):
+    """
+    Cursor-paginated search. The first call takes the search request and returns a cursor;
+    later calls pass only the cursor and get pages from the same ranked snapshot, which is ranked further
+    in chunks as pages move past it. total_hits is null until the end of the result set has been reached.
+    """
+    try:
+        try:
+            page_size = int(page_size)
+        except (TypeError, ValueError) as ex:
+            raise PageInvalidError("Page size must be an integer") from ex
+        hits, next_cursor, total_hits, request_body = await fetch_page_by_cursor(
+            request_body, cursor, page_size, candidate_field_map, "candidate_profile"
+        )
+        results = format_response(hits, detailed=bool(request_body.detailed))
+        return FastJSONResponse({"results": results, "next_cursor": next_cursor, "total_hits": total_hits})
+    except PageInvalidError as ex:
+        logger.error(f"PageInvalidError in {__file__}: {ex}")
+        raise HTTPException(status_code=400, detail=ex.message)
     except HTTPException as ex:
         logger.error(f"HTTPException in {__file__}: {ex}")
         raise
     except Exception as ex:
         logger.error(f"Unexpected exception in {__file__}: {ex}")
-        raise HTTPException(status_code=500, detail="Unexpected error occurred")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Unexpected error occurred")
+
+@router.get("/search/cache/stats")
+async def get_search_cache_stats():
+    return search_cache.stats()
+
+@router.get("/search/query-compiler/stats")
+async def get_query_compiler_stats():
+    return yql_compiler.stats()
+
+@router.get("/search/planner/stats")
+async def get_search_planner_stats():
+    return selectivity_estimator.stats()
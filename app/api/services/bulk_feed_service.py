@@ -0,0 +1,239 @@
+import json
+import logging
+import math
+import os
+import random
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from app.api.models.candidate_profile import CandidateProfile
+from app.api.services.feed_candidate_service import FEED_MAX_RETRIES, feed_documents_concurrently
+from app.api.services.search_cache import search_cache
+from app.api.utils.derive_fields import build_candidate_vespa_payload
+from app.api.utils.json_stream import iter_json_records
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+CHECKPOINT_EVERY = int(os.environ.get("BULK_FEED_CHECKPOINT_EVERY", "500"))
+# Latency samples kept for the report percentiles, however many documents are fed.
+LATENCY_SAMPLE_SIZE = int(os.environ.get("BULK_FEED_LATENCY_SAMPLES", "10000"))
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LatencyReservoir:
+    """Uniform random sample of at most `size` values (reservoir sampling), so memory stays flat on huge feeds."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.samples: list[float] = []
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+            return
+        index = random.randrange(self.count)
+        if index < self.size:
+            self.samples[index] = value
+
+    def percentile(self, pct: float) -> Optional[float]:
+        return percentile(self.samples, pct)
+
+
+def to_job_document(record: dict) -> tuple[str, dict]:
+    return record["job_id"], record
+
+
+def to_candidate_document(record: dict) -> tuple[str, dict]:
+    profile = CandidateProfile(**record)
+    return profile.id, build_candidate_vespa_payload(profile)
+
+
+DOCUMENT_BUILDERS: dict[str, Callable[[dict], tuple[str, dict]]] = {
+    "job": to_job_document,
+    "candidate_profile": to_candidate_document,
+}
+
+
+class FeedCheckpoint:
+    """
+    Tracks the contiguous prefix of input records that are done (fed or permanently failed).
+    Completions arrive out of order, so only the low watermark is persisted, together with the input's
+    size and mtime so an edited input starts over instead of skipping records.
+    """
+
+    def __init__(self, path: Optional[str], input_path: str, schema: str):
+        self.path = path
+        self.input_path = input_path
+        self.schema = schema
+        self.completed = 0
+        self._done_ahead: set[int] = set()
+        stat = os.stat(input_path)
+        self.input_version = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def load(self) -> int:
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("input_path") != self.input_path or state.get("schema") != self.schema:
+                raise ValueError(f"Checkpoint {self.path} belongs to a different input or schema")
+            if state.get("input_version") != self.input_version:
+                logger.warning(f"{self.input_path} changed since checkpoint {self.path} was written; feeding from the start")
+                return self.completed
+            self.completed = int(state.get("completed", 0))
+        return self.completed
+
+    def mark_done(self, position: int) -> None:
+        self._done_ahead.add(position)
+        while self.completed in self._done_ahead:
+            self._done_ahead.remove(self.completed)
+            self.completed += 1
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "input_path": self.input_path,
+                    "schema": self.schema,
+                    "input_version": self.input_version,
+                    "completed": self.completed,
+                },
+                file,
+            )
+        os.replace(temp_path, self.path)
+
+    def clear(self) -> None:
+        """Remove the checkpoint once the whole input is done, so the next run feeds it again."""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _skip(records: Iterable[dict], count: int) -> Iterator[dict]:
+    for position, record in enumerate(records):
+        if position >= count:
+            yield record
+
+
+async def run_bulk_feed(
+    input_path: str,
+    schema: str,
+    window: int,
+    checkpoint_path: Optional[str] = None,
+    failures_path: Optional[str] = None,
+    max_retries: int = FEED_MAX_RETRIES,
+    on_success: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """
+    Stream records from input_path and feed them to the given schema with up to `window` operations in flight.
+    Resumes after the last checkpointed record and returns a throughput/latency report.
+    on_success is called with the id of every document fed successfully.
+    """
+    build_document = DOCUMENT_BUILDERS.get(schema)
+    if build_document is None:
+        raise ValueError(f"Unsupported schema for bulk feed: {schema}")
+
+    checkpoint = FeedCheckpoint(checkpoint_path, os.path.abspath(input_path), schema)
+    skipped = checkpoint.load()
+    if skipped:
+        logger.info(f"Resuming {input_path} after {skipped} checkpointed records")
+
+    latencies_ms = LatencyReservoir(LATENCY_SAMPLE_SIZE)
+    counts = {"succeeded": 0, "failed": 0, "retried": 0}
+    failures_file = open(failures_path, "a", encoding="utf-8") if failures_path else None
+
+    def _record_failure(record_position: int, data_id: Optional[str], error: str):
+        counts["failed"] += 1
+        if failures_file:
+            failures_file.write(json.dumps({"position": record_position, "id": data_id, "error": error}) + "\n")
+
+    # Input position of each document handed to the feeder, by feeder index; only in-flight ones are kept.
+    fed_positions: dict[int, int] = {}
+    next_index = 0
+
+    def _documents() -> Iterator[tuple[str, dict]]:
+        nonlocal next_index
+        # Records that cannot be converted are reported and skipped here so positions stay aligned.
+        for record_position, record in enumerate(_skip(iter_json_records(input_path), skipped), start=skipped):
+            try:
+                document = build_document(record)
+            except Exception as ex:
+                data_id = record.get("id") or record.get("job_id") if isinstance(record, dict) else None
+                _record_failure(record_position, data_id, f"Invalid record: {ex}")
+                checkpoint.mark_done(record_position)
+                continue
+            fed_positions[next_index] = record_position
+            next_index += 1
+            yield document
+
+    def _on_result(index: int, result: dict):
+        record_position = fed_positions.pop(index)
+        latencies_ms.add(result["latency_ms"])
+        if result["attempts"] > 1:
+            counts["retried"] += 1
+        if result["success"]:
+            counts["succeeded"] += 1
+            if on_success:
+                on_success(result["id"])
+        else:
+            _record_failure(record_position, result["id"], str(result.get("error")))
+        checkpoint.mark_done(record_position)
+        if (counts["succeeded"] + counts["failed"]) % CHECKPOINT_EVERY == 0:
+            checkpoint.save()
+
+    start_time = time.perf_counter()
+    completed = False
+    try:
+        await feed_documents_concurrently(
+            schema=schema,
+            documents=_documents(),
+            max_in_flight=window,
+            on_result=_on_result,
+            max_retries=max_retries,
+        )
+        completed = True
+    finally:
+        if completed:
+            checkpoint.clear()
+        else:
+            checkpoint.save()
+        if failures_file:
+            failures_file.close()
+        if counts["succeeded"]:
+            # The version file is shared, so API workers stop serving cached results for this schema too.
+            search_cache.invalidate(schema)
+    elapsed = time.perf_counter() - start_time
+
+    processed = counts["succeeded"] + counts["failed"]
+    report = {
+        "schema": schema,
+        "input_path": input_path,
+        "skipped_from_checkpoint": skipped,
+        "processed": processed,
+        "succeeded": counts["succeeded"],
+        "failed": counts["failed"],
+        "retried": counts["retried"],
+        "elapsed_seconds": round(elapsed, 3),
+        "docs_per_second": round(processed / elapsed, 2) if elapsed > 0 else None,
+        "p50_latency_ms": latencies_ms.percentile(50),
+        "p99_latency_ms": latencies_ms.percentile(99),
+    }
+    logger.info(f"Bulk feed report: {report}")
+    return report
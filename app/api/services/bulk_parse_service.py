@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+from app.api.models.builder.candidate_profile_builder import CandidateProfileBuilder
+from app.api.models.candidate_profile import CandidateProfile
+from app.api.services.bulk_feed_service import percentile
+from app.api.services.feed_candidate_service import feed_document_with_retry
+from app.api.services.gemini_service import (
+    build_parse_prompt,
+    get_cached_parse,
+    get_model,
+    infer_resume,
+    prepare_parse_contents,
+    record_parse_inference,
+    store_parse,
+)
+from app.api.services.search_cache import search_cache
+from app.api.utils.derive_fields import build_candidate_vespa_payload
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+# Defaults sized for the Gemini free/pay-as-you-go tiers; override per run.
+GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get("GEMINI_REQUESTS_PER_MINUTE", "60"))
+INGEST_UPLOAD_CONCURRENCY = int(os.environ.get("INGEST_UPLOAD_CONCURRENCY", "4"))
+INGEST_INFERENCE_CONCURRENCY = int(os.environ.get("INGEST_INFERENCE_CONCURRENCY", "4"))
+INGEST_FEED_CONCURRENCY = int(os.environ.get("INGEST_FEED_CONCURRENCY", "8"))
+
+
+class AsyncRateLimiter:
+    """Spaces acquisitions evenly so no more than rate_per_minute calls start in any minute."""
+
+    def __init__(self, rate_per_minute: int):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class IngestCheckpoint:
+    """Append-only JSONL log of finished files, so a crashed run can skip them on restart."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self._file = None
+
+    def load(self) -> dict[str, dict]:
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["file"]] = entry
+        return self.entries
+
+    def record(self, entry: dict) -> None:
+        self.entries[entry["file"]] = entry
+        if not self.path:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def discover_resumes(source: str, extract_dir: str) -> list[tuple[str, str]]:
+    """Return (name, path) pairs for every PDF in a directory tree or zip archive."""
+    source_path = Path(source)
+    if source_path.is_dir():
+        return [
+            (str(pdf.relative_to(source_path)), str(pdf))
+            for pdf in sorted(source_path.rglob("*"))
+            if pdf.is_file() and pdf.suffix.lower() == ".pdf"
+        ]
+    if zipfile.is_zipfile(source_path):
+        resumes = []
+        with zipfile.ZipFile(source_path) as archive:
+            for member in archive.namelist():
+                if member.lower().endswith(".pdf") and not member.endswith("/"):
+                    resumes.append((member, archive.extract(member, extract_dir)))
+        return resumes
+    raise ValueError(f"Source must be a directory or a zip archive of PDFs: {source}")
+
+
+async def run_bulk_ingest(
+    source: str,
+    checkpoint_path: Optional[str] = None,
+    upload_concurrency: int = INGEST_UPLOAD_CONCURRENCY,
+    inference_concurrency: int = INGEST_INFERENCE_CONCURRENCY,
+    feed_concurrency: int = INGEST_FEED_CONCURRENCY,
+    requests_per_minute: int = GEMINI_REQUESTS_PER_MINUTE,
+    retry_failed: bool = False,
+) -> dict:
+    """
+    Parse and feed every resume in `source` through an upload -> inference -> feed pipeline.
+    The upload stage sends only the extracted text when the PDF has a usable text layer.
+    Each stage has its own worker pool; inference is additionally rate limited to the Gemini quota.
+    """
+    checkpoint = IngestCheckpoint(checkpoint_path)
+    done = checkpoint.load()
+    prompt = build_parse_prompt()
+    model = get_model()
+    limiter = AsyncRateLimiter(requests_per_minute)
+    upload_queue: asyncio.Queue = asyncio.Queue(maxsize=upload_concurrency * 2)
+    inference_queue: asyncio.Queue = asyncio.Queue(maxsize=inference_concurrency * 2)
+    feed_queue: asyncio.Queue = asyncio.Queue(maxsize=feed_concurrency * 2)
+    stage_seconds: dict[str, list[float]] = {"upload": [], "inference": [], "feed": []}
+    counts = {"fed": 0, "failed": 0, "cache_hits": 0, "skipped": 0}
+    failures_by_stage: dict[str, int] = {}
+
+    def _fail(item: dict, stage: str, ex: Exception):
+        counts["failed"] += 1
+        failures_by_stage[stage] = failures_by_stage.get(stage, 0) + 1
+        logger.error(f"Ingest failed for {item['name']} at {stage}: {ex}")
+        checkpoint.record({"file": item["name"], "status": "failed", "stage": stage, "error": str(ex)})
+
+    async def _upload_worker():
+        while True:
+            item = await upload_queue.get()
+            try:
+                item["cache_key"], cached_result = await get_cached_parse(item["path"], prompt)
+                if cached_result is not None:
+                    counts["cache_hits"] += 1
+                    item["llm_output"] = cached_result
+                    await feed_queue.put(item)
+                    continue
+                item["contents"], item["parse_path"], upload_seconds = await prepare_parse_contents(item["path"], prompt)
+                stage_seconds["upload"].append(upload_seconds)
+                item["upload_seconds"] = upload_seconds
+                await inference_queue.put(item)
+            except Exception as ex:
+                _fail(item, "upload", ex)
+            finally:
+                upload_queue.task_done()
+
+    async def _inference_worker():
+        while True:
+            item = await inference_queue.get()
+            try:
+                await limiter.acquire()
+                item["llm_output"], inference_seconds = await infer_resume(item.pop("contents"), model=model)
+                stage_seconds["inference"].append(inference_seconds)
+                record_parse_inference(item["parse_path"], inference_seconds)
+                await store_parse(item["cache_key"], item["llm_output"], item["upload_seconds"] + inference_seconds)
+                await feed_queue.put(item)
+            except Exception as ex:
+                _fail(item, "inference", ex)
+            finally:
+                inference_queue.task_done()
+
+    async def _feed_worker():
+        while True:
+            item = await feed_queue.get()
+            try:
+                start_time = time.perf_counter()
+                profile = CandidateProfile(**CandidateProfileBuilder(llm_data=item["llm_output"]).build_user_profile())
+                result = await feed_document_with_retry(
+                    schema="candidate_profile",
+                    data_id=profile.id,
+                    fields=build_candidate_vespa_payload(profile),
+                )
+                stage_seconds["feed"].append(time.perf_counter() - start_time)
+                if not result["success"]:
+                    raise RuntimeError(result.get("error"))
+                counts["fed"] += 1
+                checkpoint.record({"file": item["name"], "status": "fed", "candidate_id": profile.id})
+            except Exception as ex:
+                _fail(item, "feed", ex)
+            finally:
+                feed_queue.task_done()
+
+    start_time = time.perf_counter()
+    workers = (
+        [asyncio.create_task(_upload_worker()) for _ in range(upload_concurrency)]
+        + [asyncio.create_task(_inference_worker()) for _ in range(inference_concurrency)]
+        + [asyncio.create_task(_feed_worker()) for _ in range(feed_concurrency)]
+    )
+    try:
+        with tempfile.TemporaryDirectory(prefix="resume_ingest_") as extract_dir:
+            resumes = discover_resumes(source, extract_dir)
+            for name, path in resumes:
+                previous = done.get(name)
+                if previous and (previous["status"] == "fed" or not retry_failed):
+                    counts["skipped"] += 1
+                    continue
+                await upload_queue.put({"name": name, "path": path})
+            await upload_queue.join()
+            await inference_queue.join()
+            await feed_queue.join()
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        checkpoint.close()
+    elapsed = time.perf_counter() - start_time
+
+    if counts["fed"]:
+        search_cache.invalidate("candidate_profile")
+    processed = counts["fed"] + counts["failed"]
+    summary = {
+        "source": source,
+        "discovered": len(resumes),
+        "skipped_from_checkpoint": counts["skipped"],
+        "processed": processed,
+        "fed": counts["fed"],
+        "failed": counts["failed"],
+        "failures_by_stage": failures_by_stage,
+        "parse_cache_hits": counts["cache_hits"],
+        "elapsed_seconds": round(elapsed, 3),
+        "resumes_per_minute": round(processed / elapsed * 60, 2) if elapsed > 0 else None,
+        "stage_p50_seconds": {stage: percentile(values, 50) for stage, values in stage_seconds.items()},
+        "stage_p95_seconds": {stage: percentile(values, 95) for stage, values in stage_seconds.items()},
+    }
+    logger.info(f"Bulk ingest summary: {summary}")
+    return summary
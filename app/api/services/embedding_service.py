@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+# Embed query text in-process instead of sending embed(...) expressions to the Vespa container.
+LOCAL_QUERY_EMBEDDING = os.environ.get("LOCAL_QUERY_EMBEDDING", "false").lower() == "true"
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", "4096"))
+EMBEDDING_MAX_TOKENS = int(os.environ.get("EMBEDDING_MAX_TOKENS", "512"))
+VESPA_MODEL_DIR = Path(
+    os.environ.get("VESPA_MODEL_DIR", Path(__file__).resolve().parents[3] / "vespa_app" / "model")
+)
+
+# Same model files the Vespa container loads for each embedder id (see vespa_app/services.xml).
+EMBEDDER_MODELS = {
+    "e5-small-finetuned-role-title": {
+        "model": "e5-small-finetuned-role-tite/finetuned_e5_small_v4.onnx",
+        "tokenizer": "e5-small-finetuned-role-tite/tokenizer.json",
+    },
+    "e5-small-skills-v1": {
+        "model": "e5-small-skills-v1/skills_finetuned_e5_small_v1.onnx",
+        "tokenizer": "e5-small-skills-v1/tokenizer.json",
+    },
+}
+
+
+def binarize(vector: list[float]) -> list[int]:
+    """Pack the sign bits of a vector into int8 cells, the same layout Vespa's embedders produce for tensor<int8>(x[dim/8])."""
+    import numpy as np
+
+    return np.packbits(np.asarray(vector) > 0).astype(np.int8).tolist()
+
+
+class _OnnxEmbedder:
+    """Mean-pooled ONNX transformer embedder, matching Vespa's hugging-face-embedder defaults."""
+
+    def __init__(self, model_path: Path, tokenizer_path: Path):
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._np = np
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self.tokenizer.enable_truncation(max_length=EMBEDDING_MAX_TOKENS)
+        self.tokenizer.enable_padding()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_path), sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        np = self._np
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.zeros_like(input_ids)
+        feed = {name: value for name, value in feed.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, feed)[0]
+        mask = attention_mask[:, :, None].astype(token_embeddings.dtype)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled.astype(np.float32).tolist()
+
+
+class EmbeddingService:
+    """
+    Loads the e5 ONNX models on first use and caches query vectors by (model, text) in a bounded LRU.
+    """
+
+    def __init__(self, cache_size: int):
+        self.cache_size = cache_size
+        self._embedders: dict[str, _OnnxEmbedder] = {}
+        self._cache: "OrderedDict[tuple[str, str], list[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_embedder(self, model_id: str) -> _OnnxEmbedder:
+        embedder = self._embedders.get(model_id)
+        if embedder is not None:
+            return embedder
+        with self._load_lock:
+            embedder = self._embedders.get(model_id)
+            if embedder is not None:
+                return embedder
+            files = EMBEDDER_MODELS.get(model_id)
+            if files is None:
+                raise ValueError(f"Unknown embedder id: {model_id}")
+            logger.info(f"Loading ONNX embedder {model_id} from {VESPA_MODEL_DIR}")
+            embedder = _OnnxEmbedder(VESPA_MODEL_DIR / files["model"], VESPA_MODEL_DIR / files["tokenizer"])
+            self._embedders[model_id] = embedder
+            return embedder
+
+    def embed_batch(self, model_id: str, texts: list[str]) -> list[list[float]]:
+        """Embed texts with one inference call for all cache misses."""
+        try:
+            vectors: list[Optional[list[float]]] = [None] * len(texts)
+            missing: dict[str, list[int]] = {}
+            with self._lock:
+                for index, text in enumerate(texts):
+                    vector = self._cache.get((model_id, text))
+                    if vector is None:
+                        missing.setdefault(text, []).append(index)
+                        self.misses += 1
+                    else:
+                        self._cache.move_to_end((model_id, text))
+                        vectors[index] = vector
+                        self.hits += 1
+            if missing:
+                missing_texts = list(missing)
+                embedded = self._get_embedder(model_id).embed(missing_texts)
+                with self._lock:
+                    for text, vector in zip(missing_texts, embedded):
+                        for index in missing[text]:
+                            vectors[index] = vector
+                        self._cache[(model_id, text)] = vector
+                        self._cache.move_to_end((model_id, text))
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            return vectors
+        except Exception as ex:
+            logger.error(f"Exception in {__file__} while embedding with {model_id}: {ex}")
+            raise RuntimeError(f"Error while embedding query text with {model_id}: {ex}") from ex
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": LOCAL_QUERY_EMBEDDING,
+                "entries": len(self._cache),
+                "max_entries": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "loaded_models": list(self._embedders),
+            }
+
+
+embedding_service = EmbeddingService(cache_size=EMBEDDING_CACHE_SIZE)
@@ -1,8 +1,13 @@
-import os
+import asyncio
 import logging
-from vespa.application import Vespa
+import os
+import time
+from typing import AsyncIterable, Callable, Iterable, Optional, Union
 from fastapi import HTTPException
 
+from app.api.services.vespa_client import get_feed_session
+from app.api.utils.metrics import timed
+
 logger = logging.getLogger(__name__)
 handler = logging.StreamHandler()
 formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
@@ -11,28 +16,117 @@ if not logger.hasHandlers():
     logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
-VESPA_FEED_URL = os.environ.get("VESPA_FEED_URL", "http://localhost:8080")
+FEED_MAX_IN_FLIGHT = int(os.environ.get("FEED_MAX_IN_FLIGHT", "32"))
+FEED_MAX_RETRIES = int(os.environ.get("FEED_MAX_RETRIES", "5"))
+FEED_RETRY_BACKOFF_SECONDS = float(os.environ.get("FEED_RETRY_BACKOFF_SECONDS", "0.5"))
+RETRYABLE_STATUS_CODES = {429, 503}
+
+
+@timed("feed_document")
+async def feed_document_with_retry(schema: str, data_id: str, fields: dict, max_retries: int = FEED_MAX_RETRIES) -> dict:
+    """
+    Feed one document through the shared async feed session.
+    Retries with exponential backoff when Vespa answers 429/503 or the request fails in transit.
+    """
+    session = await get_feed_session()
+    start_time = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            feed_result = await session.feed_data_point(schema=schema, data_id=data_id, fields=fields)
+            status_code = feed_result.status_code
+            if feed_result.is_successful():
+                return {
+                    "id": data_id,
+                    "success": True,
+                    "status_code": status_code,
+                    "attempts": attempt,
+                    "latency_ms": (time.perf_counter() - start_time) * 1000,
+                    "vespa_response": feed_result.json,
+                }
+            error = feed_result.json
+        except Exception as ex:
+            status_code = None
+            error = str(ex)
+        retryable = status_code is None or status_code in RETRYABLE_STATUS_CODES
+        if not retryable or attempt > max_retries:
+            logger.error(f"Feed failed for data_id={data_id} after {attempt} attempt(s): {error}")
+            return {
+                "id": data_id,
+                "success": False,
+                "status_code": status_code,
+                "attempts": attempt,
+                "latency_ms": (time.perf_counter() - start_time) * 1000,
+                "error": error,
+            }
+        backoff = FEED_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1))
+        logger.warning(f"Retrying feed for data_id={data_id} in {backoff:.2f}s (status={status_code})")
+        await asyncio.sleep(backoff)
+
+
+async def _iterate(documents: Union[Iterable, AsyncIterable]):
+    if hasattr(documents, "__aiter__"):
+        async for document in documents:
+            yield document
+    else:
+        for document in documents:
+            yield document
+
+
+async def feed_documents_concurrently(
+    schema: str,
+    documents: Union[Iterable[tuple[str, dict]], AsyncIterable[tuple[str, dict]]],
+    max_in_flight: int = FEED_MAX_IN_FLIGHT,
+    on_result: Optional[Callable[[int, dict], None]] = None,
+    max_retries: int = FEED_MAX_RETRIES,
+) -> None:
+    """
+    Feed (data_id, fields) pairs with at most max_in_flight operations outstanding.
+    Documents are pulled from the iterable only when a slot frees up, so streaming sources stay bounded in memory.
+    on_result is called with the position of each document and its feed result.
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+    pending = set()
+
+    async def _feed_one(index: int, data_id: str, fields: dict):
+        try:
+            result = await feed_document_with_retry(schema=schema, data_id=data_id, fields=fields, max_retries=max_retries)
+        finally:
+            slots.release()
+        if on_result:
+            on_result(index, result)
+
+    index = 0
+    async for data_id, fields in _iterate(documents):
+        await slots.acquire()
+        task = asyncio.create_task(_feed_one(index, data_id, fields))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        index += 1
+    if pending:
+        await asyncio.gather(*pending)
+
 
-def feed_candidate_to_vespa(schema: str, data_id: str, fields: dict) -> dict:
+@timed("feed_candidate_to_vespa")
+async def feed_candidate_to_vespa(schema: str, data_id: str, fields: dict) -> dict:
     """
     Feed a candidate document to Vespa.
     Raises HTTPException if the feed fails.
     """
     try:
-        vespa_app = Vespa(url=VESPA_FEED_URL)
         logger.info(f"Attempting to feed data_id={data_id}, schema={schema} in {__file__}")
-        feed_result = vespa_app.feed_data_point(schema=schema, data_id=data_id, fields=fields)
-        if not feed_result.is_successful():
-            logger.error(f"Feed failed for data_id={data_id}: {feed_result.json}")
+        feed_result = await feed_document_with_retry(schema=schema, data_id=data_id, fields=fields)
+        if not feed_result["success"]:
             raise HTTPException(
                 status_code=500,
-                detail={"message": "Failed to feed document", "vespa_response": feed_result.json}
+                detail={"message": "Failed to feed document", "vespa_response": feed_result.get("error")}
             )
         logger.info(f"Feed successful for data_id={data_id}")
-        return feed_result.json
+        return feed_result["vespa_response"]
     except Exception as ex:
         logger.error(f"Exception in {__file__} while feeding candidate: {ex}")
         raise HTTPException(
             status_code=500,
             detail={"message": f"Exception while feeding candidate: {ex}"}
-        ) from ex
\ No newline at end of file
+        ) from ex
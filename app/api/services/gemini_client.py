@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import google.generativeai as genai
+
+from app.api.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+
+def _route_settings(value: str) -> dict[str, float]:
+    """Parse "route=value,route=value" settings."""
+    settings = {}
+    for item in value.split(","):
+        if "=" in item:
+            route, number = item.split("=", 1)
+            settings[route.strip()] = float(number)
+    return settings
+
+
+# Gemini calls run on their own thread pool, so bursts of uploads cannot starve other asyncio.to_thread work.
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "16"))
+# Per-route caps inside the global one; routes not listed are only bound by GEMINI_MAX_CONCURRENCY.
+GEMINI_ROUTE_CONCURRENCY = _route_settings(
+    os.environ.get("GEMINI_ROUTE_CONCURRENCY", "parse_query=8,parse_resume=8,upload=4")
+)
+GEMINI_DEADLINE_SECONDS = float(os.environ.get("GEMINI_DEADLINE_SECONDS", "60"))
+GEMINI_ROUTE_DEADLINES = _route_settings(
+    os.environ.get("GEMINI_ROUTE_DEADLINES", "parse_query=20,parse_resume=90,upload=60")
+)
+# Routes whose slow calls get a second, hedged attempt once the first one passes the route's p95 latency.
+GEMINI_HEDGE_ROUTES = {
+    route.strip() for route in os.environ.get("GEMINI_HEDGE_ROUTES", "").split(",") if route.strip()
+}
+GEMINI_HEDGE_PERCENTILE = float(os.environ.get("GEMINI_HEDGE_PERCENTILE", "95"))
+# Latency samples needed before a route's percentile is trusted for hedging.
+GEMINI_HEDGE_MIN_SAMPLES = int(os.environ.get("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+GEMINI_LATENCY_WINDOW = 500
+
+GEMINI_QUEUE_SECONDS = metrics.histogram(
+    "profile_search_gemini_queue_seconds",
+    "Time a Gemini call waited for a concurrency slot, by route, in seconds.",
+    labelnames=("route",),
+)
+GEMINI_CALL_SECONDS = metrics.histogram(
+    "profile_search_gemini_call_seconds",
+    "Duration of one Gemini call attempt by route and outcome (ok, error, timeout, cancelled), in seconds.",
+    labelnames=("route", "outcome"),
+)
+
+
+class _RouteState:
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.latencies: deque = deque(maxlen=GEMINI_LATENCY_WINDOW)
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedges_won = 0
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the recent successful latencies, once there are enough of them."""
+        if len(self.latencies) < GEMINI_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+class GeminiClient:
+    """
+    Shared async front for the blocking google.generativeai calls.
+    Each call holds a global and a per-route semaphore slot while it runs on a dedicated bounded thread pool,
+    is abandoned after its route deadline, and can be hedged with a second attempt when it runs past the
+    route's recent p95. Slots are released only when the worker thread actually finishes, so timed-out
+    calls still count against the limits until Gemini returns.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        route_concurrency: dict[str, float],
+        deadline_seconds: float,
+        route_deadlines: dict[str, float],
+        hedge_routes: set[str],
+        hedge_percentile: float = 95,
+    ):
+        self.max_concurrency = max_concurrency
+        self.route_concurrency = route_concurrency
+        self.deadline_seconds = deadline_seconds
+        self.route_deadlines = route_deadlines
+        self.hedge_routes = hedge_routes
+        self.hedge_percentile = hedge_percentile
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._routes: dict[str, _RouteState] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="gemini")
+            return self._executor
+
+    def _route(self, route: str) -> _RouteState:
+        with self._lock:
+            state = self._routes.get(route)
+            if state is None:
+                limit = self.route_concurrency.get(route)
+                state = self._routes[route] = _RouteState(int(limit) if limit else None)
+            return state
+
+    def _semaphores(self, state: _RouteState) -> list[asyncio.Semaphore]:
+        # Created per event loop, since CLIs run asyncio.run more than once per process.
+        loop = asyncio.get_running_loop()
+        if self._global is None or self._loop is not loop:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.max_concurrency)
+            for route_state in self._routes.values():
+                route_state.semaphore = None
+        if state.limit and state.semaphore is None:
+            state.semaphore = asyncio.Semaphore(state.limit)
+        return [semaphore for semaphore in (state.semaphore, self._global) if semaphore is not None]
+
+    async def _attempt(self, route: str, state: _RouteState, deadline: float, function: Callable, args, kwargs) -> Any:
+        semaphores = self._semaphores(state)
+        queue_start = time.perf_counter()
+        state.waiting += 1
+        acquired = []
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            state.waiting -= 1
+        queue_seconds = time.perf_counter() - queue_start
+        GEMINI_QUEUE_SECONDS.observe(queue_seconds, route=route)
+        state.in_flight += 1
+        start_time = time.perf_counter()
+
+        def _release(_future=None):
+            state.in_flight -= 1
+            for semaphore in acquired:
+                semaphore.release()
+
+        future = asyncio.get_running_loop().run_in_executor(self._get_executor(), lambda: function(*args, **kwargs))
+        outcome = "error"
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=max(deadline - queue_seconds, 0.001))
+            outcome = "ok"
+            state.latencies.append(time.perf_counter() - start_time)
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            state.timeouts += 1
+            raise TimeoutError(f"Gemini {route} call exceeded its {deadline:g}s deadline") from None
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception:
+            state.errors += 1
+            raise
+        finally:
+            GEMINI_CALL_SECONDS.observe(time.perf_counter() - start_time, route=route, outcome=outcome)
+            if future.done():
+                _release()
+            else:
+                future.add_done_callback(_release)
+
+    async def call(
+        self, route: str, function: Callable, *args, deadline: Optional[float] = None, hedge: Optional[bool] = None, **kwargs
+    ) -> Any:
+        """
+        Run a blocking Gemini SDK function under the route's limits and deadline.
+        hedge defaults to whether the route is listed in GEMINI_HEDGE_ROUTES.
+        """
+        state = self._route(route)
+        state.calls += 1
+        deadline = deadline or self.route_deadlines.get(route, self.deadline_seconds)
+        hedge = route in self.hedge_routes if hedge is None else hedge
+        hedge_after = state.percentile(self.hedge_percentile) if hedge else None
+        if hedge_after is None:
+            return await self._attempt(route, state, deadline, function, args, kwargs)
+
+        start_time = time.perf_counter()
+        first = asyncio.ensure_future(self._attempt(route, state, deadline, function, args, kwargs))
+        done, _ = await asyncio.wait({first}, timeout=hedge_after)
+        if done:
+            return first.result()
+        state.hedges += 1
+        logger.info(f"Hedging Gemini {route} call after {hedge_after:.2f}s (p{self.hedge_percentile:g})")
+        remaining = deadline - (time.perf_counter() - start_time)
+        second = asyncio.ensure_future(self._attempt(route, state, remaining, function, args, kwargs))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is second:
+                            state.hedges_won += 1
+                        return attempt.result()
+                    error = error or attempt.exception()
+            raise error
+        finally:
+            for attempt in pending:
+                attempt.cancel()
+
+    async def generate_content(self, route: str, model, contents, deadline: Optional[float] = None, hedge: Optional[bool] = None):
+        deadline = deadline or self.route_deadlines.get(route, self.deadline_seconds)
+        return await self.call(
+            route, model.generate_content, contents, deadline=deadline, hedge=hedge, request_options={"timeout": deadline}
+        )
+
+    async def upload_file(self, path: str, deadline: Optional[float] = None):
+        return await self.call("upload", genai.upload_file, path, deadline=deadline, hedge=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            routes = dict(self._routes)
+        return {
+            route: {
+                "limit": state.limit,
+                "waiting": state.waiting,
+                "in_flight": state.in_flight,
+                "calls": state.calls,
+                "timeouts": state.timeouts,
+                "errors": state.errors,
+                "hedges": state.hedges,
+                "hedges_won": state.hedges_won,
+                "p95_seconds": state.percentile(95),
+            }
+            for route, state in routes.items()
+        }
+
+
+gemini_client = GeminiClient(
+    max_concurrency=GEMINI_MAX_CONCURRENCY,
+    route_concurrency=GEMINI_ROUTE_CONCURRENCY,
+    deadline_seconds=GEMINI_DEADLINE_SECONDS,
+    route_deadlines=GEMINI_ROUTE_DEADLINES,
+    hedge_routes=GEMINI_HEDGE_ROUTES,
+    hedge_percentile=GEMINI_HEDGE_PERCENTILE,
+)
+
+
+def _collect(key: str):
+    return lambda: [({"route": route}, stats[key]) for route, stats in gemini_client.stats().items()]
+
+
+metrics.register_callback("profile_search_gemini_in_flight", "Gemini calls running, by route.", _collect("in_flight"))
+metrics.register_callback("profile_search_gemini_waiting", "Gemini calls waiting for a concurrency slot, by route.", _collect("waiting"))
+for _key in ("calls", "timeouts", "errors", "hedges", "hedges_won"):
+    metrics.register_callback(
+        f"profile_search_gemini_{_key}_total", f"Gemini {_key.replace('_', ' ')} by route.", _collect(_key), metric_type="counter"
+    )
@@ -1,7 +1,11 @@
 import json
 import logging
+import multiprocessing
 import time
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional
 import google.generativeai as genai
 import asyncio
@@ -9,113 +13,150 @@ from dotenv import load_dotenv
 
 from langchain_core.prompts import PromptTemplate
 from langchain.output_parsers import PydanticOutputParser
+from app.api.services.gemini_client import gemini_client
+from app.api.services.parse_cache import hash_file, parse_cache
 from app.api.utils.json_format import JsonFormat
+from app.api.utils.metrics import metrics, stage_timer
 from langfuse.callback import CallbackHandler
 from google.generativeai.types.file_types import File
+from app.api.utils.pdf_text import extract_pdf_text
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_MODEL = "gemini"
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
 CHUNK_SIZES = {
     "gemini-1.5-flash": int(128_000 * 0.8),
 }
+# Local text extraction is tried before uploading; scanned/image-only PDFs fall back to the upload path.
+PDF_TEXT_FAST_PATH = os.environ.get("PDF_TEXT_FAST_PATH", "true").lower() == "true"
+PDF_TEXT_MIN_CHARS = int(os.environ.get("PDF_TEXT_MIN_CHARS", "200"))
+PDF_TEXT_MIN_ALNUM_RATIO = float(os.environ.get("PDF_TEXT_MIN_ALNUM_RATIO", "0.5"))
+PDF_TEXT_WORKERS = int(os.environ.get("PDF_TEXT_WORKERS", "2"))
 
-async def gemini_parser_run(file):
-    """
-    Calls Gemini API to parse the resume file and returns the sanitized result.
-    Raises exceptions if any step fails.
-    """
-    try:
-        output_example = {
-            "name": "arun",
-            "email": ["arun@gmail.com"],
-            "mobile": ["9876543210"],
-            "address": {
-                "StreetAddress": "Flat 32, SJR Prime Apartments, Shubh Enclave",
-                "Location": "Bangalore",
-                "State": "Karnataka",
-                "Pincode": "560060",
+_pdf_text_executor: Optional[ProcessPoolExecutor] = None
+_model: Optional[genai.GenerativeModel] = None
+_model_lock = threading.Lock()
+parse_path_stats = {
+    "text": {"count": 0, "prepare_seconds": 0.0, "inference_seconds": 0.0, "bytes_sent": 0},
+    "upload": {"count": 0, "prepare_seconds": 0.0, "inference_seconds": 0.0, "bytes_sent": 0},
+}
+
+metrics.register_callback(
+    "profile_search_parse_path_total",
+    "Resumes parsed per path (local text layer or file upload).",
+    lambda: [({"path": path}, stats["count"]) for path, stats in parse_path_stats.items()],
+    metric_type="counter",
+)
+metrics.register_callback(
+    "profile_search_parse_path_bytes_sent_total",
+    "Bytes sent to Gemini per parse path.",
+    lambda: [({"path": path}, stats["bytes_sent"]) for path, stats in parse_path_stats.items()],
+    metric_type="counter",
+)
+metrics.register_callback(
+    "profile_search_parse_path_seconds_total",
+    "Seconds spent preparing and inferring per parse path.",
+    lambda: [
+        ({"path": path, "phase": phase}, stats[f"{phase}_seconds"])
+        for path, stats in parse_path_stats.items()
+        for phase in ("prepare", "inference")
+    ],
+    metric_type="counter",
+)
+
+def build_parse_prompt() -> str:
+    """Return the resume parsing prompt sent alongside the file."""
+    output_example = {
+        "name": "arun",
+        "email": ["arun@gmail.com"],
+        "mobile": ["9876543210"],
+        "address": {
+            "StreetAddress": "Flat 32, SJR Prime Apartments, Shubh Enclave",
+            "Location": "Bangalore",
+            "State": "Karnataka",
+            "Pincode": "560060",
+        },
+        "DOB": "1995-03-24",
+        "gender": "Male",
+        "maritalStatus": "Unmarried",
+        "skills": ["Java", "Springboot", "AWS Serverless", "SQL", "MongoDB"],
+        "certifications": [
+            {"Name": "AWS", "Specialization": "Cloud", "Year": "2021"},
+            {"Name": "Azure", "Specialization": "Cloud", "Year": "2020"},
+        ],
+        "bloodGroup": "B+",
+        "languages": ["English", "Hindi"],
+        "social": [
+            {"Type": "linkedIn", "URL": "https://in.linkedin.com/"},
+            {"Type": "Medium", "URL": "https://medium.com/.com/"},
+        ],
+        "hobbies": ["Reading", "Travelling", "Music"],
+        "education": [
+            {
+                "Course": "B.Tech",
+                "CourseType": "Full Time",
+                "Specialization": "Computer Science",
+                "YearOfPassing": "2016",
+                "MarksInPercentage": "9.7",
+                "GradeType": "CGPA",
+                "Institute": "Amrita Institute of Technology",
+                "Board": "Biju Pattanik University of Technology",
+                "isLatestEducation": True,
             },
-            "DOB": "1995-03-24",
-            "gender": "Male",
-            "maritalStatus": "Unmarried",
-            "skills": ["Java", "Springboot", "AWS Serverless", "SQL", "MongoDB"],
-            "certifications": [
-                {"Name": "AWS", "Specialization": "Cloud", "Year": "2021"},
-                {"Name": "Azure", "Specialization": "Cloud", "Year": "2020"},
-            ],
-            "bloodGroup": "B+",
-            "languages": ["English", "Hindi"],
-            "social": [
-                {"Type": "linkedIn", "URL": "https://in.linkedin.com/"},
-                {"Type": "Medium", "URL": "https://medium.com/.com/"},
-            ],
-            "hobbies": ["Reading", "Travelling", "Music"],
-            "education": [
-                {
-                    "Course": "B.Tech",
-                    "CourseType": "Full Time",
-                    "Specialization": "Computer Science",
-                    "YearOfPassing": "2016",
-                    "MarksInPercentage": "9.7",
-                    "GradeType": "CGPA",
-                    "Institute": "Amrita Institute of Technology",
-                    "Board": "Biju Pattanik University of Technology",
-                    "isLatestEducation": True,
-                },
+            {
+                "Course": "12th",
+                "CourseType": "Full Time",
+                "Specialization": "Science",
+                "YearOfPassing": "2012",
+                "MarksInPercentage": "85",
+                "GradeType": "Percentage",
+                "Institute": "G. M Junior College",
+                "Board": "CHSE",
+                "isLatestEducation": False,
+            },
+            {
+                "Course": "10th",
+                "CourseType": "Full Time",
+                "Specialization": "Science",
+                "YearOfPassing": "2010",
+                "MarksInPercentage": "87",
+                "GradeType": "Percentage",
+                "Institute": "College of Engineering",
+                "Board": "Odisha Board",
+                "isLatestEducation": False,
+            },
+        ],
+        "WorkExperience": {
+            "TotalYearsOfExperience": 8.5,
+            "WorkHistory": [
                 {
-                    "Course": "12th",
-                    "CourseType": "Full Time",
-                    "Specialization": "Science",
-                    "YearOfPassing": "2012",
-                    "MarksInPercentage": "85",
-                    "GradeType": "Percentage",
-                    "Institute": "G. M Junior College",
-                    "Board": "CHSE",
-                    "isLatestEducation": False,
+                    "Organisation": "InfoTech",
+                    "JobTitle": "Senior Software Engineer",
+                    "Role": "Developer",
+                    "Industry": "IT",
+                    "EmploymentType": "Full time",
+                    "StartDate": "2022-08-01",
+                    "EndDate": "Present",
+                    "isLatest": True,
                 },
                 {
-                    "Course": "10th",
-                    "CourseType": "Full Time",
-                    "Specialization": "Science",
-                    "YearOfPassing": "2010",
-                    "MarksInPercentage": "87",
-                    "GradeType": "Percentage",
-                    "Institute": "College of Engineering",
-                    "Board": "Odisha Board",
-                    "isLatestEducation": False,
+                    "Organisation": "Infotech2",
+                    "JobTitle": "Software engineer",
+                    "Role": "Developer",
+                    "Industry": "IT",
+                    "EmploymentType": "Full time",
+                    "StartDate": "2017-06-12",
+                    "EndDate": "2022-07-23",
+                    "isLatest": False,
                 },
             ],
-            "WorkExperience": {
-                "TotalYearsOfExperience": 8.5,
-                "WorkHistory": [
-                    {
-                        "Organisation": "InfoTech",
-                        "JobTitle": "Senior Software Engineer",
-                        "Role": "Developer",
-                        "Industry": "IT",
-                        "EmploymentType": "Full time",
-                        "StartDate": "2022-08-01",
-                        "EndDate": "Present",
-                        "isLatest": True,
-                    },
-                    {
-                        "Organisation": "Infotech2",
-                        "JobTitle": "Software engineer",
-                        "Role": "Developer",
-                        "Industry": "IT",
-                        "EmploymentType": "Full time",
-                        "StartDate": "2017-06-12",
-                        "EndDate": "2022-07-23",
-                        "isLatest": False,
-                    },
-                ],
-            },
-            "CurrentCTC": "15 LPA", 
-            "ExpectedCTC": "20 LPA"
-        }
-        example = json.dumps(output_example)
-        prompt = f"""You are a HR Recruiter. Parse the given file (content may have other languages apart from English) and extract the following fields in strictly valid JSON format.
+        },
+        "CurrentCTC": "15 LPA", 
+        "ExpectedCTC": "20 LPA"
+    }
+    example = json.dumps(output_example)
+    prompt = f"""You are a HR Recruiter. Parse the given file (content may have other languages apart from English) and extract the following fields in strictly valid JSON format.
             - Name
             - Email - list of emails
             - Mobile - list of mobile
@@ -178,51 +219,171 @@ async def gemini_parser_run(file):
             Output Example:
             {example}
             """
+    return prompt
+
+
+def is_usable_text(text: str) -> bool:
+    """A text layer is usable when it is long enough and mostly real characters rather than extraction noise."""
+    stripped = "".join(text.split())
+    if len(stripped) < PDF_TEXT_MIN_CHARS:
+        return False
+    alnum_count = sum(1 for char in stripped if char.isalnum())
+    return alnum_count / len(stripped) >= PDF_TEXT_MIN_ALNUM_RATIO
+
+
+async def extract_resume_text(file) -> Optional[str]:
+    """Return the PDF text layer if it is usable, else None."""
+    global _pdf_text_executor
+    if not PDF_TEXT_FAST_PATH:
+        return None
+    try:
+        if _pdf_text_executor is None:
+            # Spawned, not forked: a fork would copy the server's threads, locks and open Vespa/Gemini clients.
+            _pdf_text_executor = ProcessPoolExecutor(
+                max_workers=PDF_TEXT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        text = await asyncio.get_running_loop().run_in_executor(_pdf_text_executor, extract_pdf_text, file)
+    except BrokenProcessPool as ex:
+        # A dead worker leaves the pool unusable; drop it so the next resume starts a fresh one.
+        logger.error(f"PDF text extraction pool broke, recreating it: {ex}")
+        shutdown_pdf_text_executor(wait=False)
+        return None
+    except Exception as ex:
+        logger.warning(f"Local PDF text extraction failed, falling back to upload: {ex}")
+        return None
+    return text if is_usable_text(text) else None
+
+
+def shutdown_pdf_text_executor(wait: bool = True) -> None:
+    """Stop the PDF text extraction worker processes, if they were started."""
+    global _pdf_text_executor
+    executor, _pdf_text_executor = _pdf_text_executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+async def prepare_parse_contents(file, prompt: str) -> tuple[list, str, float]:
+    """
+    Build the Gemini request contents for a resume.
+    Uses the local text layer when usable, otherwise uploads the file. Returns (contents, path, seconds spent).
+    """
+    start_time = time.perf_counter()
+    text = await extract_resume_text(file)
+    if text is not None:
+        contents = [f"{prompt}\n\nThe resume content is provided below as extracted text.\n\nResume text:\n{text}"]
+        prepare_seconds = time.perf_counter() - start_time
+        logger.info(f"Time taken for local text extraction: {prepare_seconds:.4f} seconds ({len(text)} chars)")
+        _record_parse_path("text", prepare_seconds, len(contents[0].encode("utf-8")))
+        return contents, "text", prepare_seconds
+    uploaded_file, _ = await upload_resume(file)
+    prepare_seconds = time.perf_counter() - start_time
+    _record_parse_path("upload", prepare_seconds, os.path.getsize(file) + len(prompt.encode("utf-8")))
+    return [uploaded_file, prompt], "upload", prepare_seconds
+
+
+def _record_parse_path(path: str, prepare_seconds: float, bytes_sent: int) -> None:
+    stats = parse_path_stats[path]
+    stats["count"] += 1
+    stats["prepare_seconds"] += prepare_seconds
+    stats["bytes_sent"] += bytes_sent
+
+
+def record_parse_inference(path: str, inference_seconds: float) -> None:
+    stats = parse_path_stats[path]
+    stats["inference_seconds"] += inference_seconds
+    logger.info(
+        f"Parse path '{path}': count={stats['count']}, "
+        f"avg prepare={stats['prepare_seconds'] / stats['count']:.4f}s, "
+        f"avg inference={stats['inference_seconds'] / stats['count']:.4f}s, "
+        f"avg bytes sent={stats['bytes_sent'] // stats['count']}"
+    )
+
+
+async def upload_resume(file):
+    """Upload the resume file to Gemini. Returns the uploaded file handle and the upload time in seconds."""
+    start_time = time.perf_counter()
+    try:
+        with stage_timer("gemini_upload"):
+            uploaded_file = await gemini_client.upload_file(file)
+    except Exception as ex:
+        logger.error(f"Error uploading file to Gemini: {ex}")
+        raise RuntimeError(f"Error uploading file to Gemini: {ex}") from ex
+
+    if isinstance(uploaded_file, File):
+        logger.info(f"Gemini file upload details - Name: {uploaded_file.name}, Display name: {uploaded_file.display_name}, Mimetype: {uploaded_file.mime_type}, URI: {uploaded_file.uri}, Create Time: {uploaded_file.create_time}, Expiration time: {uploaded_file.expiration_time}, Update time: {uploaded_file.update_time}, Size in bytes: {uploaded_file.size_bytes}, Error: {uploaded_file.error}, State: {uploaded_file.state}")
+    elif isinstance(uploaded_file, str):
+        logger.warning(f"The upload file response from Gemini is str: {uploaded_file}")
+    else:
+        logger.warning("The file upload response is not of FILE type")
+    end_time = time.perf_counter()
+    time_taken = end_time - start_time
+    logger.info(f"Time taken for uploading call: {time_taken:.4f} seconds")
+    return uploaded_file, time_taken
+
+
+async def infer_resume(contents: list, model=None):
+    """Run Gemini inference on the given contents and sanitize the output. Returns the result and the inference time."""
+    model = model or get_model()
+    inference_start_time = time.perf_counter()
+    try:
+        with stage_timer("gemini_inference"):
+            llm_output = await gemini_client.generate_content("parse_resume", model, contents)
+        logger.debug(f"LLM OUTPUT: {llm_output.text}")
+    except Exception as ex:
+        logger.error(f"Error during Gemini inference: {ex}")
+        raise RuntimeError(f"Error during Gemini inference: {ex}") from ex
+
+    inference_end_time = time.perf_counter()
+    inference_time_taken = inference_end_time - inference_start_time
+    logger.info(f"Time taken for inference call: {inference_time_taken:.4f} seconds")
+
+    try:
+        sanitized_result = JsonFormat().process(llm_output.text)
+    except Exception as ex:
+        logger.error(f"Error processing LLM output to JSON: {ex}")
+        raise RuntimeError(f"Error processing LLM output to JSON: {ex}") from ex
+
+    if not sanitized_result:
+        logger.error("LLM parser returned no data.")
+        raise ValueError("LLM parser returned no data.")
+    return sanitized_result, inference_time_taken
+
+
+async def get_cached_parse(file, prompt: str) -> tuple[str, dict | None]:
+    """Return the parse cache key for a file and the cached result, if any."""
+    file_hash = await asyncio.to_thread(hash_file, file)
+    cache_key = parse_cache.build_key(file_hash, GEMINI_MODEL_NAME, prompt)
+    cached_result = await asyncio.to_thread(parse_cache.get, cache_key)
+    if cached_result is not None:
+        logger.info(f"Returning cached parse for file hash {file_hash}")
+    return cache_key, cached_result
+
+
+async def store_parse(cache_key: str, sanitized_result: dict, parse_seconds: float) -> None:
+    await asyncio.to_thread(parse_cache.put, cache_key, sanitized_result, parse_seconds)
+    logger.info(f"Parse cache miss stored (hit rate={parse_cache.hit_rate():.2%}, total saved={parse_cache.saved_seconds:.2f}s)")
+
+
+async def gemini_parser_run(file):
+    """
+    Calls Gemini API to parse the resume file and returns the sanitized result.
+    Raises exceptions if any step fails.
+    """
+    try:
+        prompt = build_parse_prompt()
+        cache_key, cached_result = await get_cached_parse(file, prompt)
+        if cached_result is not None:
+            return cached_result
 
         model = get_model()
 
         logger.info("Calling Gemini API for file parsing...")
+        contents, parse_path, time_taken = await prepare_parse_contents(file, prompt)
+        sanitized_result, inference_time_taken = await infer_resume(contents, model=model)
+        record_parse_inference(parse_path, inference_time_taken)
 
-        start_time = time.perf_counter()
-        try:
-            uploaded_file = await asyncio.to_thread(genai.upload_file, file)
-        except Exception as ex:
-            logger.error(f"Error uploading file to Gemini: {ex}")
-            raise RuntimeError(f"Error uploading file to Gemini: {ex}") from ex
-
-        if isinstance(uploaded_file, File):
-            logger.info(f"Gemini file upload details - Name: {uploaded_file.name}, Display name: {uploaded_file.display_name}, Mimetype: {uploaded_file.mime_type}, URI: {uploaded_file.uri}, Create Time: {uploaded_file.create_time}, Expiration time: {uploaded_file.expiration_time}, Update time: {uploaded_file.update_time}, Size in bytes: {uploaded_file.size_bytes}, Error: {uploaded_file.error}, State: {uploaded_file.state}")
-        elif isinstance(uploaded_file, str):
-            logger.warning(f"The upload file response from Gemini is str: {uploaded_file}")
-        else:
-            logger.warning("The file upload response is not of FILE type")
-        end_time = time.perf_counter()
-        time_taken = end_time - start_time
-        logger.info(f"Time taken for uploading call: {time_taken:.4f} seconds")
-
-        inference_start_time = time.perf_counter()
-        try:
-            llm_output = await asyncio.to_thread(model.generate_content, [uploaded_file, prompt])
-            print("LLM OUTPUT: ", llm_output.text)
-        except Exception as ex:
-            logger.error(f"Error during Gemini inference: {ex}")
-            raise RuntimeError(f"Error during Gemini inference: {ex}") from ex
-
-        inference_end_time = time.perf_counter()
-        inference_time_taken = inference_end_time - inference_start_time
-        logger.info(f"Time taken for inference call: {inference_time_taken:.4f} seconds")
-
-        try:
-            sanitized_result = JsonFormat().process(llm_output.text)
-        except Exception as ex:
-            logger.error(f"Error processing LLM output to JSON: {ex}")
-            raise RuntimeError(f"Error processing LLM output to JSON: {ex}") from ex
-
-        if not sanitized_result:
-            logger.error("LLM parser returned no data.")
-            raise ValueError("LLM parser returned no data.")
-
-        logger.info("Gemini parsing and sanitization successful.")
+        logger.info(f"Gemini parsing and sanitization successful via {parse_path} path.")
+        await store_parse(cache_key, sanitized_result, time_taken + inference_time_taken)
         return sanitized_result
 
     except Exception as ex:
@@ -230,10 +391,14 @@ async def gemini_parser_run(file):
         raise
 
 def get_model():
-    """Return Gemini model if GOOGLE_API_KEY is set, else raise ValueError."""
+    """Return the shared Gemini model if GOOGLE_API_KEY is set, else raise ValueError."""
+    global _model
     try:
         if "GOOGLE_API_KEY" in os.environ:
-            return genai.GenerativeModel("gemini-1.5-flash")
+            with _model_lock:
+                if _model is None:
+                    _model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+                return _model
         else:
             logger.error("GOOGLE_API_KEY not found in environment. Gemini model cannot be used.")
             raise ValueError(
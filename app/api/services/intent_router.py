@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from app.api.models.search_request import SearchRequest
+from app.api.utils.json_stream import iter_json_records
+from app.api.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+CHAT_FAST_PATH_ENABLED = os.environ.get("CHAT_FAST_PATH_ENABLED", "true").lower() == "true"
+# Datasets fed into Vespa; their skills, roles, titles and cities make up the slot vocabulary.
+CHAT_VOCABULARY_SOURCES = [
+    path.strip()
+    for path in os.environ.get("CHAT_VOCABULARY_SOURCES", "candidate_profiles.json,jobs.json").split(",")
+    if path.strip()
+]
+MAX_PHRASE_TOKENS = 4
+
+GREETING_MESSAGE = (
+    "Hello! 👋 I'm your AI assistant for profile management and job/candidate search. Here's what I can help you with:\n\n"
+    "📄 **Resume Parsing & Feeding:**\n"
+    "- Upload a resume and say 'parse this resume' or 'add this profile'\n"
+    "- I'll extract candidate information and save it to the database. Also, I will provide a list of top matching jobs based on your resume\n\n"
+    "🔍 **Candidate Search:**\n"
+    "- Search for candidates with specific criteria\n"
+    "- Examples: 'search for Python developers in Mumbai', 'find candidates with 5+ years experience', "
+    "'list Java developers with salary expectation 10-15 LPA'\n\n"
+    "What would you like to do today?"
+)
+NO_FILE_MESSAGE = "No file provided for parsing. Please upload a PDF resume."
+UPLOAD_FOR_JOBS_MESSAGE = "Please upload your resume for job matching."
+NO_FILTERS_MESSAGE = {
+    "error": "Please provide search filters like skills, job roles, location, experience, or salary requirements. "
+    "For example: 'search for Python developers in Mumbai with 3+ years experience'"
+}
+
+GREETING_PATTERN = re.compile(
+    r"^(hi|hii+|hello|hey|hiya|howdy|greetings|namaste|good\s+(morning|afternoon|evening))"
+    r"(\s+(there|team|bot|assistant|all))?[\s!.,]*$"
+)
+PARSE_PATTERN = re.compile(r"\b(parse|extract|analy[sz]e|process|feed|add|upload|save|store)\b")
+JOBS_PATTERN = re.compile(r"\b(find|search|show|list|matching|looking\s+for|recommend)\b.*\bjobs?\b|\bjob\s+(openings|listings)\b")
+SEARCH_PATTERN = re.compile(r"\b(search|find|look|looking|list|show|filter|get|need|want)\b")
+CANDIDATE_PATTERN = re.compile(r"\b(candidates?|people|developers?|engineers?)\b")
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_MIN_WORDS = r"at\s*least|min(?:imum)?|more\s+than|over|above|minimum\s+of"
+_MAX_WORDS = r"at\s*most|max(?:imum)?|less\s+than|under|below|up\s*to|within"
+_YEARS = r"(?:years?|yrs?)\b(?:\s+(?:of\s+)?(?:experience|exp)\b)?"
+_LAKHS = r"(?:lpa|lakhs?(?:\s+per\s+annum)?)\b"
+EXPERIENCE_RANGE = re.compile(rf"(?:between\s+)?{_NUMBER}\s*(?:-|to|and)\s*{_NUMBER}\s*\+?\s*{_YEARS}")
+EXPERIENCE_SINGLE = re.compile(rf"(?:({_MIN_WORDS}|{_MAX_WORDS})\s+)?{_NUMBER}\s*(\+)?\s*{_YEARS}")
+SALARY_RANGE = re.compile(rf"(?:between\s+)?{_NUMBER}\s*(?:-|to|and)\s*{_NUMBER}\s*{_LAKHS}")
+SALARY_SINGLE = re.compile(rf"(?:({_MIN_WORDS}|{_MAX_WORDS})\s+)?{_NUMBER}\s*(\+)?\s*{_LAKHS}")
+MAX_WORDS_PATTERN = re.compile(rf"^(?:{_MAX_WORDS})$")
+
+# Words that carry no slot value in a search request; anything else left unmatched makes the message ambiguous.
+FILLER_WORDS = {
+    "a", "all", "an", "and", "any", "are", "as", "at", "based", "be", "both", "can", "candidate", "candidates",
+    "city", "cities", "ctc", "currently", "developer", "developers", "engineer", "engineers", "exp", "expected",
+    "expecting", "expectation", "experience", "experienced", "filter", "find", "for", "from", "get", "good", "has",
+    "have", "having", "i", "in", "is", "know", "knowing", "knows", "like", "list", "located", "living", "look",
+    "looking", "me", "need", "of", "on", "or", "people", "please", "preferably", "profile", "profiles", "resumes",
+    "residing", "role", "roles", "salary", "search", "show", "skill", "skilled", "skills", "some", "the", "their",
+    "them", "title", "titles", "to", "want", "who", "whose", "with", "working", "years", "yrs",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens that keep skill spellings like c++, c# and node.js."""
+    return [token.rstrip(".") for token in re.findall(r"[a-z0-9][a-z0-9+#.]*", text.lower()) if token.rstrip(".")]
+
+
+@dataclass
+class ChatIntent:
+    """Result of routing a chat message locally: what to run and with which inputs."""
+
+    intent: str
+    search_params: Optional[dict] = None
+    reply: Any = None
+    slots: dict = field(default_factory=dict)
+
+
+class IntentVocabulary:
+    """Phrase -> (slot, canonical value) dictionary built from the skills, roles, titles and cities in the datasets."""
+
+    def __init__(self):
+        self.phrases: dict[str, list[tuple[str, str]]] = {}
+
+    def add(self, slot: str, value: Any, plural: bool = False) -> None:
+        if not isinstance(value, str) or not value.strip():
+            return
+        tokens = tokenize(value)
+        if not tokens or len(tokens) > MAX_PHRASE_TOKENS:
+            return
+        variants = [tokens]
+        if plural and not tokens[-1].endswith("s"):
+            variants.append([*tokens[:-1], tokens[-1] + "s"])
+        for variant in variants:
+            entries = self.phrases.setdefault(" ".join(variant), [])
+            if (slot, value.strip()) not in entries:
+                entries.append((slot, value.strip()))
+
+    @classmethod
+    def from_sources(cls, paths: list[str]) -> "IntentVocabulary":
+        vocabulary = cls()
+        for path in paths:
+            try:
+                for record in iter_json_records(path):
+                    for skill in record.get("skills") or []:
+                        vocabulary.add("skills", skill)
+                    for job in record.get("employment_history") or []:
+                        vocabulary.add("jobRole", job.get("role"), plural=True)
+                        vocabulary.add("jobTitle", job.get("job_title"), plural=True)
+                    vocabulary.add("jobRole", record.get("job_role"), plural=True)
+                    vocabulary.add("jobTitle", record.get("job_title"), plural=True)
+                    vocabulary.add("location", record.get("current_city"))
+                    for city in [*(record.get("preferred_cities") or []), *(record.get("location") or [])]:
+                        vocabulary.add("location", city)
+            except FileNotFoundError:
+                logger.warning(f"Chat vocabulary source {path} not found, skipping")
+        logger.info(f"Loaded chat intent vocabulary with {len(vocabulary.phrases)} phrases")
+        return vocabulary
+
+    def extract(self, tokens: list[str]) -> tuple[dict[str, list[str]], list[str]]:
+        """Greedy longest-phrase match. Returns the slot values found and the tokens no phrase covered."""
+        slots: dict[str, list[str]] = {}
+        unmatched = []
+        index = 0
+        while index < len(tokens):
+            for length in range(min(MAX_PHRASE_TOKENS, len(tokens) - index), 0, -1):
+                entries = self.phrases.get(" ".join(tokens[index:index + length]))
+                if entries:
+                    # A phrase that names a role or title is not also used as a skill.
+                    named = [entry for entry in entries if entry[0] != "skills"] or entries
+                    for slot, value in named:
+                        if value not in slots.setdefault(slot, []):
+                            slots[slot].append(value)
+                    index += length
+                    break
+            else:
+                unmatched.append(tokens[index])
+                index += 1
+        return slots, unmatched
+
+
+def _bound(modifier: Optional[str]) -> str:
+    return "max" if modifier and MAX_WORDS_PATTERN.match(re.sub(r"\s+", " ", modifier)) else "min"
+
+
+def extract_ranges(text: str) -> tuple[dict, str, bool]:
+    """
+    Pull experience (years) and expected salary (LPA) bounds out of the text.
+    Returns the numeric params, the text with those phrases removed, and False when a number is ambiguous.
+    """
+    params = {}
+    unambiguous = True
+
+    def _experience_range(match):
+        params["experienceMin"], params["experienceMax"] = int(float(match.group(1))), math.ceil(float(match.group(2)))
+        return " "
+
+    def _experience_single(match):
+        value = float(match.group(2))
+        if match.group(3) or _bound(match.group(1)) == "min":
+            params["experienceMin"] = int(value)
+        else:
+            params["experienceMax"] = math.ceil(value)
+        return " "
+
+    def _salary_range(match):
+        params["expectedSalaryMin"], params["expectedSalaryMax"] = int(float(match.group(1))), math.ceil(float(match.group(2)))
+        return " "
+
+    def _salary_single(match):
+        nonlocal unambiguous
+        value = float(match.group(2))
+        if match.group(3) or (match.group(1) and _bound(match.group(1)) == "min"):
+            params["expectedSalaryMin"] = int(value)
+        elif match.group(1):
+            params["expectedSalaryMax"] = math.ceil(value)
+        else:
+            # "10 LPA" alone could be a floor, a ceiling or a target; let the agent ask.
+            unambiguous = False
+        return " "
+
+    text = EXPERIENCE_RANGE.sub(_experience_range, text)
+    text = SALARY_RANGE.sub(_salary_range, text)
+    text = EXPERIENCE_SINGLE.sub(_experience_single, text)
+    text = SALARY_SINGLE.sub(_salary_single, text)
+    return params, text, unambiguous
+
+
+_vocabulary: Optional[IntentVocabulary] = None
+_vocabulary_lock = threading.Lock()
+
+
+def get_vocabulary() -> IntentVocabulary:
+    global _vocabulary
+    with _vocabulary_lock:
+        if _vocabulary is None:
+            _vocabulary = IntentVocabulary.from_sources(CHAT_VOCABULARY_SOURCES)
+        return _vocabulary
+
+
+def route_message(text: str, has_file: bool, vocabulary: IntentVocabulary) -> Optional[ChatIntent]:
+    """
+    Classify a chat message with rules and the slot vocabulary. Returns None when the message is not
+    clearly a greeting, a resume upload or a fully understood search, so the agent handles it.
+    """
+    text = (text or "").strip().lower()
+    if not text:
+        return ChatIntent("parse") if has_file else None
+    if GREETING_PATTERN.match(text):
+        return ChatIntent("reply", reply=GREETING_MESSAGE)
+    # "find candidates for a java developer job" mentions a job but asks for people; leave it to the rules below.
+    if JOBS_PATTERN.search(text) and not CANDIDATE_PATTERN.search(text):
+        return ChatIntent("parse") if has_file else ChatIntent("reply", reply=UPLOAD_FOR_JOBS_MESSAGE)
+    if PARSE_PATTERN.search(text):
+        if has_file:
+            return ChatIntent("parse")
+        if not CANDIDATE_PATTERN.search(text):
+            return ChatIntent("reply", reply=NO_FILE_MESSAGE)
+
+    numeric_params, remaining_text, unambiguous = extract_ranges(text)
+    if not unambiguous:
+        return None
+    slots, unmatched = vocabulary.extract(tokenize(remaining_text))
+    unknown = [token for token in unmatched if token not in FILLER_WORDS]
+    if unknown:
+        logger.info(f"Chat fast path declined, unknown terms: {unknown}")
+        return None
+    if not slots:
+        if not numeric_params and SEARCH_PATTERN.search(text) and CANDIDATE_PATTERN.search(text):
+            return ChatIntent("reply", reply=NO_FILTERS_MESSAGE)
+        return None
+    search_params = {"searchType": "both", "searchParams": {**slots, **numeric_params}}
+    try:
+        SearchRequest(**search_params)
+    except ValueError as ex:
+        logger.info(f"Chat fast path declined, search request is invalid: {ex}")
+        return None
+    return ChatIntent("search", search_params=search_params, slots=search_params["searchParams"])
+
+
+async def route_chat_message(text: str, has_file: bool) -> Optional[ChatIntent]:
+    """route_message with the vocabulary loaded off the event loop on first use."""
+    if not CHAT_FAST_PATH_ENABLED:
+        return None
+    vocabulary = _vocabulary if _vocabulary is not None else await asyncio.to_thread(get_vocabulary)
+    return route_message(text, has_file, vocabulary)
+
+
+CHAT_SECONDS = metrics.histogram(
+    "profile_search_chat_seconds",
+    "Latency of /chat messages by route: fast-path intent or the agent.",
+    labelnames=("route",),
+)
+
+
+class ChatRouteStats:
+    """Share of /chat messages answered by the fast path and the agent time it is estimated to save."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: dict[str, int] = {}
+        self.seconds: dict[str, float] = {}
+
+    def record(self, route: str, seconds: float) -> None:
+        CHAT_SECONDS.observe(seconds, route=route)
+        with self._lock:
+            self.counts[route] = self.counts.get(route, 0) + 1
+            self.seconds[route] = self.seconds.get(route, 0.0) + seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self.counts.values())
+            fast = total - self.counts.get("agent", 0)
+            fast_seconds = sum(seconds for route, seconds in self.seconds.items() if route != "agent")
+            agent_mean = self.seconds.get("agent", 0.0) / self.counts["agent"] if self.counts.get("agent") else None
+            fast_mean = fast_seconds / fast if fast else None
+            return {
+                "messages": total,
+                "fast_path": fast,
+                "agent": self.counts.get("agent", 0),
+                "fast_path_coverage": fast / total if total else 0.0,
+                "routes": dict(self.counts),
+                "agent_mean_seconds": agent_mean,
+                "fast_path_mean_seconds": fast_mean,
+                # Each fast-path message would otherwise have cost a mean agent run.
+                "estimated_seconds_saved": (
+                    max(0.0, agent_mean - fast_mean) * fast if agent_mean is not None and fast_mean is not None else None
+                ),
+            }
+
+
+chat_route_stats = ChatRouteStats()
+metrics.register_stats("profile_search_chat_router", "Chat fast-path router", chat_route_stats.stats)
@@ -1,35 +1,57 @@
-import json
+import logging
+
 from app.api.models.builder.job_response_builder import JobResponseBuilder
 from app.api.models.search_request import SearchParams, SearchRequest
-from app.api.services.search_candidate_service import build_query, fetch_results, filter_field_data, format_response, validate_pagination
-from app.api.utils.query_builder import build_query_for_years_of_experience, build_query_from_list, build_range_query, get_field_presence
+from app.api.services.search_cache import search_cache
+from app.api.services.search_planner import plan_search
+from app.api.services.search_candidate_service import (
+    build_query,
+    embed_query_vectors,
+    fetch_results,
+    format_response,
+    validate_pagination,
+)
+from app.api.utils.query_builder import get_field_presence
 from app.api.utils.search_fields_map import job_field_map
 
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
 
-def search_job(job_request: SearchRequest):
+async def search_job(job_request: SearchRequest):
     """Call the search API with the given search params."""
-    print("IM IN SEARCH JOB TOOL ",job_request)
+    logger.info(f"Searching jobs for {job_request.searchParams}")
     job_request = SearchRequest(searchType="both",searchParams=job_request.searchParams)
     limit, offset = validate_pagination(page_number="1", page_size="10")
-    query, nearest_neighbour_inputs = build_query(job_request, job_field_map, "job", limit, offset)
+    cache_key = search_cache.build_key(job_request, "job", limit, offset)
+    cached_results = search_cache.get(cache_key)
+    if cached_results is not None:
+        return cached_results
+    plan = await plan_search(job_request, "job", limit)
+    query_vectors = await embed_query_vectors(job_request.searchParams)
+    query, nearest_neighbour_inputs = build_query(
+        job_request, job_field_map, "job", limit, offset, plan=plan, query_vectors=query_vectors
+    )
     field_presence = get_field_presence(job_request.searchParams)
-    query_results = fetch_results(query, nearest_neighbour_inputs, field_presence)
+    query_results = await fetch_results(query, nearest_neighbour_inputs, field_presence)
     formatted_results = format_jobs(query_results)
+    search_cache.put(cache_key, formatted_results)
     return formatted_results
 
 def format_jobs(query_results: list[dict]):
     try:
-        formatted_responses = []
         if query_results:
-            for response in query_results:
-                result = JobResponseBuilder().from_query_results(response)
-                formatted_responses.append(json.loads(result.model_dump_json()))
-            return formatted_responses
+            builder = JobResponseBuilder()
+            return [builder.to_dict(response) for response in query_results]
         else:
             return query_results
     except Exception as ex:
-        print("Exception in formatting job response: ",ex)
-        # logger.error(f"Exception in {__file__} while formatting response: {ex}")
+        logger.error(f"Exception in {__file__} while formatting job response: {ex}")
         raise RuntimeError(
             f"Error while formatting job response: {ex}"
         ) from ex
\ No newline at end of file
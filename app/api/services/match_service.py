@@ -0,0 +1,153 @@
+import logging
+import math
+from typing import Any, Optional
+
+from app.api.exceptions.document_not_found_exception import DocumentNotFoundError
+from app.api.models.search_request import SearchRequest
+from app.api.services.job_service import format_jobs
+from app.api.services.search_candidate_service import (
+    build_query,
+    embed_query_vectors,
+    fetch_results,
+    format_response,
+    validate_pagination,
+)
+from app.api.services.search_planner import SearchPlan, plan_search
+from app.api.utils.query_builder import build_query_for_ids, get_field_presence
+from app.api.utils.search_fields_map import candidate_field_map, job_field_map
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+# Document-summary class in both schemas with the match inputs: text, hard-filter attributes and stored tensors.
+EMBEDDINGS_SUMMARY = "embeddings"
+
+
+def _as_vector(value: Any) -> Optional[list[float]]:
+    """
+    Read a stored tensor rendered with presentation.format.tensors=short-value.
+    Dense tensors come back as a list; mixed p{} tensors as {label: list}, which are averaged into one vector.
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        if "values" in value:
+            return _as_vector(value["values"])
+        vectors = [vector for vector in (value.get("blocks") or value).values() if vector]
+        if not vectors:
+            return None
+        return [sum(cells) / len(vectors) for cells in zip(*vectors)]
+    if isinstance(value, list) and value and isinstance(value[0], list):
+        return [sum(cells) / len(value) for cells in zip(*value)]
+    return list(value) if value else None
+
+
+async def fetch_source_document(schema: str, field_map: dict, document_id: str) -> dict:
+    """Fetch the match inputs of one document, including its stored embeddings, by id."""
+    query = build_query_for_ids(schema, field_map["id"], [document_id])
+    hits = await fetch_results(
+        f"{query} limit 1",
+        {"presentation.summary": EMBEDDINGS_SUMMARY, "presentation.format.tensors": "short-value"},
+        None,
+        ranking="unranked",
+    )
+    if not hits:
+        raise DocumentNotFoundError(f"No {schema} document with id {document_id}")
+    return hits[0].get("fields", {})
+
+
+def _text_list(value: Any) -> list[str]:
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, str) and item.strip()]
+    return [value] if isinstance(value, str) and value.strip() else []
+
+
+def build_job_search_request(payload: dict, apply_filters: bool = True) -> SearchRequest:
+    """Build the job-match search from a candidate's Vespa fields."""
+    search_params = {
+        "skills": _text_list(payload.get("skills")),
+        "jobRole": _text_list(payload.get("latest_role")),
+        "jobTitle": _text_list(payload.get("latest_job_title")),
+    }
+    if apply_filters:
+        search_params["location"] = _text_list(payload.get("preferred_and_current_cities"))
+        search_params["experienceMin"] = (
+            int(payload["total_months_of_experience"]) // 12
+            if payload.get("total_months_of_experience") is not None
+            else None
+        )
+        search_params["expectedSalaryMin"] = int(payload["expected_annual_ctc"]) if payload.get("expected_annual_ctc") else None
+    return SearchRequest(searchType="both", searchParams=search_params)
+
+
+def build_candidate_search_request(job: dict, apply_filters: bool = True) -> SearchRequest:
+    """Build the candidate-match search from a job's Vespa fields."""
+    search_params = {
+        "skills": _text_list(job.get("skills")),
+        "jobRole": _text_list(job.get("job_role")),
+        "jobTitle": _text_list(job.get("job_title")),
+    }
+    if apply_filters:
+        search_params["location"] = _text_list(job.get("location"))
+        search_params["experienceMin"] = (
+            int(job["total_months_of_experience"]) // 12 if job.get("total_months_of_experience") is not None else None
+        )
+        # Candidates whose expected CTC fits the job's budget.
+        search_params["expectedSalaryMax"] = math.ceil(job["annual_ctc"]) if job.get("annual_ctc") else None
+    return SearchRequest(searchType="both", searchParams=search_params)
+
+
+async def _run_match(
+    request_body: SearchRequest,
+    query_vectors: dict,
+    field_map: dict,
+    schema: str,
+    page_number: str,
+    page_size: str,
+) -> tuple[list[dict] | None, SearchPlan]:
+    limit, offset = validate_pagination(page_number=page_number, page_size=page_size)
+    plan = await plan_search(request_body, schema, limit)
+    # Fields the source document has no stored embedding for are embedded from their text.
+    query_vectors = await embed_query_vectors(request_body.searchParams, query_vectors)
+    query, nearest_neighbour_inputs = build_query(
+        request_body, field_map, schema, limit, offset, plan=plan, query_vectors=query_vectors
+    )
+    field_presence = get_field_presence(request_body.searchParams)
+    return await fetch_results(query, nearest_neighbour_inputs, field_presence), plan
+
+
+async def match_jobs_for_candidate(
+    candidate_id: str, page_number: str = "1", page_size: str = "10", apply_filters: bool = True
+) -> tuple[list[dict] | None, SearchPlan]:
+    """Jobs for a stored candidate, searched with the candidate's own embeddings as query tensors."""
+    candidate = await fetch_source_document("candidate_profile", candidate_field_map, candidate_id)
+    request_body = build_job_search_request(candidate, apply_filters=apply_filters)
+    query_vectors = {
+        "skills": _as_vector(candidate.get("skills_embedding")),
+        "jobRole": _as_vector(candidate.get("latest_role_embedding")),
+        "jobTitle": _as_vector(candidate.get("latest_job_title_embedding")),
+    }
+    hits, plan = await _run_match(request_body, query_vectors, job_field_map, "job", page_number, page_size)
+    return format_jobs(hits), plan
+
+
+async def match_candidates_for_job(
+    job_id: str, page_number: str = "1", page_size: str = "10", apply_filters: bool = True
+) -> tuple[list[dict] | None, SearchPlan]:
+    """Candidates for a stored job, searched with the job's own embeddings as query tensors."""
+    job = await fetch_source_document("job", job_field_map, job_id)
+    request_body = build_candidate_search_request(job, apply_filters=apply_filters)
+    query_vectors = {
+        "skills": _as_vector(job.get("skills_embedding")),
+        "jobRole": _as_vector(job.get("job_role_embedding")),
+        "jobTitle": _as_vector(job.get("job_title_embedding")),
+    }
+    hits, plan = await _run_match(
+        request_body, query_vectors, candidate_field_map, "candidate_profile", page_number, page_size
+    )
+    return format_response(hits), plan
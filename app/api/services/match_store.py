@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+from app.api.exceptions.document_not_found_exception import DocumentNotFoundError
+from app.api.services.match_service import match_candidates_for_job, match_jobs_for_candidate
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+MATCH_STORE_ENABLED = os.environ.get("MATCH_STORE_ENABLED", "false").lower() == "true"
+MATCH_STORE_PATH = os.environ.get("MATCH_STORE_PATH", os.path.join(".cache", "match_store.sqlite3"))
+MATCH_TOP_K = int(os.environ.get("MATCH_TOP_K", "20"))
+# Also keep the top-K candidates of every job, maintained from the same refreshes.
+MATCH_STORE_JOB_CANDIDATES = os.environ.get("MATCH_STORE_JOB_CANDIDATES", "false").lower() == "true"
+# How far down a new or changed job's own candidate ranking to look for candidates whose top-K it may enter.
+MATCH_RECHECK_DEPTH = int(os.environ.get("MATCH_RECHECK_DEPTH", "200"))
+MATCH_REFRESH_CONCURRENCY = int(os.environ.get("MATCH_REFRESH_CONCURRENCY", "8"))
+
+CANDIDATE_JOBS = "candidate_jobs"
+JOB_CANDIDATES = "job_candidates"
+
+
+class MatchStore:
+    """
+    SQLite table of precomputed top-K matches per source document.
+    match_sets holds the serving payload; match_entries indexes (source, target) pairs so a changed target
+    can find the sources that currently list it.
+    """
+
+    def __init__(self, path: str, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS match_sets (
+                    direction TEXT NOT NULL,
+                    source_id TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    computed_at REAL NOT NULL,
+                    PRIMARY KEY (direction, source_id)
+                )"""
+            )
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS match_entries (
+                    direction TEXT NOT NULL,
+                    source_id TEXT NOT NULL,
+                    target_id TEXT NOT NULL,
+                    score REAL,
+                    PRIMARY KEY (direction, source_id, target_id)
+                )"""
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_match_entries_target ON match_entries(direction, target_id)")
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def get(self, direction: str, source_id: str) -> Optional[dict]:
+        with self._lock:
+            connection = self._connect()
+            try:
+                row = connection.execute(
+                    "SELECT results, computed_at FROM match_sets WHERE direction = ? AND source_id = ?",
+                    (direction, source_id),
+                ).fetchone()
+            finally:
+                connection.close()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return {"results": json.loads(row[0]), "computed_at": row[1]}
+
+    def put(self, direction: str, source_id: str, results: list[dict]) -> None:
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO match_sets VALUES (?, ?, ?, ?)",
+                    (direction, source_id, json.dumps(results), time.time()),
+                )
+                connection.execute(
+                    "DELETE FROM match_entries WHERE direction = ? AND source_id = ?", (direction, source_id)
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO match_entries VALUES (?, ?, ?, ?)",
+                    [
+                        (direction, source_id, result["id"], result.get("relevance_score"))
+                        for result in results
+                        if result.get("id") is not None
+                    ],
+                )
+                connection.commit()
+            finally:
+                connection.close()
+
+    def delete(self, direction: str, source_id: str) -> None:
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute("DELETE FROM match_sets WHERE direction = ? AND source_id = ?", (direction, source_id))
+                connection.execute("DELETE FROM match_entries WHERE direction = ? AND source_id = ?", (direction, source_id))
+                connection.commit()
+            finally:
+                connection.close()
+
+    def sources_for_target(self, direction: str, target_id: str) -> list[str]:
+        with self._lock:
+            connection = self._connect()
+            try:
+                rows = connection.execute(
+                    "SELECT source_id FROM match_entries WHERE direction = ? AND target_id = ?", (direction, target_id)
+                ).fetchall()
+            finally:
+                connection.close()
+        return [row[0] for row in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            connection = self._connect()
+            try:
+                counts = dict(connection.execute("SELECT direction, COUNT(*) FROM match_sets GROUP BY direction").fetchall())
+            finally:
+                connection.close()
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "top_k": MATCH_TOP_K,
+                "sources": counts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+match_store = MatchStore(path=MATCH_STORE_PATH, enabled=MATCH_STORE_ENABLED)
+
+
+async def refresh_candidate(candidate_id: str, update_jobs: bool = MATCH_STORE_JOB_CANDIDATES) -> list[str]:
+    """
+    Recompute one candidate's top-K jobs. Returns the jobs whose candidate lists the change may affect:
+    the candidate's new matches plus the jobs that listed it before.
+    """
+    try:
+        jobs, _ = await match_jobs_for_candidate(candidate_id, page_size=str(MATCH_TOP_K))
+    except DocumentNotFoundError:
+        await asyncio.to_thread(match_store.delete, CANDIDATE_JOBS, candidate_id)
+        jobs = []
+    else:
+        await asyncio.to_thread(match_store.put, CANDIDATE_JOBS, candidate_id, jobs or [])
+    if not update_jobs:
+        return []
+    affected = set(await asyncio.to_thread(match_store.sources_for_target, JOB_CANDIDATES, candidate_id))
+    affected.update(job["id"] for job in jobs or [] if job.get("id"))
+    return sorted(affected)
+
+
+async def refresh_job(job_id: str, update_jobs: bool = MATCH_STORE_JOB_CANDIDATES) -> list[str]:
+    """
+    Recompute what a new or changed job affects. Returns the candidates that must be re-matched:
+    those whose stored top-K lists the job, plus the best MATCH_RECHECK_DEPTH candidates for the job,
+    the only ones the job can newly enter the top-K of.
+    """
+    affected = set(await asyncio.to_thread(match_store.sources_for_target, CANDIDATE_JOBS, job_id))
+    try:
+        candidates, _ = await match_candidates_for_job(job_id, page_size=str(MATCH_RECHECK_DEPTH))
+    except DocumentNotFoundError:
+        await asyncio.to_thread(match_store.delete, JOB_CANDIDATES, job_id)
+        return sorted(affected)
+    affected.update(candidate["id"] for candidate in candidates or [] if candidate.get("id"))
+    if update_jobs:
+        await asyncio.to_thread(match_store.put, JOB_CANDIDATES, job_id, (candidates or [])[:MATCH_TOP_K])
+    return sorted(affected)
+
+
+async def _run_all(refresh, ids: Iterable[str], concurrency: int) -> tuple[int, int, set[str]]:
+    slots = asyncio.Semaphore(concurrency)
+    counts = {"refreshed": 0, "failed": 0}
+    affected: set[str] = set()
+
+    async def _one(document_id: str):
+        async with slots:
+            try:
+                affected.update(await refresh(document_id))
+                counts["refreshed"] += 1
+            except Exception as ex:
+                counts["failed"] += 1
+                logger.error(f"Exception in {__file__} while refreshing matches for {document_id}: {ex}")
+
+    await asyncio.gather(*(_one(document_id) for document_id in dict.fromkeys(ids)))
+    return counts["refreshed"], counts["failed"], affected
+
+
+async def refresh_matches(
+    candidate_ids: Iterable[str] = (),
+    job_ids: Iterable[str] = (),
+    concurrency: int = MATCH_REFRESH_CONCURRENCY,
+    update_jobs: bool = MATCH_STORE_JOB_CANDIDATES,
+) -> dict:
+    """
+    Incrementally bring the store up to date after candidates and/or jobs were fed.
+    Changed jobs first expand to the candidates they can affect; every affected candidate is then re-matched once.
+    """
+    start_time = time.perf_counter()
+    _, jobs_failed, candidates_from_jobs = await _run_all(
+        lambda job_id: refresh_job(job_id, update_jobs=update_jobs), job_ids, concurrency
+    )
+    candidates = list(dict.fromkeys([*candidate_ids, *candidates_from_jobs]))
+    refreshed, failed, jobs_from_candidates = await _run_all(
+        lambda candidate_id: refresh_candidate(candidate_id, update_jobs=update_jobs), candidates, concurrency
+    )
+    if update_jobs:
+        # Jobs whose candidate lists may have shifted, other than the ones recomputed above.
+        remaining_jobs = jobs_from_candidates - set(job_ids)
+        await _run_all(lambda job_id: refresh_job(job_id, update_jobs=True), remaining_jobs, concurrency)
+    summary = {
+        "jobs_changed": len(set(job_ids)),
+        "jobs_failed": jobs_failed,
+        "candidates_refreshed": refreshed,
+        "candidates_failed": failed,
+        "elapsed_seconds": round(time.perf_counter() - start_time, 3),
+    }
+    logger.info(f"Match store refresh: {summary}")
+    return summary
+
+
+def serves_from_store(direction: str, limit: int, offset: int, apply_filters: bool) -> bool:
+    """
+    Stored lists cover the filtered top-K only; other pages and unfiltered matches go to Vespa.
+    limit is the page's end index, as returned by validate_pagination.
+    """
+    if not match_store.enabled or not apply_filters or limit > MATCH_TOP_K:
+        return False
+    return direction == CANDIDATE_JOBS or MATCH_STORE_JOB_CANDIDATES
+
+
+async def stored_matches(direction: str, source_id: str, limit: int, offset: int) -> tuple[list[dict], str]:
+    """
+    Serve one page of a source's matches from the store, computing and storing the top-K on a miss.
+    Returns the page and a plan description for the X-Search-Plan header.
+    """
+    stored = await asyncio.to_thread(match_store.get, direction, source_id)
+    if stored is None:
+        match = match_jobs_for_candidate if direction == CANDIDATE_JOBS else match_candidates_for_job
+        results, plan = await match(source_id, page_size=str(MATCH_TOP_K))
+        results = results or []
+        await asyncio.to_thread(match_store.put, direction, source_id, results)
+        return results[offset:limit], f"{plan.describe()};stored=true"
+    return (
+        stored["results"][offset:limit],
+        f"strategy=precomputed;computed_at={round(stored['computed_at'], 3)}",
+    )
+
+
+_background_refreshes: set[asyncio.Task] = set()
+
+
+def schedule_refresh(candidate_ids: Iterable[str] = (), job_ids: Iterable[str] = ()) -> None:
+    """Refresh matches for fed documents in the background when the store is enabled."""
+    if not match_store.enabled:
+        return
+    task = asyncio.create_task(refresh_matches(list(candidate_ids), list(job_ids)))
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
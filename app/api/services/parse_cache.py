@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from app.api.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_ENABLED = os.environ.get("PARSE_CACHE_ENABLED", "true").lower() == "true"
+PARSE_CACHE_PATH = os.environ.get("PARSE_CACHE_PATH", os.path.join(".cache", "resume_parse_cache.sqlite3"))
+PARSE_CACHE_MAX_BYTES = int(os.environ.get("PARSE_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 of the file contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Content-addressed SQLite store for sanitized resume parses.
+    Entries are evicted least-recently-used first once the stored payload exceeds max_bytes.
+    Errors are logged and treated as misses so the cache never breaks parsing.
+    """
+
+    def __init__(self, path: str, max_bytes: int, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS parse_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    parse_seconds REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )"""
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_last_accessed ON parse_cache(last_accessed)")
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    @staticmethod
+    def build_key(file_hash: str, model_name: str, prompt: str) -> str:
+        prompt_version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        return f"{file_hash}:{model_name}:{prompt_version}"
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                connection = self._connect()
+                try:
+                    row = connection.execute(
+                        "SELECT result, parse_seconds FROM parse_cache WHERE cache_key = ?", (cache_key,)
+                    ).fetchone()
+                    if row is None:
+                        self.misses += 1
+                        return None
+                    connection.execute(
+                        "UPDATE parse_cache SET last_accessed = ? WHERE cache_key = ?", (time.time(), cache_key)
+                    )
+                    connection.commit()
+                finally:
+                    connection.close()
+                self.hits += 1
+                self.saved_seconds += row[1]
+            logger.info(
+                f"Parse cache hit: saved {row[1]:.4f} seconds "
+                f"(hits={self.hits}, misses={self.misses}, hit rate={self.hit_rate():.2%}, total saved={self.saved_seconds:.2f}s)"
+            )
+            return json.loads(row[0])
+        except Exception as ex:
+            logger.warning(f"Parse cache lookup failed, treating as miss: {ex}")
+            return None
+
+    def put(self, cache_key: str, result: dict, parse_seconds: float) -> None:
+        if not self.enabled:
+            return
+        try:
+            payload = json.dumps(result)
+            now = time.time()
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                connection = self._connect()
+                try:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?, ?, ?)",
+                        (cache_key, payload, len(payload), parse_seconds, now, now),
+                    )
+                    self._evict(connection)
+                    connection.commit()
+                finally:
+                    connection.close()
+        except Exception as ex:
+            logger.warning(f"Parse cache store failed: {ex}")
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        total_bytes = connection.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM parse_cache").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+        rows = connection.execute("SELECT cache_key, size_bytes FROM parse_cache ORDER BY last_accessed ASC").fetchall()
+        evicted = 0
+        for cache_key, size_bytes in rows:
+            if total_bytes <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM parse_cache WHERE cache_key = ?", (cache_key,))
+            total_bytes -= size_bytes
+            evicted += 1
+        logger.info(f"Parse cache evicted {evicted} entries to stay under {self.max_bytes} bytes")
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+parse_cache = ParseCache(path=PARSE_CACHE_PATH, max_bytes=PARSE_CACHE_MAX_BYTES, enabled=PARSE_CACHE_ENABLED)
+metrics.register_stats(
+    "profile_search_parse_cache",
+    "Resume parse cache",
+    lambda: {"hits": parse_cache.hits, "misses": parse_cache.misses, "hit_rate": parse_cache.hit_rate(), "saved_seconds": parse_cache.saved_seconds},
+)
@@ -1,17 +1,21 @@
+import asyncio
 import logging
 import time
+from typing import Optional
+
 import google.generativeai as genai
 
-from app.api.services.gemini_service import get_model
+from app.api.models.search_request import SearchRequest
+from app.api.services.gemini_client import gemini_client
+from app.api.services.gemini_service import GEMINI_MODEL_NAME, get_model
+from app.api.services.query_parse_cache import normalize_query, query_parse_cache
 from app.api.utils.json_format import JsonFormat
+from app.api.utils.metrics import stage_timer
 
 
 logger = logging.getLogger(__name__)
 
-
-def parse_query(query: str):
-    try:
-        prompt = f"""
+PARSE_QUERY_PROMPT = """
             You are an intent classifier and information extractor.
 
             Given this user input:
@@ -47,13 +51,52 @@ def parse_query(query: str):
             "searchParams": null OR searchParamsObject
             }}
         """
+
+# parse_query returns lowercased keys; these are the SearchParams names they stand for.
+SEARCH_PARAM_NAMES = {
+    "skills": "skills",
+    "jobrole": "jobRole",
+    "jobtitle": "jobTitle",
+    "location": "location",
+    "experiencemin": "experienceMin",
+    "experiencemax": "experienceMax",
+    "expectedsalarymin": "expectedSalaryMin",
+    "expectedsalarymax": "expectedSalaryMax",
+}
+
+
+def search_request_from_parse(parsed: dict) -> Optional[dict]:
+    """SearchRequest payload for a SEARCH parse, or None when the parse is not a usable search."""
+    if str(parsed.get("intent") or "").upper() != "SEARCH" or not isinstance(parsed.get("searchparams"), dict):
+        return None
+    parsed_params = parsed["searchparams"]
+    search_params = {name: parsed_params[key] for key, name in SEARCH_PARAM_NAMES.items() if parsed_params.get(key)}
+    payload = {"searchType": parsed_params.get("searchtype") or "both", "searchParams": search_params}
+    try:
+        SearchRequest(**payload)
+    except ValueError as ex:
+        logger.info(f"Parsed chat query is not a valid search request: {ex}")
+        return None
+    return payload
+
+
+async def parse_query(query: str):
+    try:
+        prompt = PARSE_QUERY_PROMPT.format(query=query)
+        normalized_query = normalize_query(query)
+        cache_key = query_parse_cache.build_key(normalized_query, GEMINI_MODEL_NAME, PARSE_QUERY_PROMPT)
+        cached_result, query_vector = await asyncio.to_thread(query_parse_cache.get, cache_key, normalized_query)
+        if cached_result is not None:
+            return cached_result
+
         model = get_model()
 
         logger.info("Calling Gemini API for text parsing...")
 
         start_time = time.perf_counter()
         try:
-            response = model.generate_content(prompt)
+            with stage_timer("gemini_query_inference"):
+                response = await gemini_client.generate_content("parse_query", model, prompt)
             print(response.text)
             logger.info(f"Gemini response: {response.text}")
         except Exception as ex:
@@ -88,6 +131,7 @@ def parse_query(query: str):
             raise ValueError("LLM parser returned no data.")
 
         logger.info("Gemini parsing and sanitization successful.")
+        await asyncio.to_thread(query_parse_cache.put, cache_key, normalized_query, sanitized_result, time_taken, query_vector)
         return sanitized_result
     except Exception as ex:
         logger.error(f"LLM parser failed: {ex}")
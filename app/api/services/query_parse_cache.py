@@ -0,0 +1,388 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Optional
+
+from app.api.services.embedding_service import embedding_service
+from app.api.services.intent_router import FILLER_WORDS, get_vocabulary, tokenize
+from app.api.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+QUERY_PARSE_CACHE_ENABLED = os.environ.get("QUERY_PARSE_CACHE_ENABLED", "true").lower() == "true"
+QUERY_PARSE_CACHE_PATH = os.environ.get("QUERY_PARSE_CACHE_PATH", os.path.join(".cache", "query_parse_cache.sqlite3"))
+QUERY_PARSE_CACHE_TTL_SECONDS = float(os.environ.get("QUERY_PARSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+QUERY_PARSE_CACHE_MAX_ENTRIES = int(os.environ.get("QUERY_PARSE_CACHE_MAX_ENTRIES", "5000"))
+# Second level: reuse the parse of a paraphrase whose embedding is at least this cosine-similar.
+QUERY_PARSE_CACHE_SEMANTIC = os.environ.get("QUERY_PARSE_CACHE_SEMANTIC", "true").lower() == "true"
+QUERY_PARSE_CACHE_THRESHOLD = float(os.environ.get("QUERY_PARSE_CACHE_THRESHOLD", "0.95"))
+QUERY_PARSE_CACHE_EMBEDDER = os.environ.get("QUERY_PARSE_CACHE_EMBEDDER", "e5-small-finetuned-role-title")
+
+
+def normalize_query(query: str) -> str:
+    """
+    First-level key: the raw text with case and whitespace folded. Punctuation is kept, since the parser
+    sees it too and it can change the result ("5-10 years" and "5 10 years" must not share an entry).
+    """
+    return " ".join((query or "").lower().split())
+
+
+def _string_values(value) -> list[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [item for entry in value for item in _string_values(entry)]
+    if isinstance(value, dict):
+        return [item for entry in value.values() for item in _string_values(entry)]
+    return []
+
+
+NUMBER_PATTERN = re.compile(r"^\d+(?:\.\d+)?\+?$")
+NUMBER_UNITS = {
+    "year": "years", "years": "years", "yr": "years", "yrs": "years",
+    "lpa": "lpa", "lakh": "lpa", "lakhs": "lpa", "l": "lpa",
+    "month": "months", "months": "months",
+}
+# Words allowed between a number and its unit, as in "5 to 10 years".
+RANGE_WORDS = {"to", "and", "or"}
+
+
+def _numbers_with_units(tokens: list[str]) -> set[tuple[str, Optional[str]]]:
+    """Each number in the query paired with the unit that follows it, so "5 years" and "5 lpa" differ."""
+    numbers = set()
+    for index, token in enumerate(tokens):
+        if not NUMBER_PATTERN.match(token):
+            continue
+        unit = None
+        for following in tokens[index + 1:]:
+            if NUMBER_PATTERN.match(following) or following in RANGE_WORDS:
+                continue
+            unit = NUMBER_UNITS.get(following)
+            break
+        numbers.add((token.rstrip("+"), unit))
+    return numbers
+
+
+def _slot_signature(tokens: list[str]) -> tuple[set[tuple[str, str]], list[str]]:
+    """Vocabulary slot values in the query and the remaining non-filler words, numbers and units excluded."""
+    try:
+        slots, unmatched = get_vocabulary().extract(tokens)
+    except Exception:
+        slots, unmatched = {}, tokens
+    values = {(slot, str(value).lower()) for slot, values in slots.items() for value in values}
+    leftover = sorted(
+        token for token in unmatched
+        if token not in FILLER_WORDS and token not in NUMBER_UNITS and not NUMBER_PATTERN.match(token)
+    )
+    return values, leftover
+
+
+def same_slots(query: str, cached_query: str, cached_result: dict) -> bool:
+    """
+    Guard for semantic hits. Paraphrases embed close together even when they name a different city,
+    unit or a negation ("python developers in pune" / "... not in pune"), so the cached parse is reused only if:
+    - both queries carry the same numbers with the same units,
+    - every skill, role, title and location of the cached searchParams appears in the new query,
+    - both name the same known skills, roles, titles and cities, and the words left over after
+      removing those and filler words are identical.
+    """
+    tokens = tokenize(query)
+    cached_tokens = tokenize(cached_query)
+    if _numbers_with_units(tokens) != _numbers_with_units(cached_tokens):
+        return False
+    token_set = set(tokens)
+    search_params = cached_result.get("searchparams") or cached_result.get("searchParams") or {}
+    for value in _string_values({key: value for key, value in search_params.items() if key.lower() != "searchtype"}):
+        value_tokens = [token for token in tokenize(value) if token not in FILLER_WORDS]
+        if not all(token in token_set for token in value_tokens):
+            return False
+    return _slot_signature(tokens) == _slot_signature(cached_tokens)
+
+
+class QueryParseCache:
+    """
+    Two-level SQLite cache for LLM chat query parses.
+    Level one is the normalized query text; level two is the nearest earlier query by embedding similarity,
+    accepted above a threshold and only when same_slots holds. Entries expire after ttl_seconds and the
+    least recently used are dropped beyond max_entries. Errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float,
+        max_entries: int,
+        semantic: bool = True,
+        threshold: float = 0.95,
+        embedder: str = "e5-small-finetuned-role-title",
+        enabled: bool = True,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.threshold = threshold
+        self.embedder = embedder
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._initialized = False
+        # Embedding index of live entries: keys and a row-normalized matrix, loaded from SQLite on first use.
+        self._index_keys: Optional[list[str]] = None
+        self._index_matrix = None
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.semantic_rejected = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS query_parse_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    embedding BLOB,
+                    parse_seconds REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )"""
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_query_parse_cache_created ON query_parse_cache(created_at)")
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    @staticmethod
+    def build_key(normalized_query: str, model_name: str, prompt_template: str) -> str:
+        prompt_version = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()[:16]
+        return f"{model_name}:{prompt_version}:{hashlib.sha256(normalized_query.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def _key_prefix(cache_key: str) -> str:
+        return cache_key.rsplit(":", 1)[0] + ":"
+
+    def _embed(self, normalized_query: str) -> Optional[list[float]]:
+        if not self.semantic:
+            return None
+        try:
+            return embedding_service.embed_batch(self.embedder, [normalized_query])[0]
+        except Exception as ex:
+            logger.warning(f"Query parse cache embedding unavailable, disabling the semantic level: {ex}")
+            self.semantic = False
+            return None
+
+    def _load_index(self, connection: sqlite3.Connection) -> None:
+        import numpy as np
+
+        rows = connection.execute(
+            "SELECT cache_key, embedding FROM query_parse_cache WHERE embedding IS NOT NULL AND created_at >= ?",
+            (time.time() - self.ttl_seconds,),
+        ).fetchall()
+        self._index_keys = [row[0] for row in rows]
+        self._index_matrix = (
+            np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+        )
+
+    def _add_to_index(self, cache_key: str, vector) -> None:
+        import numpy as np
+
+        if self._index_keys is None:
+            return
+        if cache_key in self._index_keys:
+            self._drop_from_index([cache_key])
+        row = np.asarray(vector, dtype=np.float32)[None, :]
+        self._index_keys.append(cache_key)
+        self._index_matrix = row if self._index_matrix is None else np.vstack([self._index_matrix, row])
+
+    def _drop_from_index(self, cache_keys: list[str]) -> None:
+        import numpy as np
+
+        if self._index_keys is None or not cache_keys:
+            return
+        dropped = set(cache_keys)
+        keep = [index for index, key in enumerate(self._index_keys) if key not in dropped]
+        self._index_keys = [self._index_keys[index] for index in keep]
+        self._index_matrix = self._index_matrix[np.asarray(keep, dtype=np.int64)] if keep else None
+
+    @staticmethod
+    def _unit(vector):
+        import numpy as np
+
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def get(self, cache_key: str, normalized_query: str) -> tuple[Optional[dict], Optional[list[float]]]:
+        """
+        Return (cached parse or None, query embedding). The embedding is handed back so a following put
+        does not embed the same text twice.
+        """
+        if not self.enabled:
+            return None, None
+        try:
+            now = time.time()
+            with self._lock:
+                connection = self._connect()
+                try:
+                    row = connection.execute(
+                        "SELECT result, parse_seconds FROM query_parse_cache WHERE cache_key = ? AND created_at >= ?",
+                        (cache_key, now - self.ttl_seconds),
+                    ).fetchone()
+                    if row is not None:
+                        connection.execute("UPDATE query_parse_cache SET last_accessed = ? WHERE cache_key = ?", (now, cache_key))
+                        connection.commit()
+                        self.exact_hits += 1
+                        self.saved_seconds += row[1]
+                        logger.info(f"Query parse cache exact hit: saved {row[1]:.4f} seconds (hit rate={self.hit_rate():.2%})")
+                        return json.loads(row[0]), None
+                finally:
+                    connection.close()
+            vector = self._embed(normalized_query)
+            if vector is None:
+                with self._lock:
+                    self.misses += 1
+                return None, None
+            vector = self._unit(vector).tolist()
+            return self._semantic_get(cache_key, normalized_query, vector, now), vector
+        except Exception as ex:
+            logger.warning(f"Query parse cache lookup failed, treating as miss: {ex}")
+            return None, None
+
+    def _semantic_get(self, cache_key: str, normalized_query: str, vector: list[float], now: float) -> Optional[dict]:
+        import numpy as np
+
+        prefix = self._key_prefix(cache_key)
+        with self._lock:
+            connection = self._connect()
+            try:
+                if self._index_keys is None:
+                    self._load_index(connection)
+                if self._index_matrix is None:
+                    self.misses += 1
+                    return None
+                similarities = self._index_matrix @ np.asarray(vector, dtype=np.float32)
+                # Best candidates first; the ones from another model or prompt version are skipped.
+                for index in np.argsort(-similarities)[:5]:
+                    similarity = float(similarities[index])
+                    if similarity < self.threshold:
+                        break
+                    candidate_key = self._index_keys[index]
+                    if not candidate_key.startswith(prefix):
+                        continue
+                    row = connection.execute(
+                        "SELECT query, result, parse_seconds FROM query_parse_cache WHERE cache_key = ? AND created_at >= ?",
+                        (candidate_key, now - self.ttl_seconds),
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    result = json.loads(row[1])
+                    if not same_slots(normalized_query, row[0], result):
+                        self.semantic_rejected += 1
+                        continue
+                    connection.execute("UPDATE query_parse_cache SET last_accessed = ? WHERE cache_key = ?", (now, candidate_key))
+                    connection.commit()
+                    self.semantic_hits += 1
+                    self.saved_seconds += row[2]
+                    logger.info(
+                        f"Query parse cache semantic hit ({similarity:.3f}) for '{normalized_query}' via '{row[0]}': "
+                        f"saved {row[2]:.4f} seconds (hit rate={self.hit_rate():.2%})"
+                    )
+                    return result
+                self.misses += 1
+                return None
+            finally:
+                connection.close()
+
+    def put(
+        self, cache_key: str, normalized_query: str, result: dict, parse_seconds: float, vector: Optional[list[float]] = None
+    ) -> None:
+        if not self.enabled:
+            return
+        try:
+            if vector is None:
+                vector = self._embed(normalized_query)
+                vector = self._unit(vector).tolist() if vector is not None else None
+            embedding = array("f", vector).tobytes() if vector is not None else None
+            now = time.time()
+            with self._lock:
+                connection = self._connect()
+                try:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO query_parse_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (cache_key, normalized_query, json.dumps(result), embedding, parse_seconds, now, now),
+                    )
+                    if vector is not None:
+                        self._add_to_index(cache_key, vector)
+                    self._evict(connection, now)
+                    connection.commit()
+                finally:
+                    connection.close()
+        except Exception as ex:
+            logger.warning(f"Query parse cache store failed: {ex}")
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        expired = [
+            row[0]
+            for row in connection.execute(
+                "SELECT cache_key FROM query_parse_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).fetchall()
+        ]
+        overflow = [
+            row[0]
+            for row in connection.execute(
+                "SELECT cache_key FROM query_parse_cache WHERE created_at >= ? ORDER BY last_accessed DESC LIMIT -1 OFFSET ?",
+                (now - self.ttl_seconds, self.max_entries),
+            ).fetchall()
+        ]
+        evicted = expired + overflow
+        if not evicted:
+            return
+        connection.executemany("DELETE FROM query_parse_cache WHERE cache_key = ?", [(key,) for key in evicted])
+        self._drop_from_index(evicted)
+        logger.info(f"Query parse cache dropped {len(expired)} expired and {len(overflow)} least recently used entries")
+
+    def hit_rate(self) -> float:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "semantic": self.semantic,
+                "threshold": self.threshold,
+                "indexed": len(self._index_keys) if self._index_keys is not None else None,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "semantic_rejected": self.semantic_rejected,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate(),
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+query_parse_cache = QueryParseCache(
+    path=QUERY_PARSE_CACHE_PATH,
+    ttl_seconds=QUERY_PARSE_CACHE_TTL_SECONDS,
+    max_entries=QUERY_PARSE_CACHE_MAX_ENTRIES,
+    semantic=QUERY_PARSE_CACHE_SEMANTIC,
+    threshold=QUERY_PARSE_CACHE_THRESHOLD,
+    embedder=QUERY_PARSE_CACHE_EMBEDDER,
+    enabled=QUERY_PARSE_CACHE_ENABLED,
+)
+metrics.register_stats("profile_search_query_parse_cache", "Chat query parse cache", query_parse_cache.stats)
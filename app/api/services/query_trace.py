@@ -0,0 +1,209 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+# Fraction of queries traced without being asked to; those are appended to QUERY_TRACE_LOG_PATH.
+QUERY_TRACE_SAMPLE_RATE = float(os.environ.get("QUERY_TRACE_SAMPLE_RATE", "0.01"))
+QUERY_TRACE_LEVEL = int(os.environ.get("QUERY_TRACE_LEVEL", "5"))
+# explainLevel 1 adds the query blueprint, which carries the nearestNeighbor target and hit estimates.
+QUERY_TRACE_EXPLAIN_LEVEL = int(os.environ.get("QUERY_TRACE_EXPLAIN_LEVEL", "1"))
+QUERY_TRACE_LOG_PATH = os.environ.get("QUERY_TRACE_LOG_PATH", os.path.join(".cache", "query_traces.jsonl"))
+# Also store Vespa's full trace tree in the log, not only the parsed summary.
+QUERY_TRACE_LOG_RAW = os.environ.get("QUERY_TRACE_LOG_RAW", "false").lower() == "true"
+TRACE_HEADER = "X-Search-Trace"
+# Proxies commonly cap a header block at 8 KB; the full summary stays in the trace log under its trace_id.
+QUERY_TRACE_HEADER_MAX_BYTES = int(os.environ.get("QUERY_TRACE_HEADER_MAX_BYTES", "4096"))
+# Summary parts dropped from the header, in order, until it fits.
+_HEADER_DROP_ORDER = ("container_ms", "nearest_neighbor", "phases_ms")
+
+_NEAREST_NEIGHBOR_KEYS = {
+    "attribute_tensor": "tensor",
+    "target_hits": "target_hits",
+    "adjusted_target_hits": "adjusted_target_hits",
+    "explore_additional_hits": "explore_additional_hits",
+    "wanted_approximate": "wanted_approximate",
+    "algorithm": "algorithm",
+    "top_k_hits": "top_k_hits",
+}
+
+
+class TraceCapture:
+    """Per-request trace state: whether the caller asked for a trace and the summaries of the queries it ran."""
+
+    def __init__(self, requested: bool):
+        self.requested = requested
+        self.summaries: list[dict] = []
+
+    def header(self) -> Optional[str]:
+        """
+        Compact JSON of the last traced query for the X-Search-Trace response header, at most
+        QUERY_TRACE_HEADER_MAX_BYTES. Parts that do not fit are dropped and the header is marked truncated.
+        """
+        if not self.summaries:
+            return None
+        summary = dict(self.summaries[-1])
+        encoded = _compact(summary)
+        for key in _HEADER_DROP_ORDER:
+            if len(encoded) <= QUERY_TRACE_HEADER_MAX_BYTES:
+                return encoded
+            if summary.pop(key, None) is not None:
+                summary["truncated"] = True
+                encoded = _compact(summary)
+        if len(encoded) <= QUERY_TRACE_HEADER_MAX_BYTES:
+            return encoded
+        return _compact({"trace_id": summary.get("trace_id"), "truncated": True})
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=True)
+
+
+_current_capture: contextvars.ContextVar[Optional[TraceCapture]] = contextvars.ContextVar("query_trace_capture", default=None)
+_log_lock = threading.Lock()
+
+
+@contextmanager
+def capture_traces(requested: bool = False):
+    """Collect the traces of the Vespa queries run inside this block; requested=True traces every one of them."""
+    capture = TraceCapture(requested)
+    token = _current_capture.set(capture)
+    try:
+        yield capture
+    finally:
+        _current_capture.reset(token)
+
+
+def start_trace() -> Optional[dict]:
+    """
+    Decide whether the next query is traced. Returns the extra Vespa request parameters, or None.
+    Explicit requests always trace; others are sampled at QUERY_TRACE_SAMPLE_RATE.
+    """
+    capture = _current_capture.get()
+    requested = capture is not None and capture.requested
+    if not requested and random.random() >= QUERY_TRACE_SAMPLE_RATE:
+        return None
+    return {
+        "trace.level": QUERY_TRACE_LEVEL,
+        "trace.timestamps": True,
+        "trace.explainLevel": QUERY_TRACE_EXPLAIN_LEVEL,
+        "presentation.timing": True,
+    }
+
+
+def _walk(node: Any, visit) -> None:
+    if isinstance(node, dict):
+        visit(node)
+        for value in node.values():
+            _walk(value, visit)
+    elif isinstance(node, list):
+        for value in node:
+            _walk(value, visit)
+
+
+def _event_name(event: str) -> str:
+    name = event[len("Start "):] if event.startswith("Start ") else event
+    return name.strip().lower().replace(" ", "_").replace("::", ".")
+
+
+def summarize_trace(response_json: dict) -> dict:
+    """
+    Reduce Vespa's trace tree to per-phase timings.
+    - timing_ms: query, search and summary-fill time from presentation.timing.
+    - phases_ms: content-node match-thread phases (matching + first phase, second phase, result processing, ...),
+      each the gap to the next event, maximum over threads and nodes.
+    - container_ms: when the container finished each searcher step, from trace.timestamps.
+    - nearest_neighbor: target and hit counts per nearestNeighbor operator from the query blueprint.
+    """
+    root = response_json.get("root", {})
+    timing = response_json.get("timing") or {}
+    phases_ms: dict[str, float] = {}
+    container_ms: dict[str, float] = {}
+    nearest_neighbor: list[dict] = []
+
+    def _visit(node: dict) -> None:
+        events = node.get("traces")
+        if isinstance(events, list):
+            timed_events = sorted(
+                (event for event in events if isinstance(event, dict) and "timestamp_ms" in event and "event" in event),
+                key=lambda event: event["timestamp_ms"],
+            )
+            for event, next_event in zip(timed_events, timed_events[1:]):
+                name = _event_name(event["event"])
+                duration = next_event["timestamp_ms"] - event["timestamp_ms"]
+                phases_ms[name] = round(max(phases_ms.get(name, 0.0), duration), 3)
+        if "timestamp" in node and isinstance(node.get("message"), str):
+            step = node["message"].split(":")[0][:60]
+            container_ms.setdefault(step, node["timestamp"])
+        blueprint_type = str(node.get("[type]", ""))
+        if "NearestNeighbor" in blueprint_type:
+            entry = {name: node[key] for key, name in _NEAREST_NEIGHBOR_KEYS.items() if key in node}
+            # The estimate sits under "state" in newer Vespa versions.
+            estimate = node.get("estimate") or (node.get("state") or {}).get("estimate") or {}
+            entry["estimated_hits"] = estimate.get("estHits")
+            entry["field"] = node.get("attribute_name") or node.get("field_name")
+            nearest_neighbor.append({key: value for key, value in entry.items() if value is not None})
+
+    _walk(response_json.get("trace"), _visit)
+    return {
+        "timing_ms": {
+            name: round(timing[key] * 1000, 3)
+            for name, key in (("query", "querytime"), ("search", "searchtime"), ("summary_fetch", "summaryfetchtime"))
+            if timing.get(key) is not None
+        },
+        "total_count": root.get("fields", {}).get("totalCount"),
+        "coverage": root.get("coverage", {}).get("coverage"),
+        "phases_ms": phases_ms,
+        "container_ms": container_ms,
+        "nearest_neighbor": nearest_neighbor,
+    }
+
+
+def _append_log(entry: dict) -> None:
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(QUERY_TRACE_LOG_PATH) or ".", exist_ok=True)
+            with open(QUERY_TRACE_LOG_PATH, "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry) + "\n")
+    except Exception as ex:
+        logger.warning(f"Could not write query trace to {QUERY_TRACE_LOG_PATH}: {ex}")
+
+
+def finish_trace(response_json: dict, yql: str, ranking: str, elapsed_seconds: float) -> Optional[dict]:
+    """
+    Summarize a traced response, hand it to the current request's capture and persist it to the trace log.
+    On an event loop the log write runs on a worker thread, so file I/O never stalls the request.
+    Never raises: a trace that cannot be parsed is logged and dropped.
+    """
+    try:
+        summary = {"trace_id": uuid.uuid4().hex[:16], **summarize_trace(response_json)}
+        summary["client_ms"] = round(elapsed_seconds * 1000, 3)
+    except Exception as ex:
+        logger.warning(f"Could not parse Vespa query trace: {ex}")
+        return None
+    capture = _current_capture.get()
+    if capture is not None:
+        capture.summaries.append(summary)
+    entry = {"timestamp": time.time(), "yql": yql, "ranking": ranking, "summary": summary}
+    if QUERY_TRACE_LOG_RAW:
+        entry["trace"] = response_json.get("trace")
+    try:
+        asyncio.get_running_loop().run_in_executor(None, _append_log, entry)
+    except RuntimeError:
+        _append_log(entry)
+    return summary
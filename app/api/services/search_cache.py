@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.api.models.search_request import SearchRequest
+from app.api.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+SEARCH_CACHE_TTL_SECONDS = float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", "60"))
+# Schema versions live in files under this directory so every worker and feed CLI sees a feed-triggered bump.
+# Set it to an empty string to keep versions per process.
+SEARCH_CACHE_VERSION_DIR = (
+    os.environ.get("SEARCH_CACHE_VERSION_DIR", os.path.join(".cache", "search_cache_versions")) or None
+)
+
+
+class SearchResultCache:
+    """
+    In-process LRU + TTL cache for formatted search results.
+    Keys embed a per-schema version, so bumping the version on feed makes older entries unreachable.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, version_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_dir = version_dir
+        self._entries: "OrderedDict[tuple, tuple[float, Any]]" = OrderedDict()
+        self._local_versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        if self.version_dir:
+            os.makedirs(self.version_dir, exist_ok=True)
+
+    def _version_file(self, schema: str) -> str:
+        return os.path.join(self.version_dir, f"{schema}.version")
+
+    def get_version(self, schema: str) -> int:
+        """Return the current cache version for a schema."""
+        if self.version_dir:
+            try:
+                return os.stat(self._version_file(schema)).st_mtime_ns
+            except FileNotFoundError:
+                return 0
+        return self._local_versions.get(schema, 0)
+
+    def build_key(self, request_body: SearchRequest, schema: str, limit: int, offset: int) -> tuple:
+        """Build a cache key from the canonicalized request, schema, version and page window."""
+        canonical_request = json.dumps(request_body.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+        return schema, self.get_version(schema), digest, limit, offset
+
+    def get(self, key: tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, schema: str) -> None:
+        """Bump the version of a schema so cached results for it are no longer served."""
+        try:
+            with self._lock:
+                self.invalidations += 1
+                if self.version_dir:
+                    with open(self._version_file(schema), "a"):
+                        os.utime(self._version_file(schema))
+                else:
+                    self._local_versions[schema] = self._local_versions.get(schema, 0) + 1
+                stale_keys = [key for key in self._entries if key[0] == schema]
+                for key in stale_keys:
+                    del self._entries[key]
+        except Exception as ex:
+            logger.error(f"Exception in {__file__} while invalidating search cache for {schema}: {ex}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "shared_versions": bool(self.version_dir),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+search_cache = SearchResultCache(
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=SEARCH_CACHE_TTL_SECONDS,
+    version_dir=SEARCH_CACHE_VERSION_DIR,
+)
+metrics.register_stats("profile_search_search_cache", "Search result cache", search_cache.stats)
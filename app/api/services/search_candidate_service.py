@@ -1,20 +1,21 @@
-import json
-import os
+import asyncio
 import logging
-from vespa.application import Vespa
+import os
+import time
+from typing import Optional
 from vespa.io import VespaQueryResponse
 from app.api.exceptions.page_invalid_exception import PageInvalidError
 from app.api.models.builder.response_builder import ResponseBuilder
 from app.api.models.search_request import SearchParams, SearchRequest
-from app.api.utils.query_builder import (
-    build_query_for_hard_filters,
-    build_query_for_soft_filters,
-    build_query_for_years_of_experience,
-    build_query_from_list,
-    build_range_query,
-    build_range_query_for_struct_type,
-    build_search_query,
-)
+from app.api.services.query_trace import finish_trace, start_trace
+from app.api.services.embedding_service import LOCAL_QUERY_EMBEDDING, binarize, embedding_service
+from app.api.services.search_cache import search_cache
+from app.api.services.search_planner import SearchPlan, estimate_plan, plan_search
+from app.api.services.vespa_client import VESPA_QUERY_DEADLINE, get_query_session
+from app.api.utils.metrics import STAGE_SECONDS, timed
+from app.api.utils.query_builder import get_field_presence
+from app.api.utils.search_fields_map import candidate_field_map
+from app.api.utils.yql_compiler import SEMANTIC_FIELDS, is_binary, vector_precision, yql_compiler
 
 logger = logging.getLogger(__name__)
 handler = logging.StreamHandler()
@@ -24,7 +25,10 @@ if not logger.hasHandlers():
     logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
-VESPA_QUERY_URL = os.environ.get("VESPA_QUERY_URL", "http://localhost:8080")
+# Lean document-summary class in both schemas with only the fields the response builders read.
+SEARCH_HIT_SUMMARY = "search_hit"
+# Sub-queries of one /search/batch call that may be in flight at once.
+BATCH_SEARCH_CONCURRENCY = int(os.environ.get("BATCH_SEARCH_CONCURRENCY", "8"))
 
 def filter_field_data(data: list[str] | None) -> list[str] | None:
     """Filter out None or empty values from a list of strings."""
@@ -54,191 +58,197 @@ def validate_pagination(page_number: str, page_size: str) -> tuple[int, int]:
 
     return limit, offset
 
-def build_query(request_body: SearchRequest, field_map: dict, schema:str, limit: int, offset: int) -> tuple[str, dict]:
-    """Build the Vespa query and semantic input dictionary."""
+@timed("build_query")
+def build_query(
+    request_body: SearchRequest,
+    field_map: dict,
+    schema:str,
+    limit: int,
+    offset: int,
+    select_fields: str = "*",
+    plan: Optional[SearchPlan] = None,
+    query_vectors: Optional[dict[str, list[float]]] = None,
+) -> tuple[str, dict]:
+    """
+    Build the Vespa query and its request inputs.
+    The YQL is a cached template for the request's shape and plan; values, embeddings and paging travel as parameters.
+    Without a plan, one is estimated from whatever filter statistics are already cached.
+    """
     try:
-        hard_filter_query = None
-        soft_filter_query = None
-        nearest_neighbour_query = None
-        nearest_neighbour_inputs = {}
-        search_type = request_body.searchType.value
-        search_params = request_body.searchParams
-        if search_type != 1:
-            list_of_filters = create_hard_filter(search_params, field_map, search_type)
-            hard_filter_query = build_query_for_hard_filters(list_of_filters)
-        if search_type != 0:
-            list_of_soft_filters = create_soft_filters(search_params, field_map)
-            soft_filter_query = build_query_for_soft_filters(list_of_soft_filters)
-            nearest_neighbour_inputs, nearest_neighbour_query = build_semantic_query_for_fields(search_params, field_map)
-        query = build_search_query(schema, hard_filter_query, soft_filter_query, nearest_neighbour_query)
-        if query is None:
-            logger.error(f"Query construction failed")
-            raise RuntimeError("Query construction failed")
-        query = f"{query} limit {limit} offset {offset}"
-        logger.info(f"Query built: {query}")
-        return query, nearest_neighbour_inputs
+        if plan is None:
+            plan = estimate_plan(request_body, schema, limit)
+        compiled_query = yql_compiler.compile(
+            request_body, field_map, schema, select_fields,
+            nn_target_hits=plan.nn_target_hits,
+            weak_and_target_hits=plan.weak_and_target_hits,
+            approximate=plan.approximate,
+        )
+        query_inputs = dict(compiled_query.params)
+        query_inputs.update(plan.query_inputs())
+        binary = is_binary(request_body)
+        query_inputs.update(build_semantic_inputs(request_body.searchParams, binary=binary, query_vectors=query_vectors))
+        query_inputs["hits"] = limit - offset
+        query_inputs["offset"] = offset
+        if binary:
+            # Hamming retrieval only makes sense with the full-precision rerank of the binary profile.
+            query_inputs["ranking"] = "binary"
+        elif vector_precision(request_body) == "bfloat16":
+            # The bfloat16 profile scores against the *_bf16 fields the query retrieved from.
+            query_inputs["ranking"] = "bfloat16"
+        elif request_body.rankProfile:
+            query_inputs["ranking"] = request_body.rankProfile.value
+        if request_body.rerankCount:
+            query_inputs["ranking.rerankCount"] = request_body.rerankCount
+        if not request_body.detailed:
+            query_inputs["presentation.summary"] = SEARCH_HIT_SUMMARY
+        logger.info(f"Query built: {compiled_query.yql}")
+        return compiled_query.yql, query_inputs
     except Exception as ex:
         logger.error(f"Exception in {__file__} while building query: {ex}")
         raise RuntimeError(
             f"Error while building query: {ex}"
         ) from ex
 
-def create_hard_filter(search_params: SearchParams, candidate_field_map: dict, search_type: int) -> list:
-    """Create hard filter query list based on search parameters."""
-    try:
-        query_list = []
-        if search_type == 0:
-            exact_skills_filter = build_query_from_list(
-                field_name=candidate_field_map.get("skills_exact"), field_data=search_params.skills, filter_type="contains"
-            )
-            role_filter = build_query_from_list(
-                field_name=candidate_field_map.get("jobRole"),
-                field_data=search_params.jobRole,
-                filter_type="contains",
-            )
-            title_filter = build_query_from_list(
-                field_name=candidate_field_map.get("jobTitle"),
-                field_data=search_params.jobTitle,
-                filter_type="contains",
-            )
-            query_list.extend([exact_skills_filter, role_filter, title_filter])
-        city_filter = build_query_from_list(
-            field_name=candidate_field_map.get("location"),
-            field_data=filter_field_data(search_params.location),
-            filter_type="contains",
-        )
-        years_of_experience_filter = build_query_for_years_of_experience(
-            field_name=candidate_field_map.get("yearsOfExperience"),
-            range_from=search_params.experienceMin,
-            range_to=search_params.experienceMax,
-        )
-        expected_annual_ctc_filter = build_range_query(
-            field_name=candidate_field_map.get("ctc"),
-            range_from=search_params.expectedSalaryMin,
-            range_to=search_params.expectedSalaryMax,
-        )
-        query_list.extend(
-            [
-                city_filter,
-                years_of_experience_filter,
-                expected_annual_ctc_filter
-            ]
-        )
-        return query_list
-    except Exception as ex:
-        logger.error(f"Exception in {__file__} while creating hard filters: {ex}")
-        raise RuntimeError(
-            f"Error while creating hard filters: {ex}"
-        ) from ex
+def semantic_query_texts(search_params: SearchParams) -> dict[str, list[tuple[str, str]]]:
+    """Group the text behind each query tensor by embedder, so each model embeds its texts in one call."""
+    texts_by_model = {}
+    for name, config in SEMANTIC_FIELDS.items():
+        value = getattr(search_params, name)
+        if not value:
+            continue
+        if name == "skills":
+            role_with_skills = search_params.jobRole + value if search_params.jobRole else value
+            value = [",".join(role_with_skills)]
+        texts_by_model.setdefault(config["model"], []).append((name, ' '.join(value)))
+    return texts_by_model
 
-def create_soft_filters(search_params: SearchParams, candidate_field_map:dict) -> list:
-    """Create soft filter query list based on search parameters."""
+async def embed_query_vectors(
+    search_params: SearchParams,
+    query_vectors: Optional[dict[str, list[float]]] = None,
+) -> Optional[dict[str, list[float]]]:
+    """
+    With LOCAL_QUERY_EMBEDDING, embed the query texts not already covered by query_vectors on a worker thread,
+    so ONNX inference never blocks the event loop. The result is passed to build_query as query_vectors.
+    """
+    if not LOCAL_QUERY_EMBEDDING:
+        return query_vectors
     try:
-        query_list = []
-        exact_skills_filter = build_query_from_list(
-            field_name=candidate_field_map.get("skills"), field_data=search_params.skills, filter_type="contains"
-        )
-        role_filter = build_query_from_list(
-            field_name=candidate_field_map.get("jobRole"),
-            field_data=search_params.jobRole,
-            filter_type="contains",
-        )
-        title_filter = build_query_from_list(
-            field_name=candidate_field_map.get("jobTitle"),
-            field_data=search_params.jobTitle,
-            filter_type="contains",
-        )
-        query_list.extend([exact_skills_filter, role_filter, title_filter])
-        return query_list
+        query_vectors = dict(query_vectors or {})
+        for model, field_texts in semantic_query_texts(search_params).items():
+            field_texts = [(name, text) for name, text in field_texts if not query_vectors.get(name)]
+            if not field_texts:
+                continue
+            with STAGE_SECONDS.time(stage="embed_query"):
+                vectors = await asyncio.to_thread(embedding_service.embed_batch, model, [text for _, text in field_texts])
+            for (name, _), vector in zip(field_texts, vectors):
+                query_vectors[name] = vector
+        return query_vectors
     except Exception as ex:
-        logger.error(f"Exception in {__file__} while creating soft filters: {ex}")
+        logger.error(f"Exception in {__file__} while embedding query: {ex}")
         raise RuntimeError(
-            f"Error while creating soft filters: {ex}"
+            f"Error while embedding query: {ex}"
         ) from ex
 
-def build_semantic_query_for_fields(search_params: SearchParams, candidate_field_map:dict) -> tuple[dict, str | None]:
-    """Build semantic query dict and nearest neighbour query string for Vespa."""
+@timed("build_semantic_inputs")
+def build_semantic_inputs(
+    search_params: SearchParams,
+    binary: bool = False,
+    query_vectors: Optional[dict[str, list[float]]] = None,
+) -> dict:
+    """
+    Build the query tensor inputs for the nearestNeighbor clauses of the template.
+    Binary searches also send the bit-packed tensors used for hamming retrieval; the float ones feed the rerank.
+    query_vectors (search field name -> vector) are used as-is instead of embedding that field's text.
+    Async callers pass the output of embed_query_vectors, so the inline embed below only runs for sync callers.
+    """
     try:
-        semantic_query_dict = {}
-        nearest_neighbour_query_list = []
-        semantic_fields_with_input = {
-            "skills": {
-                "tensor": "s",
-                "embedding": candidate_field_map.get("skillsEmbedding"),
-                "model": "e5-small-skills-v1",
-            },
-            "jobRole": {
-                "tensor": "r",
-                "embedding": candidate_field_map.get("roleEmbedding"),
-                "model": "e5-small-finetuned-role-title",
-            },
-            "jobTitle": {
-                "tensor": "t",
-                "embedding": candidate_field_map.get("titleEmbedding"),
-                "model": "e5-small-finetuned-role-title",
-            },
-        }
-        for name, value in vars(search_params).items():
-            if name in semantic_fields_with_input and value:
-                tensor = semantic_fields_with_input[name]['tensor']
-                embedding = semantic_fields_with_input[name]['embedding']
-                model = semantic_fields_with_input[name]['model']
-                if name == "skills":
-                    role_with_skills = search_params.jobRole + value if search_params.jobRole else value
-                    value = [",".join(role_with_skills)] if role_with_skills else None
-                semantic_query_dict[f"input.query({tensor})"] = (
-                    f"embed({model},'{' '.join(value)}')"
-                )
-                nearest_neighbour_query_list.append(
-                    f"({{targetHits:10}}nearestNeighbor({embedding},{tensor}))"
-                )
-        nearest_neighbour_query = (
-            " OR ".join(nearest_neighbour_query_list)
-            if nearest_neighbour_query_list
-            else None
-        )
-        return semantic_query_dict, nearest_neighbour_query
+        semantic_inputs = {}
+        query_vectors = query_vectors or {}
+        for model, field_texts in semantic_query_texts(search_params).items():
+            stored = [(name, query_vectors[name]) for name, _ in field_texts if query_vectors.get(name)]
+            for name, vector in stored:
+                semantic_inputs[f"input.query({SEMANTIC_FIELDS[name]['tensor']})"] = vector
+                if binary:
+                    semantic_inputs[f"input.query({SEMANTIC_FIELDS[name]['binary_tensor']})"] = binarize(vector)
+            field_texts = [(name, text) for name, text in field_texts if not query_vectors.get(name)]
+            if not field_texts:
+                continue
+            if LOCAL_QUERY_EMBEDDING:
+                vectors = embedding_service.embed_batch(model, [text for _, text in field_texts])
+                for (name, _), vector in zip(field_texts, vectors):
+                    semantic_inputs[f"input.query({SEMANTIC_FIELDS[name]['tensor']})"] = vector
+                    if binary:
+                        semantic_inputs[f"input.query({SEMANTIC_FIELDS[name]['binary_tensor']})"] = binarize(vector)
+            else:
+                for name, text in field_texts:
+                    tensor = SEMANTIC_FIELDS[name]["tensor"]
+                    semantic_inputs[f"input.query({tensor})"] = f"embed({model}, @{tensor}_text)"
+                    semantic_inputs[f"{tensor}_text"] = text
+                    if binary:
+                        # The embedder binarizes because query(sb/rb/tb) is declared as tensor<int8>(x[48]).
+                        semantic_inputs[f"input.query({SEMANTIC_FIELDS[name]['binary_tensor']})"] = f"embed({model}, @{tensor}_text)"
+        return semantic_inputs
     except Exception as ex:
         logger.error(f"Exception in {__file__} while building semantic query: {ex}")
         raise RuntimeError(
             f"Error while building semantic query for fields: {ex}"
         ) from ex
 
-def fetch_results(
+async def fetch_results(
     query: str,
     nearest_neighbour_inputs: dict | None,
-    field_presence: dict | None
-) -> VespaQueryResponse:
+    field_presence: dict | None,
+    ranking: str = "default",
+) -> list[dict] | None:
     """Fetch results from Vespa using the constructed query and inputs."""
     try:
-        app = Vespa(url=VESPA_QUERY_URL)
+        session, query_slots = await get_query_session()
         if nearest_neighbour_inputs is None:
             nearest_neighbour_inputs = {}
+        ranking = nearest_neighbour_inputs.pop("ranking", ranking)
         if field_presence:
             nearest_neighbour_inputs.update(field_presence)
+        trace_inputs = start_trace()
+        if trace_inputs:
+            nearest_neighbour_inputs.update(trace_inputs)
         logger.info(f"Nearest neighbour inputs: {nearest_neighbour_inputs}")
-        with app.syncio() as session:
-            response: VespaQueryResponse = session.query(
-                yql=query,
-                ranking="default",
-                body=nearest_neighbour_inputs,
-                timeout=20,
-            ).get_json()
-            return response.get("root", {}).get("children", None)
+        queued_at = time.perf_counter()
+        async with query_slots:
+            # Time spent waiting for a free connection slot is ours, not Vespa's.
+            sent_at = time.perf_counter()
+            STAGE_SECONDS.observe(sent_at - queued_at, stage="fetch_results_queue")
+            with STAGE_SECONDS.time(stage="fetch_results_vespa"):
+                response: VespaQueryResponse = await asyncio.wait_for(
+                    session.query(
+                        yql=query,
+                        ranking=ranking,
+                        body=nearest_neighbour_inputs,
+                        timeout=VESPA_QUERY_DEADLINE,
+                    ),
+                    timeout=VESPA_QUERY_DEADLINE,
+                )
+        response_json = response.get_json()
+        if trace_inputs:
+            finish_trace(response_json, query, ranking, time.perf_counter() - sent_at)
+        return response_json.get("root", {}).get("children", None)
+    except asyncio.TimeoutError as ex:
+        logger.error(f"Vespa query exceeded the {VESPA_QUERY_DEADLINE}s deadline in {__file__}")
+        raise RuntimeError(
+            f"Error while fetching results: query exceeded {VESPA_QUERY_DEADLINE}s deadline"
+        ) from ex
     except Exception as ex:
         logger.error(f"Exception in {__file__} while fetching results: {ex}")
         raise RuntimeError(
             f"Error while fetching results: {ex}"
         ) from ex
 
-def format_response(responses: list[dict]):
+@timed("format_response")
+def format_response(responses: list[dict], detailed: bool = False):
+    """Map Vespa hits to response dicts in one pass; the dicts are serialized once, by the HTTP layer."""
     try:
-        formatted_responses = []
         if responses:
-            for response in responses:
-                result = ResponseBuilder().from_query_results(response)
-                formatted_responses.append(json.loads(result.model_dump_json()))
-            return formatted_responses
+            builder = ResponseBuilder()
+            return [builder.to_dict(response, detailed=detailed) for response in responses]
         else:
             return responses
     except Exception as ex:
@@ -247,3 +257,69 @@ def format_response(responses: list[dict]):
             f"Error while formatting response: {ex}"
         ) from ex
 
+async def fetch_candidate_hits(request_body: SearchRequest, limit: int, offset: int) -> tuple[list[dict] | None, SearchPlan]:
+    """Plan, build and run a candidate search; returns the raw Vespa hits and the plan used."""
+    plan = await plan_search(request_body, "candidate_profile", limit)
+    query_vectors = await embed_query_vectors(request_body.searchParams)
+    query, nearest_neighbour_inputs = build_query(
+        request_body, candidate_field_map, "candidate_profile", limit, offset, plan=plan, query_vectors=query_vectors
+    )
+    field_presence = get_field_presence(request_body.searchParams)
+    return await fetch_results(query, nearest_neighbour_inputs, field_presence), plan
+
+async def search_candidates(
+    request_body: SearchRequest,
+    page_number: str = "1",
+    page_size: str = "10",
+    use_cache: bool = True,
+) -> tuple[list[dict] | None, str]:
+    """Cached candidate search; returns the formatted hits and the plan description for X-Search-Plan."""
+    limit, offset = validate_pagination(page_number=page_number, page_size=page_size)
+    cache_key = search_cache.build_key(request_body, "candidate_profile", limit, offset)
+    cached_results = search_cache.get(cache_key) if use_cache else None
+    if cached_results is not None:
+        return cached_results, "strategy=cached"
+    query_results, plan = await fetch_candidate_hits(request_body, limit, offset)
+    formatted_results = format_response(query_results, detailed=bool(request_body.detailed))
+    search_cache.put(cache_key, formatted_results)
+    return formatted_results, plan.describe()
+
+async def search_candidates_batch(
+    requests: list[SearchRequest],
+    page_number: str = "1",
+    page_size: str = "10",
+    max_concurrency: int = BATCH_SEARCH_CONCURRENCY,
+) -> list[dict]:
+    """
+    Run several candidate searches in one call. Identical requests (same cache key) run once and share the result.
+    Distinct ones run concurrently, at most max_concurrency at a time. Results keep the input order.
+    A failing sub-query reports its error without failing the batch.
+    """
+    limit, offset = validate_pagination(page_number=page_number, page_size=page_size)
+    slots = asyncio.Semaphore(max_concurrency)
+    first_index_by_key = {}
+    duplicate_of = []
+    for index, request_body in enumerate(requests):
+        cache_key = search_cache.build_key(request_body, "candidate_profile", limit, offset)
+        duplicate_of.append(first_index_by_key.setdefault(cache_key, index))
+    unique_indexes = list(first_index_by_key.values())
+
+    async def _run(index: int) -> dict:
+        async with slots:
+            start_time = time.perf_counter()
+            try:
+                results, plan = await search_candidates(requests[index], page_number=page_number, page_size=page_size)
+                return {"results": results, "plan": plan, "elapsed_ms": (time.perf_counter() - start_time) * 1000}
+            except Exception as ex:
+                logger.error(f"Exception in {__file__} while running batch sub-query {index}: {ex}")
+                return {"results": None, "error": str(ex), "elapsed_ms": (time.perf_counter() - start_time) * 1000}
+
+    outcomes = dict(zip(unique_indexes, await asyncio.gather(*(_run(index) for index in unique_indexes))))
+    batch_results = []
+    for index in range(len(requests)):
+        source_index = duplicate_of[index]
+        entry = {"index": index, **outcomes[source_index]}
+        if source_index != index:
+            entry["duplicate_of"] = source_index
+        batch_results.append(entry)
+    return batch_results
@@ -0,0 +1,159 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+from app.api.exceptions.page_invalid_exception import PageInvalidError
+from app.api.models.search_request import SearchRequest
+from app.api.services.search_cache import SearchResultCache, search_cache
+from app.api.services.search_candidate_service import SEARCH_HIT_SUMMARY, build_query, embed_query_vectors, fetch_results
+from app.api.services.search_planner import plan_search
+from app.api.utils.query_builder import build_query_for_ids, get_field_presence
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+# Ranked hits fetched per snapshot chunk. A cursor ranks only as deep as its pages have reached.
+CURSOR_CHUNK_SIZE = int(os.environ.get("CURSOR_CHUNK_SIZE", "200"))
+# Deepest reachable rank; matches maxOffset in vespa_app/search/query-profiles/default.xml.
+CURSOR_MAX_DEPTH = int(os.environ.get("CURSOR_MAX_DEPTH", "5000"))
+CURSOR_TTL_SECONDS = float(os.environ.get("CURSOR_TTL_SECONDS", "900"))
+CURSOR_MAX_SNAPSHOTS = int(os.environ.get("CURSOR_MAX_SNAPSHOTS", "256"))
+CURSOR_MAX_PAGE_SIZE = 400
+
+cursor_snapshots = SearchResultCache(max_entries=CURSOR_MAX_SNAPSHOTS, ttl_seconds=CURSOR_TTL_SECONDS)
+
+
+def encode_cursor(request_body: SearchRequest, offset: int, page_size: int) -> str:
+    payload = {"r": request_body.model_dump(mode="json"), "o": offset, "n": page_size}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[SearchRequest, int, int]:
+    """Decode a client-supplied cursor and check its page window."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        request_body = SearchRequest(**payload["r"])
+        offset, page_size = int(payload["o"]), int(payload["n"])
+    except Exception as ex:
+        logger.error(f"Invalid cursor in {__file__}: {ex}")
+        raise PageInvalidError("Cursor is invalid") from ex
+    if offset < 0 or offset >= CURSOR_MAX_DEPTH or page_size <= 0 or page_size > CURSOR_MAX_PAGE_SIZE:
+        logger.error(f"Invalid cursor window in {__file__}: offset={offset}, page_size={page_size}")
+        raise PageInvalidError("Cursor is invalid")
+    return request_body, offset, page_size
+
+
+def _snapshot_id(request_body: SearchRequest, schema: str) -> str:
+    canonical_request = json.dumps(request_body.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{schema}:{canonical_request}".encode("utf-8")).hexdigest()[:32]
+
+
+def _get_snapshot(request_body: SearchRequest, schema: str) -> dict:
+    """
+    Return the ranked snapshot of a search, created empty on first use.
+    The key carries the search cache version of the schema, so a feed that invalidates search results
+    also retires the snapshots: the next page of an open cursor is served from a fresh ranking.
+    """
+    key = (schema, search_cache.get_version(schema), _snapshot_id(request_body, schema))
+    snapshot = cursor_snapshots.get(key)
+    if snapshot is None:
+        snapshot = {"entries": [], "ids": set(), "fetched": 0, "exhausted": False}
+        cursor_snapshots.put(key, snapshot)
+    return snapshot
+
+
+async def _extend_snapshot(snapshot: dict, request_body: SearchRequest, field_map: dict, schema: str, depth: int) -> None:
+    """
+    Rank further chunks until the snapshot holds depth hits or the result set ends.
+    Each chunk is the same query at the next offset, sorted by relevance with the document id as
+    tie-breaker so chunk boundaries are stable; ids already captured are skipped.
+    """
+    id_field = field_map.get("id", "id")
+    depth = min(depth, CURSOR_MAX_DEPTH)
+    query_vectors = None
+    while len(snapshot["entries"]) < depth and not snapshot["exhausted"]:
+        offset = snapshot["fetched"]
+        limit = min(max(offset + CURSOR_CHUNK_SIZE, depth), CURSOR_MAX_DEPTH)
+        plan = await plan_search(request_body, schema, limit)
+        if query_vectors is None:
+            query_vectors = await embed_query_vectors(request_body.searchParams)
+        query, nearest_neighbour_inputs = build_query(
+            request_body, field_map, schema, limit, offset,
+            select_fields=id_field, plan=plan, query_vectors=query_vectors,
+        )
+        nearest_neighbour_inputs["sorting"] = f"-[relevance] +{id_field}"
+        field_presence = get_field_presence(request_body.searchParams)
+        hits = await fetch_results(query, nearest_neighbour_inputs, field_presence) or []
+        for hit in hits:
+            fields = hit.get("fields", {})
+            document_id = fields.get(id_field)
+            if document_id in snapshot["ids"]:
+                continue
+            snapshot["ids"].add(document_id)
+            snapshot["entries"].append({
+                "id": document_id,
+                "relevance": hit.get("relevance"),
+                "features": fields.get("matchfeatures") or fields.get("summaryfeatures"),
+            })
+        snapshot["fetched"] = max(snapshot["fetched"], limit)
+        snapshot["exhausted"] = len(hits) < limit - offset or limit >= CURSOR_MAX_DEPTH
+        logger.info(f"Cursor snapshot extended to {len(snapshot['entries'])} hits (exhausted={snapshot['exhausted']})")
+
+
+async def fetch_page_by_cursor(
+    request_body: Optional[SearchRequest],
+    cursor: Optional[str],
+    page_size: int,
+    field_map: dict,
+    schema: str,
+) -> tuple[list[dict], Optional[str], Optional[int], SearchRequest]:
+    """
+    Return one page of raw Vespa hits, the cursor for the next page, the total number of ranked hits
+    (None until the snapshot has reached the end of the result set) and the (decoded) request.
+    Pages inside the captured snapshot are a lookup of page_size documents by id; a page past it first
+    ranks one more chunk.
+    """
+    if cursor:
+        request_body, offset, page_size = decode_cursor(cursor)
+    else:
+        if request_body is None:
+            raise PageInvalidError("Either a search request or a cursor is required")
+        if page_size <= 0 or page_size > CURSOR_MAX_PAGE_SIZE:
+            raise PageInvalidError("Page Size is invalid")
+        offset = 0
+
+    snapshot = _get_snapshot(request_body, schema)
+    # One hit beyond the page tells whether a next page exists.
+    await _extend_snapshot(snapshot, request_body, field_map, schema, offset + page_size + 1)
+    entries = snapshot["entries"]
+    total_hits = len(entries) if snapshot["exhausted"] else None
+    page = entries[offset:offset + page_size]
+    next_offset = offset + page_size
+    next_cursor = encode_cursor(request_body, next_offset, page_size) if next_offset < len(entries) else None
+    if not page:
+        return [], None, total_hits, request_body
+
+    id_field = field_map.get("id", "id")
+    query = build_query_for_ids(schema, id_field, [entry["id"] for entry in page])
+    summary_inputs = {} if request_body.detailed else {"presentation.summary": SEARCH_HIT_SUMMARY}
+    documents = await fetch_results(f"{query} limit {len(page)}", summary_inputs, None, ranking="unranked") or []
+    documents_by_id = {document.get("fields", {}).get(id_field): document for document in documents}
+    hits = []
+    for entry in page:
+        document = documents_by_id.get(entry["id"])
+        if document is None:
+            # Removed since the snapshot was taken.
+            continue
+        fields = dict(document.get("fields", {}))
+        if entry["features"] is not None:
+            fields["matchfeatures"] = entry["features"]
+        hits.append({"id": document.get("id"), "relevance": entry["relevance"], "fields": fields})
+    return hits, next_cursor, total_hits, request_body
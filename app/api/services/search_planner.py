@@ -0,0 +1,282 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from app.api.models.search_request import SearchRequest
+from app.api.services.vespa_client import get_query_session
+from app.api.utils.yql_compiler import DEFAULT_NN_TARGET_HITS, DEFAULT_WEAK_AND_TARGET_HITS, is_binary
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+SELECTIVITY_STATS_TTL_SECONDS = float(os.environ.get("SELECTIVITY_STATS_TTL_SECONDS", "300"))
+# The grouping query scans the corpus; give up quickly rather than hold a query slot during load.
+SELECTIVITY_REFRESH_TIMEOUT_SECONDS = float(os.environ.get("SELECTIVITY_REFRESH_TIMEOUT_SECONDS", "2"))
+# Below this many estimated matches, scanning the filtered documents is cheaper and more accurate than HNSW.
+EXACT_SEARCH_MAX_DOCS = int(os.environ.get("EXACT_SEARCH_MAX_DOCS", "5000"))
+# Above this estimated filter hit ratio, search HNSW unfiltered and drop non-matching hits afterwards.
+POST_FILTER_MIN_SELECTIVITY = float(os.environ.get("POST_FILTER_MIN_SELECTIVITY", "0.75"))
+# Below this ratio Vespa itself falls back to exact search; kept just under our own exact-search cut-off.
+APPROXIMATE_THRESHOLD = float(os.environ.get("APPROXIMATE_THRESHOLD", "0.02"))
+# Binary hamming neighbours are coarser than cosine ones, so binary retrieval over-fetches before the float rerank.
+BINARY_OVERFETCH = 4
+MAX_TARGET_HITS = 5000
+EXPERIENCE_BUCKET_MONTHS = 12
+CTC_BUCKET_WIDTH = 5
+
+# Attributes grouped for the cardinality snapshot of each schema; they must match the hard-filter fields.
+STATISTICS_FIELDS = {
+    "candidate_profile": {
+        "location": "preferred_and_current_cities",
+        "yearsOfExperience": "total_months_of_experience",
+        "ctc": "expected_annual_ctc",
+    },
+    "job": {
+        "location": "location",
+        "yearsOfExperience": "total_months_of_experience",
+        "ctc": "annual_ctc",
+    },
+}
+
+
+@dataclass
+class FieldStatistics:
+    total_documents: int
+    location_counts: dict[str, int]
+    experience_buckets: dict[int, int]
+    ctc_buckets: dict[int, int]
+    fetched_at: float
+
+
+@dataclass
+class SearchPlan:
+    strategy: str
+    nn_target_hits: int
+    weak_and_target_hits: int
+    approximate: bool = True
+    estimated_selectivity: Optional[float] = None
+    estimated_hits: Optional[int] = None
+    post_filter_threshold: Optional[float] = None
+    approximate_threshold: Optional[float] = None
+    statistics: str = "unavailable"
+
+    def query_inputs(self) -> dict:
+        """Vespa request parameters that carry the plan's matching thresholds."""
+        inputs = {}
+        if self.post_filter_threshold is not None:
+            inputs["ranking.matching.postFilterThreshold"] = self.post_filter_threshold
+        if self.approximate_threshold is not None:
+            inputs["ranking.matching.approximateThreshold"] = self.approximate_threshold
+        return inputs
+
+    def describe(self) -> str:
+        """Compact one-line form for the X-Search-Plan response header."""
+        return ";".join(f"{key}={value}" for key, value in asdict(self).items() if value is not None)
+
+
+def round_target_hits(value: int, minimum: int) -> int:
+    """
+    At least `minimum`; larger windows are rounded up to a power of two so nearby pages share one compiled template.
+    """
+    if value <= minimum:
+        return minimum
+    return min(MAX_TARGET_HITS, 1 << (int(value) - 1).bit_length())
+
+
+def _bucket_count(buckets: dict[int, int], low: Optional[float], high: Optional[float], width: float) -> int:
+    count = 0
+    for start, bucket_count in buckets.items():
+        end = start + width
+        if (low is None or end > low) and (high is None or start <= high):
+            count += bucket_count
+    return count
+
+
+class SelectivityEstimator:
+    """
+    Keeps a per-schema snapshot of hard-filter attribute cardinalities, fetched with one grouping query
+    bounded by timeout_seconds and refreshed at most every ttl_seconds, and estimates how much of the corpus
+    a request's filters keep. Filters are assumed independent.
+    """
+
+    def __init__(self, ttl_seconds: float, timeout_seconds: float = SELECTIVITY_REFRESH_TIMEOUT_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.timeout_seconds = timeout_seconds
+        self._statistics: dict[str, FieldStatistics] = {}
+        self._next_refresh: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._background_refreshes: dict[str, asyncio.Task] = {}
+
+    def _grouping_query(self, schema: str) -> str:
+        fields = STATISTICS_FIELDS[schema]
+        return (
+            f"select * from {schema} where true limit 0 | all("
+            f"all(group({fields['location']}) max(1000) each(output(count()))) "
+            f"all(group(fixedwidth({fields['yearsOfExperience']}, {EXPERIENCE_BUCKET_MONTHS})) max(1000) each(output(count()))) "
+            f"all(group(fixedwidth({fields['ctc']}, {CTC_BUCKET_WIDTH})) max(1000) each(output(count())))"
+            f")"
+        )
+
+    @staticmethod
+    def _parse_groups(grouplist: dict) -> dict:
+        groups = {}
+        for group in grouplist.get("children", []):
+            count = group.get("fields", {}).get("count()", 0)
+            limits = group.get("limits")
+            if limits:
+                groups[int(float(limits["from"]))] = count
+            elif group.get("value") is not None:
+                groups[str(group["value"]).lower()] = count
+        return groups
+
+    def is_stale(self, schema: str) -> bool:
+        return time.time() >= self._next_refresh.get(schema, 0.0)
+
+    async def refresh(self, schema: str) -> Optional[FieldStatistics]:
+        """Fetch a new snapshot if the current one is stale. Failures keep the old snapshot until the next TTL."""
+        lock = self._locks.setdefault(schema, asyncio.Lock())
+        async with lock:
+            if not self.is_stale(schema):
+                return self._statistics.get(schema)
+            self._next_refresh[schema] = time.time() + self.ttl_seconds
+            try:
+                session, query_slots = await get_query_session()
+                async with query_slots:
+                    response = await asyncio.wait_for(
+                        session.query(yql=self._grouping_query(schema), timeout=self.timeout_seconds),
+                        timeout=self.timeout_seconds,
+                    )
+                root = response.get_json().get("root", {})
+                fields = STATISTICS_FIELDS[schema]
+                grouplists = {}
+                for group_root in root.get("children", []):
+                    for grouplist in group_root.get("children", []):
+                        grouplists[grouplist.get("label", "")] = self._parse_groups(grouplist)
+                statistics = FieldStatistics(
+                    total_documents=root.get("fields", {}).get("totalCount", 0),
+                    location_counts=grouplists.get(fields["location"], {}),
+                    experience_buckets=next(
+                        (groups for label, groups in grouplists.items() if fields["yearsOfExperience"] in label), {}
+                    ),
+                    ctc_buckets=next((groups for label, groups in grouplists.items() if fields["ctc"] in label), {}),
+                    fetched_at=time.time(),
+                )
+                self._statistics[schema] = statistics
+                logger.info(
+                    f"Refreshed filter statistics for {schema}: {statistics.total_documents} documents, "
+                    f"{len(statistics.location_counts)} locations"
+                )
+            except Exception as ex:
+                logger.warning(f"Could not refresh filter statistics for {schema}, keeping previous snapshot: {ex}")
+            return self._statistics.get(schema)
+
+    def has_statistics(self, schema: str) -> bool:
+        return schema in self._statistics
+
+    def refresh_in_background(self, schema: str) -> None:
+        """Start a refresh task for the schema unless one is already running."""
+        if schema in self._background_refreshes:
+            return
+        task = asyncio.create_task(self.refresh(schema))
+        self._background_refreshes[schema] = task
+        task.add_done_callback(lambda _task: self._background_refreshes.pop(schema, None))
+
+    def estimate(self, request_body: SearchRequest, schema: str) -> tuple[Optional[float], Optional[FieldStatistics]]:
+        """Estimated fraction of documents passing the hard filters, or None without statistics."""
+        statistics = self._statistics.get(schema)
+        if statistics is None or not statistics.total_documents:
+            return None, statistics
+        params = request_body.searchParams
+        total = statistics.total_documents
+        selectivity = 1.0
+        if params.location:
+            # Documents list several cities, so summing per-city counts over-estimates; cap at the corpus size.
+            matched = sum(statistics.location_counts.get(city.lower(), 0) for city in params.location)
+            selectivity *= min(total, matched) / total
+        if params.experienceMin or params.experienceMax:
+            matched = _bucket_count(
+                statistics.experience_buckets,
+                params.experienceMin * 12 if params.experienceMin else None,
+                params.experienceMax * 12 if params.experienceMax else None,
+                EXPERIENCE_BUCKET_MONTHS,
+            )
+            selectivity *= matched / total
+        if params.expectedSalaryMin or params.expectedSalaryMax:
+            matched = _bucket_count(
+                statistics.ctc_buckets, params.expectedSalaryMin or None, params.expectedSalaryMax or None, CTC_BUCKET_WIDTH
+            )
+            selectivity *= matched / total
+        return selectivity, statistics
+
+    def stats(self) -> dict:
+        return {
+            schema: {
+                "total_documents": statistics.total_documents,
+                "locations": len(statistics.location_counts),
+                "experience_buckets": len(statistics.experience_buckets),
+                "ctc_buckets": len(statistics.ctc_buckets),
+                "age_seconds": round(time.time() - statistics.fetched_at, 1),
+            }
+            for schema, statistics in self._statistics.items()
+        }
+
+
+selectivity_estimator = SelectivityEstimator(ttl_seconds=SELECTIVITY_STATS_TTL_SECONDS)
+
+
+def estimate_plan(request_body: SearchRequest, schema: str, limit: int) -> SearchPlan:
+    """
+    Choose targetHits and the ANN strategy from the page window and the cached filter statistics.
+    Never blocks on Vespa; without statistics it plans as if the filters kept the whole corpus.
+    """
+    binary = is_binary(request_body)
+    nn_target_hits = round_target_hits(limit * (BINARY_OVERFETCH if binary else 1), DEFAULT_NN_TARGET_HITS * (BINARY_OVERFETCH if binary else 1))
+    weak_and_target_hits = round_target_hits(limit, DEFAULT_WEAK_AND_TARGET_HITS)
+    selectivity, statistics = selectivity_estimator.estimate(request_body, schema)
+    if selectivity is None:
+        return SearchPlan("approximate", nn_target_hits, weak_and_target_hits)
+
+    estimated_hits = int(selectivity * statistics.total_documents)
+    plan = SearchPlan(
+        "approximate",
+        nn_target_hits,
+        weak_and_target_hits,
+        estimated_selectivity=round(selectivity, 4),
+        estimated_hits=estimated_hits,
+        statistics="cached",
+    )
+    if selectivity >= 1.0:
+        return plan
+    if estimated_hits <= EXACT_SEARCH_MAX_DOCS:
+        plan.strategy = "exact"
+        plan.approximate = False
+    elif selectivity >= POST_FILTER_MIN_SELECTIVITY:
+        # Vespa raises targetHits by 1/selectivity itself when post-filtering, so the page still fills.
+        plan.strategy = "post_filter"
+        plan.post_filter_threshold = round(max(0.0, selectivity - 0.01), 4)
+    else:
+        plan.strategy = "pre_filter"
+        plan.post_filter_threshold = 1.0
+        plan.approximate_threshold = APPROXIMATE_THRESHOLD
+    return plan
+
+
+async def plan_search(request_body: SearchRequest, schema: str, limit: int) -> SearchPlan:
+    """
+    Plan the request from the cached filter statistics. Stale or missing statistics are refreshed in the
+    background, so planning never adds a Vespa round trip to the request; until the first snapshot
+    arrives, requests get the default approximate plan.
+    """
+    if selectivity_estimator.is_stale(schema):
+        selectivity_estimator.refresh_in_background(schema)
+    plan = estimate_plan(request_body, schema, limit)
+    logger.info(f"Search plan for {schema}: {plan.describe()}")
+    return plan
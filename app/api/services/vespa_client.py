@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from vespa.application import Vespa, VespaAsync
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+VESPA_QUERY_URL = os.environ.get("VESPA_QUERY_URL", "http://localhost:8080")
+# Upper bound on keep-alive connections (and in-flight queries) held by the shared client.
+VESPA_QUERY_CONNECTIONS = int(os.environ.get("VESPA_QUERY_CONNECTIONS", "16"))
+VESPA_FEED_URL = os.environ.get("VESPA_FEED_URL", "http://localhost:8080")
+VESPA_FEED_CONNECTIONS = int(os.environ.get("VESPA_FEED_CONNECTIONS", "8"))
+# Client-side deadline for a single query, in seconds. Vespa gets the same budget as its own timeout.
+VESPA_QUERY_DEADLINE = float(os.environ.get("VESPA_QUERY_DEADLINE", "20"))
+
+_query_session: Optional[VespaAsync] = None
+_query_slots: Optional[asyncio.Semaphore] = None
+_feed_session: Optional[VespaAsync] = None
+_session_lock = asyncio.Lock()
+
+
+async def open_vespa_client() -> VespaAsync:
+    """Open the process-wide async Vespa query session if it is not open yet."""
+    global _query_session, _query_slots
+    async with _session_lock:
+        if _query_session is None:
+            try:
+                app = Vespa(url=VESPA_QUERY_URL)
+                session = app.asyncio(
+                    connections=VESPA_QUERY_CONNECTIONS,
+                    total_timeout=VESPA_QUERY_DEADLINE,
+                )
+                await session.__aenter__()
+                _query_session = session
+                _query_slots = asyncio.Semaphore(VESPA_QUERY_CONNECTIONS)
+                logger.info(f"Opened Vespa query client for {VESPA_QUERY_URL} with {VESPA_QUERY_CONNECTIONS} connections")
+            except Exception as ex:
+                logger.error(f"Exception in {__file__} while opening Vespa query client: {ex}")
+                raise RuntimeError(f"Error while opening Vespa query client: {ex}") from ex
+        return _query_session
+
+
+async def close_vespa_client() -> None:
+    """Close the process-wide async Vespa query and feed sessions."""
+    global _query_session, _query_slots, _feed_session
+    async with _session_lock:
+        if _feed_session is not None:
+            try:
+                await _feed_session.__aexit__(None, None, None)
+                logger.info("Closed Vespa feed client")
+            except Exception as ex:
+                logger.warning(f"Exception in {__file__} while closing Vespa feed client: {ex}")
+            finally:
+                _feed_session = None
+        if _query_session is not None:
+            try:
+                await _query_session.__aexit__(None, None, None)
+                logger.info("Closed Vespa query client")
+            except Exception as ex:
+                logger.warning(f"Exception in {__file__} while closing Vespa query client: {ex}")
+            finally:
+                _query_session = None
+                _query_slots = None
+
+
+async def get_query_session() -> tuple[VespaAsync, asyncio.Semaphore]:
+    """
+    Return the shared query session and the semaphore bounding in-flight queries.
+    The session is opened lazily for callers running outside the FastAPI lifespan (e.g. scripts).
+    """
+    if _query_session is None:
+        await open_vespa_client()
+    return _query_session, _query_slots
+
+
+async def get_feed_session() -> VespaAsync:
+    """Return the shared feed session, opening it on first use."""
+    global _feed_session
+    if _feed_session is not None:
+        return _feed_session
+    async with _session_lock:
+        if _feed_session is None:
+            try:
+                app = Vespa(url=VESPA_FEED_URL)
+                session = app.asyncio(connections=VESPA_FEED_CONNECTIONS)
+                await session.__aenter__()
+                _feed_session = session
+                logger.info(f"Opened Vespa feed client for {VESPA_FEED_URL} with {VESPA_FEED_CONNECTIONS} connections")
+            except Exception as ex:
+                logger.error(f"Exception in {__file__} while opening Vespa feed client: {ex}")
+                raise RuntimeError(f"Error while opening Vespa feed client: {ex}") from ex
+        return _feed_session
@@ -1,6 +1,7 @@
 import logging
+from datetime import datetime
 from typing import List, Optional
-from app.api.models.candidate_profile import Education, Organisations
+from app.api.models.candidate_profile import CandidateProfile, Education, Organisations
 
 logger = logging.getLogger(__name__)
 handler = logging.StreamHandler()
@@ -39,4 +40,39 @@ def derive_highest_education(education_details: Optional[List[Education]]):
         return highest_education_level, highest_course_year_of_completion
     except Exception as ex:
         logger.error(f"Exception in {__file__} while deriving highest education: {ex}")
-        raise RuntimeError("Error deriving highest education") from ex
\ No newline at end of file
+        raise RuntimeError("Error deriving highest education") from ex
+
+def build_candidate_vespa_payload(profile: CandidateProfile, user: str = "TEST_USER") -> dict:
+    """Build the Vespa document fields for a candidate profile, including derived and merged fields."""
+    try:
+        latest_job_title, latest_role = derive_latest_job_fields(profile.employment_history)
+        highest_education_level, highest_course_year_of_completion = derive_highest_education(profile.education_details)
+
+        vespa_payload = profile.model_dump(exclude_none=True)
+        if latest_job_title:
+            vespa_payload["latest_job_title"] = latest_job_title
+        if latest_role:
+            vespa_payload["latest_role"] = latest_role
+        if highest_education_level:
+            vespa_payload["highest_education_level"] = highest_education_level
+        if highest_course_year_of_completion:
+            vespa_payload["highest_course_year_of_completion"] = highest_course_year_of_completion
+
+        preferred_cities = vespa_payload.get("preferred_cities", [])
+        current_city = vespa_payload.get("current_city")
+        if not isinstance(preferred_cities, list):
+            preferred_cities = [preferred_cities] if preferred_cities else []
+        combined_cities = []
+        if current_city:
+            combined_cities.append(current_city)
+        combined_cities.extend(preferred_cities)
+        vespa_payload["preferred_and_current_cities"] = combined_cities
+
+        now_epoch = int(datetime.now().timestamp())
+        vespa_payload["created_at"] = now_epoch
+        vespa_payload["created_by"] = user
+        vespa_payload["updated_by"] = user
+        return vespa_payload
+    except Exception as ex:
+        logger.error(f"Exception in {__file__} while building candidate payload: {ex}")
+        raise RuntimeError("Error building candidate payload") from ex
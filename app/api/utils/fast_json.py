@@ -0,0 +1,34 @@
+import json
+from typing import Any
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, the stdlib encoder is the fallback
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response for content that is already plain dicts/lists.
+    Skips FastAPI's jsonable_encoder pass so each payload is serialized exactly once.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -4,6 +4,7 @@ from typing import Any, Dict
 
 from json_repair import repair_json
 from app.api.exceptions.invalid_exception import InvalidError
+from app.api.utils.metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -144,6 +145,7 @@ class JsonFormat:
             format_json = json.loads(repair_json_str)
         return format_json
 
+    @timed("json_format_process")
     def process(self, text_with_json: str) -> dict:
         extracted_json = self.extract_json_from_string(text_with_json)
         self.jsondata = self.convert_keys_to_lower(extracted_json)
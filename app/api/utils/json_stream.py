@@ -0,0 +1,68 @@
+import json
+import logging
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_records(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Stream records from a JSON array file or a JSONL file without loading the whole file.
+    The format is detected from the first non-whitespace character.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        first_char = ""
+        while True:
+            first_char = file.read(1)
+            if not first_char or not first_char.isspace():
+                break
+        if not first_char:
+            return
+        if first_char == "[":
+            yield from _iter_json_array(file, chunk_size)
+        else:
+            file.seek(0)
+            yield from _iter_json_lines(file)
+
+
+def _iter_json_lines(file) -> Iterator[dict]:
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as ex:
+            logger.error(f"Invalid JSON on line {line_number}: {ex}")
+            raise ValueError(f"Invalid JSON on line {line_number}: {ex}") from ex
+
+
+def _iter_json_array(file, chunk_size: int) -> Iterator[dict]:
+    """Decode array elements one at a time; the buffer only ever holds the current element plus one chunk."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    exhausted = False
+    while True:
+        position = 0
+        while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ","):
+            position += 1
+        buffer = buffer[position:]
+        if buffer.startswith("]"):
+            return
+        if buffer:
+            try:
+                record, end = decoder.raw_decode(buffer)
+                buffer = buffer[end:]
+                yield record
+                continue
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise ValueError("Truncated or invalid JSON array")
+        elif exhausted:
+            raise ValueError("JSON array is not terminated")
+        chunk = file.read(chunk_size)
+        if not chunk:
+            exhausted = True
+        buffer += chunk
@@ -0,0 +1,250 @@
+import asyncio
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+# Latency buckets in seconds: sub-millisecond Python stages up to multi-second LLM calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    """Context manager that observes the elapsed seconds into a histogram, also when the block raises."""
+
+    __slots__ = ("histogram", "labels", "start_time")
+
+    def __init__(self, histogram: "Histogram", labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram._observe(self.labels, time.perf_counter() - self.start_time)
+
+
+class Histogram:
+    """
+    Fixed-bucket Prometheus histogram. observe() is a bisect and three additions under a lock,
+    so it is cheap enough for every request stage.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _observe(self, label_values: tuple, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # One count per bucket plus +Inf, then the sum and the total count.
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def observe(self, value: float, **labels) -> None:
+        self._observe(self._label_values(labels), value)
+
+    def time(self, **labels) -> _Timer:
+        """Time a block: `with histogram.time(stage="build_query"): ...`."""
+        return _Timer(self, self._label_values(labels))
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(values, list(counts), total, count) for values, (counts, total, count) in self._series.items()]
+        for label_values, counts, total, count in sorted(series):
+            labels = dict(zip(self.labelnames, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    Counter or gauge read from existing stats at scrape time, so modules that already keep counters
+    (caches, parse paths, the YQL compiler) expose them without extra work on the request path.
+    collect returns (labels, value) pairs.
+    """
+
+    def __init__(self, name: str, documentation: str, metric_type: str, collect: Callable[[], Iterable[tuple[dict, float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in self.collect():
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class StatsMetric:
+    """Every numeric value of an existing stats() dict, as one gauge per key named {prefix}_{key}."""
+
+    def __init__(self, name: str, documentation: str, stats: Callable[[], dict]):
+        self.name = name
+        self.documentation = documentation
+        self.stats = stats
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, value in self.stats().items():
+            if isinstance(value, bool):
+                value = int(value)
+            if not isinstance(value, (int, float)):
+                continue
+            name = f"{self.name}_{key}"
+            lines.extend([f"# HELP {name} {self.documentation} ({key}).", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"])
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """Return the histogram registered under name, creating it on first use."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            return metric
+
+    def register_callback(
+        self, name: str, documentation: str, collect: Callable[[], Iterable[tuple[dict, float]]], metric_type: str = "gauge"
+    ) -> None:
+        with self._lock:
+            self._metrics[name] = CallbackMetric(name, documentation, metric_type, collect)
+
+    def register_stats(self, name: str, documentation: str, stats: Callable[[], dict]) -> None:
+        with self._lock:
+            self._metrics[name] = StatsMetric(name, documentation, stats)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as ex:
+                lines.append(f"# {metric.name} unavailable: {ex}".replace("\n", " "))
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "profile_search_stage_seconds",
+    "Latency of one pipeline stage (search, feed and parse) in seconds.",
+    labelnames=("stage",),
+)
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "profile_search_http_request_seconds",
+    "Latency of API requests by route template, method and status code, in seconds.",
+    labelnames=("route", "method", "status"),
+)
+
+
+def timed(stage: str, histogram: Optional[Histogram] = None):
+    """Decorator recording each call of a sync or async function as `stage` in the stage histogram."""
+    histogram = histogram or STAGE_SECONDS
+    label_values = histogram._label_values({"stage": stage})
+
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                start_time = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    histogram._observe(label_values, time.perf_counter() - start_time)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram._observe(label_values, time.perf_counter() - start_time)
+        return wrapper
+
+    return decorator
+
+
+def stage_timer(stage: str) -> _Timer:
+    """Context manager recording the enclosed block as `stage` in the stage histogram."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+class RequestTimingMiddleware:
+    """
+    Plain ASGI middleware recording every HTTP request in HTTP_REQUEST_SECONDS, labelled by route template
+    so path parameters do not create new series. Streaming responses are timed until their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start_time = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start_time,
+                route=getattr(route, "path", "unmatched"),
+                method=scope.get("method", ""),
+                status=status["code"],
+            )
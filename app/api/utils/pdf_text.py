@@ -0,0 +1,10 @@
+from pypdf import PdfReader
+
+
+def extract_pdf_text(file) -> str:
+    """
+    Extract the text layer of a PDF. Runs in a spawned worker process, so this module imports nothing
+    beyond pypdf and workers start without loading the service stack.
+    """
+    reader = PdfReader(file)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
@@ -160,9 +160,10 @@ def build_search_query(
     hard_filter_query: str | None,
     soft_filter_query: str | None,
     semantic_query: str | None,
+    select_fields: str = "*",
 ):
     try:
-        base_query = f"select * from {schema} where "
+        base_query = f"select {select_fields} from {schema} where "
         parts = []
         if hard_filter_query:
             parts.append(hard_filter_query)
@@ -190,4 +191,14 @@ def get_field_presence(search_params):
         return query_dict
     except Exception as ex:
         logger.error(f"Error while getting field presence in {__file__}: {ex}")
-        raise RuntimeError(f"Error while getting field presence: {ex}") from ex
\ No newline at end of file
+        raise RuntimeError(f"Error while getting field presence: {ex}") from ex
+
+def build_query_for_ids(schema: str, field_name: str, ids: list[str], select_fields: str = "*"):
+    try:
+        if not ids:
+            return None
+        quoted_ids = ", ".join("'" + str(doc_id).replace("\\", "\\\\").replace("'", "\\'") + "'" for doc_id in ids)
+        return f"select {select_fields} from {schema} where {field_name} in ({quoted_ids})"
+    except Exception as ex:
+        logger.error(f"Error while building query for ids in {__file__}: {ex}")
+        raise RuntimeError(f"Error while building query for ids: {ex}") from ex
@@ -5,11 +5,18 @@ search_input_fields = {
 }
 
 candidate_field_map = {
+    "id":"id",
     "skills_exact":"skills_attr",
     "skills":"skills",
     "skillsEmbedding":"skills_embedding",
     "roleEmbedding":"latest_role_embedding",
     "titleEmbedding":"latest_job_title_embedding",
+    "skillsEmbeddingBfloat16":"skills_embedding_bf16",
+    "roleEmbeddingBfloat16":"latest_role_embedding_bf16",
+    "titleEmbeddingBfloat16":"latest_job_title_embedding_bf16",
+    "skillsEmbeddingBinary":"skills_embedding_bin",
+    "roleEmbeddingBinary":"latest_role_embedding_bin",
+    "titleEmbeddingBinary":"latest_job_title_embedding_bin",
     "jobRole":"latest_role",
     "jobTitle":"latest_job_title",
     "location":"preferred_and_current_cities",
@@ -18,11 +25,18 @@ candidate_field_map = {
 }
 
 job_field_map = {
+    "id":"job_id",
     "skills_exact":"skills",
     "skills":"skills",
     "skillsEmbedding":"skills_embedding",
     "roleEmbedding":"job_role_embedding",
     "titleEmbedding":"job_title_embedding",
+    "skillsEmbeddingBfloat16":"skills_embedding_bf16",
+    "roleEmbeddingBfloat16":"job_role_embedding_bf16",
+    "titleEmbeddingBfloat16":"job_title_embedding_bf16",
+    "skillsEmbeddingBinary":"skills_embedding_bin",
+    "roleEmbeddingBinary":"job_role_embedding_bin",
+    "titleEmbeddingBinary":"job_title_embedding_bin",
     "jobRole":"job_role",
     "jobTitle":"job_title",
     "location":"location",
@@ -0,0 +1,303 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.api.models.search_request import SearchRequest
+from app.api.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(filename)s: %(message)s')
+handler.setFormatter(formatter)
+if not logger.hasHandlers():
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+TEMPLATE_CACHE_SIZE = 512
+DEFAULT_NN_TARGET_HITS = 10
+DEFAULT_WEAK_AND_TARGET_HITS = 100
+
+# Search fields that take part in lexical and semantic matching, with the query tensors and embedder for each.
+# binary_tensor is the bit-packed int8 query used against the hamming-indexed *_bin fields.
+# bfloat16 searches reuse the float query tensors against the *_bf16 fields.
+SEMANTIC_FIELDS = {
+    "skills": {"tensor": "s", "binary_tensor": "sb", "embedding": "skillsEmbedding", "model": "e5-small-skills-v1"},
+    "jobRole": {"tensor": "r", "binary_tensor": "rb", "embedding": "roleEmbedding", "model": "e5-small-finetuned-role-title"},
+    "jobTitle": {"tensor": "t", "binary_tensor": "tb", "embedding": "titleEmbedding", "model": "e5-small-finetuned-role-title"},
+}
+
+
+class Node(ABC):
+    @abstractmethod
+    def render(self) -> str:
+        """YQL for this node, with query values referenced as @parameters."""
+
+
+@dataclass(frozen=True)
+class Contains(Node):
+    field: str
+    param: str
+
+    def render(self) -> str:
+        return f"{self.field} contains @{self.param}"
+
+
+@dataclass(frozen=True)
+class Range(Node):
+    field: str
+    low_param: Optional[str]
+    high_param: Optional[str]
+
+    def render(self) -> str:
+        if self.low_param and self.high_param:
+            return f"(range({self.field}, @{self.low_param}, @{self.high_param}))"
+        if self.low_param:
+            return f"({self.field} >= @{self.low_param})"
+        return f"({self.field} <= @{self.high_param})"
+
+
+@dataclass(frozen=True)
+class NearestNeighbor(Node):
+    field: str
+    tensor: str
+    target_hits: int
+    approximate: bool = True
+
+    def render(self) -> str:
+        annotation = f"targetHits:{self.target_hits}" if self.approximate else f"targetHits:{self.target_hits},approximate:false"
+        return f"({{{annotation}}}nearestNeighbor({self.field},{self.tensor}))"
+
+
+@dataclass(frozen=True)
+class Or(Node):
+    children: tuple
+
+    def render(self) -> str:
+        return "(" + " OR ".join(child.render() for child in self.children) + ")"
+
+
+@dataclass(frozen=True)
+class And(Node):
+    children: tuple
+
+    def render(self) -> str:
+        return "(" + " AND ".join(child.render() for child in self.children) + ")"
+
+
+@dataclass(frozen=True)
+class WeakAnd(Node):
+    children: tuple
+    target_hits: int
+
+    def render(self) -> str:
+        return f"({{targetHits:{self.target_hits}}}weakAnd(" + ",".join(child.render() for child in self.children) + "))"
+
+
+@dataclass(frozen=True)
+class Select(Node):
+    schema: str
+    select_fields: str
+    where: Node
+
+    def render(self) -> str:
+        return f"select {self.select_fields} from {self.schema} where {self.where.render()}"
+
+
+@dataclass
+class CompiledQuery:
+    yql: str
+    params: dict
+    shape: tuple
+
+
+def _positive(value) -> bool:
+    # Zero bounds have always been treated as "not set" by the range filters.
+    return bool(value)
+# Field map suffix of the embedding fields searched for each vectorPrecision.
+PRECISION_FIELD_SUFFIX = {"float": "", "bfloat16": "Bfloat16", "binary": "Binary"}
+
+
+def vector_precision(request_body: SearchRequest) -> str:
+    return request_body.vectorPrecision.value if request_body.vectorPrecision else "float"
+
+
+def is_binary(request_body: SearchRequest) -> bool:
+    return vector_precision(request_body) == "binary"
+
+
+def query_shape(
+    request_body: SearchRequest,
+    schema: str,
+    select_fields: str,
+    field_map_name: str,
+    nn_target_hits: int = DEFAULT_NN_TARGET_HITS,
+    weak_and_target_hits: int = DEFAULT_WEAK_AND_TARGET_HITS,
+    approximate: bool = True,
+) -> tuple:
+    """
+    The part of a request that determines the YQL text: which filters are present, how many values each has,
+    and the retrieval plan annotations.
+    """
+    params = request_body.searchParams
+    return (
+        schema,
+        field_map_name,
+        select_fields,
+        len(params.skills or []),
+        len(params.jobRole or []),
+        len(params.jobTitle or []),
+        len(params.location or []),
+        _positive(params.experienceMin),
+        _positive(params.experienceMax),
+        _positive(params.expectedSalaryMin),
+        _positive(params.expectedSalaryMax),
+        vector_precision(request_body),
+        nn_target_hits,
+        weak_and_target_hits,
+        approximate,
+    )
+
+
+def _contains_group(field: str, prefix: str, count: int) -> Optional[Node]:
+    if not count:
+        return None
+    return Or(tuple(Contains(field, f"{prefix}{index}") for index in range(count)))
+
+
+def _build_ast(shape: tuple, field_map: dict) -> Node:
+    (schema, _, select_fields, skills_count, role_count, title_count, location_count,
+     has_exp_min, has_exp_max, has_ctc_min, has_ctc_max, precision,
+     nn_target_hits, weak_and_target_hits, approximate) = shape
+
+    hard_filters = [
+        _contains_group(field_map["location"], "location", location_count),
+        Range(field_map["yearsOfExperience"], "experience_min" if has_exp_min else None, "experience_max" if has_exp_max else None)
+        if has_exp_min or has_exp_max else None,
+        Range(field_map["ctc"], "ctc_min" if has_ctc_min else None, "ctc_max" if has_ctc_max else None)
+        if has_ctc_min or has_ctc_max else None,
+    ]
+    hard_filters = tuple(node for node in hard_filters if node is not None)
+
+    soft_filters = tuple(
+        node for node in (
+            _contains_group(field_map["skills"], "skills", skills_count),
+            _contains_group(field_map["jobRole"], "job_role", role_count),
+            _contains_group(field_map["jobTitle"], "job_title", title_count),
+        ) if node is not None
+    )
+    counts = {"skills": skills_count, "jobRole": role_count, "jobTitle": title_count}
+    semantic = tuple(
+        NearestNeighbor(
+            field_map[config["embedding"] + PRECISION_FIELD_SUFFIX[precision]],
+            config["binary_tensor"] if precision == "binary" else config["tensor"],
+            nn_target_hits,
+            approximate,
+        )
+        for name, config in SEMANTIC_FIELDS.items()
+        if counts[name]
+    )
+
+    parts = list(hard_filters)
+    if soft_filters and semantic:
+        parts.append(Or((WeakAnd(soft_filters, weak_and_target_hits),) + semantic))
+    elif soft_filters:
+        parts.append(WeakAnd(soft_filters, weak_and_target_hits))
+    elif semantic:
+        parts.append(Or(semantic))
+    if not parts:
+        raise ValueError("Query has no filters")
+    return Select(schema, select_fields, And(tuple(parts)))
+
+
+def bind_params(request_body: SearchRequest) -> dict:
+    """Query parameters referenced by the template. Values never enter the YQL text, so they need no escaping."""
+    search_params = request_body.searchParams
+    params = {}
+    for prefix, values in (
+        ("skills", search_params.skills),
+        ("job_role", search_params.jobRole),
+        ("job_title", search_params.jobTitle),
+        ("location", search_params.location),
+    ):
+        for index, value in enumerate(values or []):
+            params[f"{prefix}{index}"] = value
+    if _positive(search_params.experienceMin):
+        params["experience_min"] = search_params.experienceMin * 12
+    if _positive(search_params.experienceMax):
+        params["experience_max"] = search_params.experienceMax * 12
+    if _positive(search_params.expectedSalaryMin):
+        params["ctc_min"] = search_params.expectedSalaryMin
+    if _positive(search_params.expectedSalaryMax):
+        params["ctc_max"] = search_params.expectedSalaryMax
+    return params
+
+
+class YqlCompiler:
+    """Compiles SearchRequest shapes to YQL templates once and reuses them for every request with that shape."""
+
+    def __init__(self, max_templates: int = TEMPLATE_CACHE_SIZE):
+        self.max_templates = max_templates
+        self._templates: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self.template_hits = 0
+        self.template_misses = 0
+        self.compile_seconds = 0.0
+        self.bind_seconds = 0.0
+
+    def compile(
+        self,
+        request_body: SearchRequest,
+        field_map: dict,
+        schema: str,
+        select_fields: str = "*",
+        nn_target_hits: int = DEFAULT_NN_TARGET_HITS,
+        weak_and_target_hits: int = DEFAULT_WEAK_AND_TARGET_HITS,
+        approximate: bool = True,
+    ) -> CompiledQuery:
+        try:
+            start_time = time.perf_counter()
+            shape = query_shape(
+                request_body, schema, select_fields, str(field_map.get("id")),
+                nn_target_hits, weak_and_target_hits, approximate,
+            )
+            template = self._templates.get(shape)
+            if template is None:
+                template = _build_ast(shape, field_map).render()
+                with self._lock:
+                    if len(self._templates) >= self.max_templates:
+                        self._templates.pop(next(iter(self._templates)))
+                    self._templates[shape] = template
+                    self.template_misses += 1
+                    self.compile_seconds += time.perf_counter() - start_time
+                logger.info(f"Compiled YQL template for shape {shape}: {template}")
+            else:
+                with self._lock:
+                    self.template_hits += 1
+            bind_start_time = time.perf_counter()
+            params = bind_params(request_body)
+            with self._lock:
+                self.bind_seconds += time.perf_counter() - bind_start_time
+            return CompiledQuery(yql=template, params=params, shape=shape)
+        except Exception as ex:
+            logger.error(f"Error while compiling YQL in {__file__}: {ex}")
+            raise RuntimeError(f"Error while compiling YQL: {ex}") from ex
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.template_hits + self.template_misses
+            return {
+                "templates": len(self._templates),
+                "max_templates": self.max_templates,
+                "template_hits": self.template_hits,
+                "template_misses": self.template_misses,
+                "template_hit_rate": self.template_hits / lookups if lookups else 0.0,
+                "compile_seconds_total": self.compile_seconds,
+                "bind_seconds_total": self.bind_seconds,
+            }
+
+
+yql_compiler = YqlCompiler()
+metrics.register_stats("profile_search_yql_compiler", "YQL template compiler", yql_compiler.stats)
@@ -1,4 +1,5 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,11 +10,25 @@ from app.api.routers import (
     health_check,
     search_candidate,
     feed_candidate,
+    match,
+    metrics,
     parse_resume
     
 )
+from app.api.services.gemini_service import shutdown_pdf_text_executor
+from app.api.services.vespa_client import close_vespa_client, open_vespa_client
+from app.api.utils.metrics import RequestTimingMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_vespa_client()
+    yield
+    await close_vespa_client()
+    shutdown_pdf_text_executor()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(RequestTimingMiddleware)
 
 
 BASE_URL = "/profile-search"
@@ -22,4 +37,6 @@ app.include_router(search_candidate.router, prefix=BASE_URL)
 app.include_router(feed_candidate.router, prefix=BASE_URL)
 app.include_router(parse_resume.router, prefix=BASE_URL)
 app.include_router(chat.router, prefix=BASE_URL)
+app.include_router(match.router, prefix=BASE_URL)
+app.include_router(metrics.router, prefix=BASE_URL)
 
@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import functools
+import json
+import socket
+import subprocess
+import time
+from typing import Optional
+
+import httpx
+import uvicorn
+
+from app.api.services import search_candidate_service, vespa_client
+from app.api.services.bulk_feed_service import percentile
+from app.api.services.search_cache import search_cache
+from benchmarks.stub_vespa import start_stub_server
+from benchmarks.workload import generate_requests
+
+# Stages of search_candidates timed in-process, by their module-level name in search_candidate_service.
+STAGES = ("build_query", "fetch_results", "format_response")
+SEARCH_PATH = "/profile-search/search"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay a generated search workload against the FastAPI app and report per-stage latency percentiles."
+    )
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", default="10")
+    parser.add_argument("--warmup", type=int, default=20, help="Requests sent before measuring")
+    parser.add_argument("--vespa-url", default=vespa_client.VESPA_QUERY_URL, help="Real Vespa query endpoint")
+    parser.add_argument("--stub", default=None, help="Recordings JSONL; serves Vespa from the stub instead of --vespa-url")
+    parser.add_argument("--record", action="store_true", help="Proxy --vespa-url through the stub and record into --stub")
+    parser.add_argument("--replay-latency", action="store_true", help="Stub sleeps for the recorded Vespa latency")
+    parser.add_argument(
+        "--app-url",
+        default=None,
+        help="Replay against an already running app; only end-to-end latency is reported then",
+    )
+    parser.add_argument("--use-cache", action="store_true", help="Keep the search result cache enabled")
+    parser.add_argument("--label", default=None, help="Free-form label stored in the report, e.g. a release tag")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare p95 latencies against")
+    parser.add_argument(
+        "--max-regression", type=float, default=None,
+        help="Exit non-zero when any p95 is more than this many percent slower than --baseline",
+    )
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def _summarize(latencies_ms: list[float], elapsed: float) -> dict:
+    busy_seconds = sum(latencies_ms) / 1000
+    return {
+        "calls": len(latencies_ms),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "mean_ms": sum(latencies_ms) / len(latencies_ms) if latencies_ms else None,
+        "per_second": round(len(latencies_ms) / elapsed, 2) if elapsed > 0 else None,
+        # Calls one worker could serve per second if it did nothing but this stage.
+        "single_worker_per_second": round(len(latencies_ms) / busy_seconds, 2) if busy_seconds > 0 else None,
+    }
+
+
+class StageTimer:
+    """Wraps the search_candidate_service stages so every call records its latency while the benchmark runs."""
+
+    def __init__(self):
+        self.latencies_ms = {stage: [] for stage in STAGES}
+        self.recording = False
+        self._originals = {}
+
+    def _wrap(self, stage: str, function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def timed(*args, **kwargs):
+                start_time = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    if self.recording:
+                        self.latencies_ms[stage].append((time.perf_counter() - start_time) * 1000)
+        else:
+            @functools.wraps(function)
+            def timed(*args, **kwargs):
+                start_time = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    if self.recording:
+                        self.latencies_ms[stage].append((time.perf_counter() - start_time) * 1000)
+        return timed
+
+    def __enter__(self):
+        for stage in STAGES:
+            self._originals[stage] = getattr(search_candidate_service, stage)
+            setattr(search_candidate_service, stage, self._wrap(stage, self._originals[stage]))
+        return self
+
+    def __exit__(self, *exc):
+        for stage, function in self._originals.items():
+            setattr(search_candidate_service, stage, function)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _start_app() -> tuple[uvicorn.Server, asyncio.Task, str]:
+    from app.main import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task, f"http://127.0.0.1:{port}"
+
+
+async def _replay(app_url: str, bodies: list[dict], concurrency: int, page_size: str) -> tuple[list[float], int, float]:
+    latencies_ms: list[float] = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=60) as client:
+
+        async def _one(body: dict):
+            nonlocal errors
+            async with slots:
+                start_time = time.perf_counter()
+                response = await client.post(SEARCH_PATH, params={"page_size": page_size}, json=body)
+                latencies_ms.append((time.perf_counter() - start_time) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*(_one(body) for body in bodies))
+        return latencies_ms, errors, time.perf_counter() - start_time
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Percent change of every p95 against a baseline report; positive means slower."""
+    changes = {}
+    for name, summary in report["stages"].items():
+        before = baseline.get("stages", {}).get(name, {}).get("p95_ms")
+        if before and summary.get("p95_ms") is not None:
+            changes[name] = round((summary["p95_ms"] - before) / before * 100, 1)
+    return changes
+
+
+async def run(args) -> dict:
+    bodies = list(generate_requests("candidate_profile", args.queries + args.warmup, seed=args.seed))
+    warmup, measured = bodies[:args.warmup], bodies[args.warmup:]
+    stub = None
+    if args.stub:
+        stub, stub_responses = start_stub_server(
+            args.stub, upstream=args.vespa_url if args.record else None, replay_latency=args.replay_latency
+        )
+        vespa_client.VESPA_QUERY_URL = f"http://127.0.0.1:{stub.server_address[1]}"
+    else:
+        vespa_client.VESPA_QUERY_URL = args.vespa_url
+    if not args.use_cache:
+        search_cache.max_entries = 0
+
+    server = None
+    with StageTimer() as timer:
+        try:
+            if args.app_url:
+                app_url = args.app_url
+            else:
+                server, server_task, app_url = await _start_app()
+            await _replay(app_url, warmup, args.concurrency, args.page_size)
+            timer.recording = True
+            latencies_ms, errors, elapsed = await _replay(app_url, measured, args.concurrency, args.page_size)
+            timer.recording = False
+        finally:
+            if server is not None:
+                server.should_exit = True
+                await server_task
+            if stub is not None:
+                stub.shutdown()
+
+    stages = {"end_to_end": _summarize(latencies_ms, elapsed)}
+    if not args.app_url:
+        stages.update({stage: _summarize(timer.latencies_ms[stage], elapsed) for stage in STAGES})
+    report = {
+        "label": args.label,
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "vespa": "stub" if args.stub and not args.record else args.vespa_url,
+        "queries": len(measured),
+        "seed": args.seed,
+        "concurrency": args.concurrency,
+        "page_size": args.page_size,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "stages": stages,
+    }
+    if args.stub:
+        report["stub"] = stub_responses.stats()
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            report["p95_change_percent"] = compare(report, json.load(file))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if args.max_regression is not None and any(
+        change > args.max_regression for change in report.get("p95_change_percent", {}).values()
+    ):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
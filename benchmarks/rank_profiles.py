@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import json
+import time
+
+from app.api.models.search_request import SearchRequest
+from app.api.services import vespa_client
+from app.api.services.bulk_feed_service import percentile
+from app.api.services.search_candidate_service import build_query, fetch_results
+from app.api.utils.query_builder import get_field_presence
+from app.api.utils.search_fields_map import candidate_field_map, job_field_map
+from benchmarks.workload import generate_requests
+
+FIELD_MAPS = {"candidate_profile": candidate_field_map, "job": job_field_map}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare latency and top-k overlap of two rank profiles or vector precisions.")
+    parser.add_argument("--schema", choices=sorted(FIELD_MAPS), default="candidate_profile")
+    parser.add_argument("--url", default=vespa_client.VESPA_QUERY_URL, help="Vespa query endpoint")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--hits", type=int, default=10)
+    parser.add_argument("--baseline", default="default")
+    parser.add_argument("--candidate", default="two_phase")
+    parser.add_argument("--rerank-count", type=int, default=None, help="Override rerank-count of the candidate profile")
+    parser.add_argument(
+        "--candidate-vectors", choices=["float", "bfloat16", "binary"], default="float",
+        help="bfloat16 and binary retrieve on the *_bf16 / hamming *_bin fields and rank with the matching profile",
+    )
+    parser.add_argument("--warmup", type=int, default=10, help="Queries per profile run before measuring")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+async def _run_query(request: SearchRequest, field_map: dict, schema: str, hits: int) -> tuple[float, list]:
+    query, inputs = build_query(request, field_map, schema, hits, 0)
+    field_presence = get_field_presence(request.searchParams)
+    start_time = time.perf_counter()
+    results = await fetch_results(query, inputs, field_presence) or []
+    latency_ms = (time.perf_counter() - start_time) * 1000
+    return latency_ms, [hit.get("fields", {}).get(field_map["id"]) for hit in results]
+
+
+def _with_options(request: SearchRequest, options: dict) -> SearchRequest:
+    return SearchRequest(**{**request.model_dump(mode="json"), **options})
+
+
+def _summarize(latencies_ms: list[float]) -> dict:
+    return {
+        "queries": len(latencies_ms),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "mean_ms": sum(latencies_ms) / len(latencies_ms) if latencies_ms else None,
+    }
+
+
+async def run(args) -> dict:
+    vespa_client.VESPA_QUERY_URL = args.url
+    schema, field_map = args.schema, FIELD_MAPS[args.schema]
+    requests = [SearchRequest(**body) for body in generate_requests(schema, args.queries, seed=args.seed)]
+    profiles = {
+        "baseline": {"rankProfile": args.baseline},
+        "candidate": {"rankProfile": args.candidate, "rerankCount": args.rerank_count, "vectorPrecision": args.candidate_vectors},
+    }
+    latencies = {name: [] for name in profiles}
+    overlaps = []
+    try:
+        for request in requests[:args.warmup]:
+            for options in profiles.values():
+                await _run_query(_with_options(request, options), field_map, schema, args.hits)
+        for request in requests:
+            top_ids = {}
+            # Alternate the order so neither profile consistently benefits from a warm cache.
+            names = list(profiles) if len(overlaps) % 2 == 0 else list(reversed(profiles))
+            for name in names:
+                latency_ms, ids = await _run_query(_with_options(request, profiles[name]), field_map, schema, args.hits)
+                latencies[name].append(latency_ms)
+                top_ids[name] = ids
+            baseline_ids = set(top_ids["baseline"])
+            overlaps.append(len(baseline_ids & set(top_ids["candidate"])) / len(baseline_ids) if baseline_ids else 1.0)
+    finally:
+        await vespa_client.close_vespa_client()
+
+    report = {
+        "schema": schema,
+        "seed": args.seed,
+        "hits": args.hits,
+        "profiles": {name: {**options, **_summarize(latencies[name])} for name, options in profiles.items()},
+        f"top{args.hits}_overlap_mean": sum(overlaps) / len(overlaps) if overlaps else None,
+        f"top{args.hits}_overlap_p5": percentile(overlaps, 5),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
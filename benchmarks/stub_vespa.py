@@ -0,0 +1,179 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import requests
+
+# Request keys that change between otherwise identical queries and must not affect the recording key.
+VOLATILE_KEYS = {"timeout", "trace.level", "trace.timestamps", "trace.explainLevel", "presentation.timing"}
+
+
+def request_key(body: dict) -> str:
+    canonical = {key: value for key, value in body.items() if key not in VOLATILE_KEYS}
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def request_kind(body: dict) -> tuple[str, str]:
+    """(schema, "grouping" | "search"), used to pick a stand-in response for queries that were never recorded."""
+    yql = str(body.get("yql", ""))
+    schema = re.search(r"\bfrom\s+(?:sources\s+)?(\w+)", yql)
+    return (schema.group(1) if schema else ""), ("grouping" if "| all(" in yql else "search")
+
+
+class RecordedResponses:
+    """
+    Vespa query responses keyed by the request body, kept in a JSONL file of
+    {"key", "kind", "latency_ms", "response"} lines so a run can be replayed without a Vespa instance.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._responses: dict[str, dict] = {}
+        self._by_kind: dict[tuple, list[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.unmatched = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        self._add(json.loads(line))
+        except FileNotFoundError:
+            pass
+
+    def _add(self, entry: dict) -> None:
+        if entry["key"] not in self._responses:
+            self._by_kind.setdefault(tuple(entry["kind"]), []).append(entry["key"])
+        self._responses[entry["key"]] = entry
+
+    def record(self, body: dict, response: dict, latency_ms: float) -> None:
+        entry = {"key": request_key(body), "kind": list(request_kind(body)), "latency_ms": latency_ms, "response": response}
+        with self._lock:
+            self._add(entry)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry) + "\n")
+
+    def lookup(self, body: dict) -> Optional[dict]:
+        """
+        The recorded response for this exact request, or else a recording of the same schema and kind
+        chosen by the request hash, so unseen queries still get a realistically sized payload.
+        """
+        key = request_key(body)
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            keys = self._by_kind.get(request_kind(body))
+            if not keys:
+                self.unmatched += 1
+                return None
+            return self._responses[keys[int(key, 16) % len(keys)]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"recorded": len(self._responses), "hits": self.hits, "misses": self.misses, "unmatched": self.unmatched}
+
+
+EMPTY_RESPONSE = {"root": {"id": "toplevel", "relevance": 1.0, "fields": {"totalCount": 0}, "coverage": {"coverage": 100}}}
+
+
+def _handler(responses: RecordedResponses, upstream: Optional[str], replay_latency: bool):
+    class StubVespaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload: dict) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.startswith("/stub/stats"):
+                self._send(200, responses.stats())
+            elif self.path.startswith("/state/v1/health") or self.path.startswith("/ApplicationStatus"):
+                self._send(200, {"status": {"code": "up"}})
+            else:
+                self._send(404, {"error": f"Not served by the stub: {self.path}"})
+
+        def do_POST(self):
+            if not self.path.startswith("/search"):
+                self._send(404, {"error": f"Not served by the stub: {self.path}"})
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if upstream:
+                start_time = time.perf_counter()
+                upstream_response = requests.post(f"{upstream.rstrip('/')}/search/", json=body, timeout=60)
+                latency_ms = (time.perf_counter() - start_time) * 1000
+                if upstream_response.ok:
+                    responses.record(body, upstream_response.json(), latency_ms)
+                self._send(upstream_response.status_code, upstream_response.json())
+                return
+            entry = responses.lookup(body)
+            if entry is None:
+                self._send(200, EMPTY_RESPONSE)
+                return
+            if replay_latency:
+                time.sleep(entry["latency_ms"] / 1000)
+            self._send(200, entry["response"])
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubVespaHandler
+
+
+def start_stub_server(
+    recordings_path: str,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    upstream: Optional[str] = None,
+    replay_latency: bool = False,
+) -> tuple[ThreadingHTTPServer, RecordedResponses]:
+    """
+    Serve Vespa's /search/ endpoint from recorded responses on a daemon thread; port 0 picks a free port.
+    With upstream set, queries are proxied to that Vespa and the responses recorded instead.
+    """
+    responses = RecordedResponses(recordings_path)
+    server = ThreadingHTTPServer((host, port), _handler(responses, upstream, replay_latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, responses
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in for the Vespa query endpoint that replays recorded responses.")
+    parser.add_argument("--recordings", default=os.path.join(".cache", "vespa_recordings.jsonl"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--record-from", default=None, help="Proxy to this Vespa URL and record its responses")
+    parser.add_argument("--replay-latency", action="store_true", help="Sleep for the recorded Vespa latency on replay")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server, responses = start_stub_server(args.recordings, args.host, args.port, args.record_from, args.replay_latency)
+    mode = f"recording from {args.record_from}" if args.record_from else "replaying"
+    print(f"Stub Vespa on http://{args.host}:{server.server_address[1]} {mode} {args.recordings}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print(json.dumps(responses.stats()))
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
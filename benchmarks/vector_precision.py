@@ -0,0 +1,179 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.api.models.search_request import SearchRequest
+from app.api.services.bulk_feed_service import percentile
+from app.api.services.embedding_service import embedding_service
+from app.api.services.search_candidate_service import semantic_query_texts
+from app.api.utils.json_stream import iter_json_records
+from app.api.utils.yql_compiler import SEMANTIC_FIELDS
+from benchmarks.workload import generate_requests
+
+DIMENSIONS = 384
+BYTES_PER_VECTOR = {"float": DIMENSIONS * 4, "bfloat16": DIMENSIONS * 2, "int8": DIMENSIONS, "binary": DIMENSIONS // 8}
+# Number of bits that can differ per byte, used to compute hamming distances on packed vectors.
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.int32)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare memory, brute-force latency and recall of float, bfloat16, int8 and binary candidate embeddings."
+    )
+    parser.add_argument("--candidates", default="candidate_profiles.json")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-count", type=int, default=200, help="Binary candidates reranked with float vectors")
+    parser.add_argument("--target-documents", type=int, default=1_000_000, help="Corpus size for the memory projection")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9, None)
+
+
+def to_bfloat16(vectors: np.ndarray) -> np.ndarray:
+    """Round-trip through bfloat16 by truncating the low 16 bits of each float32."""
+    return (vectors.astype(np.float32).view(np.uint32) & 0xFFFF0000).view(np.float32)
+
+
+def to_int8(vectors: np.ndarray) -> np.ndarray:
+    """Symmetric per-vector int8 quantization, dequantized back to float for scoring."""
+    scale = np.clip(np.abs(vectors).max(axis=1, keepdims=True), 1e-9, None) / 127
+    return np.round(vectors / scale).astype(np.int8).astype(np.float32) * scale
+
+
+def to_binary(vectors: np.ndarray) -> np.ndarray:
+    return np.packbits(vectors > 0, axis=1)
+
+
+def _candidate_vectors(candidates: list[dict]) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Embed each semantic field of the corpus; returns (vectors, owning document index) per field."""
+    texts = {"skills": [], "jobRole": [], "jobTitle": []}
+    owners = {"skills": [], "jobRole": [], "jobTitle": []}
+    for index, candidate in enumerate(candidates):
+        history = candidate.get("employment_history") or [{}]
+        latest = next((job for job in history if job.get("is_current_job")), history[0])
+        for skill in candidate.get("skills") or []:
+            texts["skills"].append(skill)
+            owners["skills"].append(index)
+        for name, value in (("jobRole", latest.get("role")), ("jobTitle", latest.get("job_title"))):
+            if value:
+                texts[name].append(value)
+                owners[name].append(index)
+    vectors = {}
+    for name, field_texts in texts.items():
+        embedded = embedding_service.embed_batch(SEMANTIC_FIELDS[name]["model"], field_texts)
+        vectors[name] = (np.asarray(embedded, dtype=np.float32), np.asarray(owners[name]))
+    return vectors
+
+
+def _document_scores(similarities: np.ndarray, owners: np.ndarray, document_count: int) -> np.ndarray:
+    # Skills hold one vector per skill; a document scores as its best-matching vector, like nearestNeighbor on p{}.
+    scores = np.full(document_count, -np.inf, dtype=np.float32)
+    np.maximum.at(scores, owners, similarities)
+    return scores
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _recall(found: np.ndarray, exact: np.ndarray) -> float:
+    return len(set(found.tolist()) & set(exact.tolist())) / len(exact) if len(exact) else 1.0
+
+
+def compare_field(vectors: np.ndarray, owners: np.ndarray, queries: np.ndarray, document_count: int, k: int, rerank_count: int) -> dict:
+    normalized = _normalize(vectors)
+    variants = {"bfloat16": _normalize(to_bfloat16(vectors)), "int8": _normalize(to_int8(vectors))}
+    packed = to_binary(vectors)
+    recalls = {name: [] for name in ("bfloat16", "int8", "binary", "binary_reranked")}
+    latencies_ms = {name: [] for name in ("float", "bfloat16", "int8", "binary_reranked")}
+    for query in queries:
+        query_normalized = query / max(np.linalg.norm(query), 1e-9)
+
+        start_time = time.perf_counter()
+        exact = _top_k(_document_scores(normalized @ query_normalized, owners, document_count), k)
+        latencies_ms["float"].append((time.perf_counter() - start_time) * 1000)
+
+        for name, variant_vectors in variants.items():
+            start_time = time.perf_counter()
+            found = _top_k(_document_scores(variant_vectors @ query_normalized, owners, document_count), k)
+            latencies_ms[name].append((time.perf_counter() - start_time) * 1000)
+            recalls[name].append(_recall(found, exact))
+
+        start_time = time.perf_counter()
+        hamming = POPCOUNT[np.bitwise_xor(packed, to_binary(query[None, :]))].sum(axis=1)
+        binary_scores = _document_scores(1 - hamming.astype(np.float32) / DIMENSIONS, owners, document_count)
+        shortlist = _top_k(binary_scores, rerank_count)
+        rerank_scores = np.full(document_count, -np.inf, dtype=np.float32)
+        in_shortlist = np.isin(owners, shortlist)
+        np.maximum.at(rerank_scores, owners[in_shortlist], normalized[in_shortlist] @ query_normalized)
+        reranked = _top_k(rerank_scores, k)
+        latencies_ms["binary_reranked"].append((time.perf_counter() - start_time) * 1000)
+        recalls["binary"].append(_recall(shortlist[:k], exact))
+        recalls["binary_reranked"].append(_recall(reranked, exact))
+
+    return {
+        "vectors": len(vectors),
+        f"recall@{k}": {name: sum(values) / len(values) if values else None for name, values in recalls.items()},
+        "brute_force_p50_ms": {name: percentile(values, 50) for name, values in latencies_ms.items()},
+        "brute_force_p99_ms": {name: percentile(values, 99) for name, values in latencies_ms.items()},
+    }
+
+
+def run(args) -> dict:
+    candidates = list(iter_json_records(args.candidates))
+    requests = [SearchRequest(**body) for body in generate_requests("candidate_profile", args.queries, seed=args.seed)]
+    corpus = _candidate_vectors(candidates)
+
+    query_texts = {name: [] for name in SEMANTIC_FIELDS}
+    for request in requests:
+        for field_texts in semantic_query_texts(request.searchParams).values():
+            for name, text in field_texts:
+                query_texts[name].append(text)
+
+    fields = {}
+    for name, (vectors, owners) in corpus.items():
+        if not query_texts[name] or not len(vectors):
+            continue
+        queries = np.asarray(embedding_service.embed_batch(SEMANTIC_FIELDS[name]["model"], query_texts[name]), dtype=np.float32)
+        fields[name] = compare_field(vectors, owners, queries, len(candidates), args.k, args.rerank_count)
+
+    vectors_per_document = sum(len(vectors) for vectors, _ in corpus.values()) / max(len(candidates), 1)
+    report = {
+        "documents": len(candidates),
+        "queries": len(requests),
+        "k": args.k,
+        "rerank_count": args.rerank_count,
+        "vectors_per_document": vectors_per_document,
+        "bytes_per_vector": BYTES_PER_VECTOR,
+        # Cell storage only; HNSW graph links add roughly the same amount for every cell type.
+        "projected_cell_gib": {
+            name: args.target_documents * vectors_per_document * size / 2 ** 30
+            for name, size in BYTES_PER_VECTOR.items()
+        },
+        "target_documents": args.target_documents,
+        "fields": fields,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
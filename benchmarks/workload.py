@@ -0,0 +1,68 @@
+import random
+from typing import Iterator
+
+from app.api.utils.json_stream import iter_json_records
+
+
+def _sample(values: list, rng: random.Random, max_count: int) -> list:
+    values = [value for value in values or [] if isinstance(value, str) and value.strip()]
+    if not values:
+        return []
+    return rng.sample(values, rng.randint(1, min(max_count, len(values))))
+
+
+def candidate_search_from_job(job: dict, rng: random.Random) -> dict:
+    """A candidate search a recruiter might run for this job posting."""
+    search_params = {
+        "skills": _sample(job.get("skills"), rng, 4),
+        "jobRole": [job["job_role"]] if job.get("job_role") and rng.random() < 0.7 else [],
+        "jobTitle": [job["job_title"]] if job.get("job_title") and rng.random() < 0.5 else [],
+        "location": _sample(job.get("location"), rng, 2) if rng.random() < 0.4 else [],
+    }
+    if job.get("total_months_of_experience") and rng.random() < 0.3:
+        search_params["experienceMin"] = job["total_months_of_experience"] // 12
+    return {"searchType": "both", "searchParams": search_params}
+
+
+def job_search_from_candidate(candidate: dict, rng: random.Random) -> dict:
+    """A job search built from a candidate's own profile."""
+    history = candidate.get("employment_history") or [{}]
+    latest = next((job for job in history if job.get("is_current_job")), history[0])
+    search_params = {
+        "skills": _sample(candidate.get("skills"), rng, 4),
+        "jobRole": [latest["role"]] if latest.get("role") and rng.random() < 0.7 else [],
+        "jobTitle": [latest["job_title"]] if latest.get("job_title") and rng.random() < 0.5 else [],
+        "location": _sample(candidate.get("preferred_cities"), rng, 2) if rng.random() < 0.4 else [],
+    }
+    return {"searchType": "both", "searchParams": search_params}
+
+
+WORKLOADS = {
+    "candidate_profile": ("jobs.json", candidate_search_from_job),
+    "job": ("candidate_profiles.json", job_search_from_candidate),
+}
+
+
+def generate_requests(schema: str, count: int, seed: int = 42, source_path: str = None) -> Iterator[dict]:
+    """
+    Yield `count` SearchRequest bodies for `schema`, derived from the generated datasets.
+    The same seed always produces the same workload.
+    """
+    default_path, build_request = WORKLOADS[schema]
+    rng = random.Random(seed)
+    records = list(iter_json_records(source_path or default_path))
+    rng.shuffle(records)
+    produced = 0
+    while produced < count and records:
+        produced_in_pass = 0
+        for record in records:
+            request = build_request(record, rng)
+            if not any(request["searchParams"][name] for name in ("skills", "jobRole", "jobTitle", "location")):
+                continue
+            yield request
+            produced += 1
+            produced_in_pass += 1
+            if produced >= count:
+                break
+        if not produced_in_pass:
+            raise ValueError(f"No record in {source_path or default_path} yields a search with a text filter")
@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+import json
+
+from app.api.services import vespa_client
+from app.api.services.bulk_feed_service import DOCUMENT_BUILDERS, run_bulk_feed
+from app.api.services.feed_candidate_service import FEED_MAX_RETRIES
+from app.api.services.match_store import refresh_matches
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a JSON array or JSONL file into a Vespa schema.")
+    parser.add_argument("input_path", help="Path to a JSON array or JSONL file")
+    parser.add_argument("--schema", choices=sorted(DOCUMENT_BUILDERS), required=True)
+    parser.add_argument("--url", default=vespa_client.VESPA_FEED_URL, help="Vespa feed endpoint")
+    parser.add_argument("--window", type=int, default=64, help="Maximum feed operations in flight")
+    parser.add_argument("--max-retries", type=int, default=FEED_MAX_RETRIES)
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file used to resume an interrupted run")
+    parser.add_argument("--failures", default=None, help="JSONL file that collects records which could not be fed")
+    parser.add_argument(
+        "--update-matches",
+        action="store_true",
+        help="Refresh the precomputed matches affected by the fed documents once the feed finishes",
+    )
+    return parser.parse_args(argv)
+
+
+async def run(args) -> dict:
+    vespa_client.VESPA_FEED_URL = args.url
+    vespa_client.VESPA_FEED_CONNECTIONS = args.window
+    fed_ids: list[str] = []
+    try:
+        report = await run_bulk_feed(
+            input_path=args.input_path,
+            schema=args.schema,
+            window=args.window,
+            checkpoint_path=args.checkpoint,
+            failures_path=args.failures,
+            max_retries=args.max_retries,
+            on_success=fed_ids.append if args.update_matches else None,
+        )
+        if args.update_matches and fed_ids:
+            if args.schema == "job":
+                report["matches"] = await refresh_matches(job_ids=fed_ids)
+            else:
+                report["matches"] = await refresh_matches(candidate_ids=fed_ids)
+        return report
+    finally:
+        await vespa_client.close_vespa_client()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
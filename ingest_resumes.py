@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+import json
+
+from app.api.services import vespa_client
+from app.api.services.bulk_parse_service import (
+    GEMINI_REQUESTS_PER_MINUTE,
+    INGEST_FEED_CONCURRENCY,
+    INGEST_INFERENCE_CONCURRENCY,
+    INGEST_UPLOAD_CONCURRENCY,
+    run_bulk_ingest,
+)
+from app.api.services.gemini_service import shutdown_pdf_text_executor
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a directory or zip of PDF resumes with Gemini and feed them to Vespa.")
+    parser.add_argument("source", help="Directory (searched recursively) or zip archive of PDF resumes")
+    parser.add_argument("--checkpoint", default=None, help="JSONL checkpoint used to resume an interrupted run")
+    parser.add_argument("--upload-concurrency", type=int, default=INGEST_UPLOAD_CONCURRENCY)
+    parser.add_argument("--inference-concurrency", type=int, default=INGEST_INFERENCE_CONCURRENCY)
+    parser.add_argument("--feed-concurrency", type=int, default=INGEST_FEED_CONCURRENCY)
+    parser.add_argument("--requests-per-minute", type=int, default=GEMINI_REQUESTS_PER_MINUTE, help="Gemini inference quota")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry files the checkpoint marks as failed")
+    return parser.parse_args(argv)
+
+
+async def run(args) -> dict:
+    try:
+        return await run_bulk_ingest(
+            source=args.source,
+            checkpoint_path=args.checkpoint,
+            upload_concurrency=args.upload_concurrency,
+            inference_concurrency=args.inference_concurrency,
+            feed_concurrency=args.feed_concurrency,
+            requests_per_minute=args.requests_per_minute,
+            retry_failed=args.retry_failed,
+        )
+    finally:
+        await vespa_client.close_vespa_client()
+        shutdown_pdf_text_executor()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
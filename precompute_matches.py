@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import json
+
+from app.api.services import vespa_client
+from app.api.services.match_store import MATCH_REFRESH_CONCURRENCY, MATCH_STORE_JOB_CANDIDATES, refresh_matches
+from app.api.utils.json_stream import iter_json_records
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compute the stored top-K job matches per candidate, for the whole corpus or for changed documents."
+    )
+    parser.add_argument(
+        "--candidates-file",
+        default="candidate_profiles.json",
+        help="JSON array or JSONL file whose record ids are matched in bulk (ignored with --candidates/--jobs)",
+    )
+    parser.add_argument("--candidates", nargs="*", default=[], help="Candidate ids to re-match")
+    parser.add_argument("--jobs", nargs="*", default=[], help="Changed job ids; only candidates they can affect are re-matched")
+    parser.add_argument("--concurrency", type=int, default=MATCH_REFRESH_CONCURRENCY)
+    parser.add_argument(
+        "--job-candidates",
+        action="store_true",
+        default=MATCH_STORE_JOB_CANDIDATES,
+        help="Also store the top-K candidates of every affected job",
+    )
+    return parser.parse_args(argv)
+
+
+async def run(args) -> dict:
+    candidate_ids = args.candidates
+    if not candidate_ids and not args.jobs:
+        candidate_ids = [record["id"] for record in iter_json_records(args.candidates_file) if record.get("id")]
+    try:
+        return await refresh_matches(
+            candidate_ids=candidate_ids,
+            job_ids=args.jobs,
+            concurrency=args.concurrency,
+            update_jobs=args.job_candidates,
+        )
+    finally:
+        await vespa_client.close_vespa_client()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -102,17 +102,26 @@ def handle_search():
             st.error(f"Exception occurred: {ex}")
 
 def process_feed_data(data: list) -> None:
-    success_count = 0
+    try:
+        response = requests.post(f"{API_BASE_URL}/profile-search/feed/batch", json=data, timeout=300)
+    except Exception as ex:
+        st.error(f"Feed API exception: {ex}")
+        return
+    if response.status_code != 200:
+        try:
+            error_detail = response.json().get("detail", response.text)
+        except Exception:
+            error_detail = response.text
+        st.error(f"Feed API error {response.status_code}: {error_detail}")
+        return
+    summary = response.json()
     failed_items = []
     failed_reasons = []
-    for i, item in enumerate(data, start=1):
-        feed_success, feed_error = feed_api(item)
-        if feed_success:
-            success_count += 1
-        else:
+    for i, result in enumerate(summary.get("results", []), start=1):
+        if not result or not result.get("success"):
             failed_items.append(i)
-            failed_reasons.append(f"Item {i}: {feed_error}")
-    st.success(f"✅ Total items fed successfully: {success_count}")
+            failed_reasons.append(f"Item {i}: {(result or {}).get('error')}")
+    st.success(f"✅ Total items fed successfully: {summary.get('succeeded', 0)}")
     if failed_items:
         st.error(f"❌ Failed item indices: {failed_items}")
         for reason in failed_reasons:
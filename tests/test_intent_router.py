@@ -0,0 +1,61 @@
+import pytest
+
+from app.api.services.intent_router import (
+    GREETING_MESSAGE,
+    NO_FILE_MESSAGE,
+    UPLOAD_FOR_JOBS_MESSAGE,
+    IntentVocabulary,
+    route_message,
+)
+
+
+@pytest.fixture
+def vocabulary():
+    vocabulary = IntentVocabulary()
+    vocabulary.add("skills", "Java")
+    vocabulary.add("skills", "Python")
+    vocabulary.add("location", "Pune")
+    return vocabulary
+
+
+def test_greeting_gets_help_reply(vocabulary):
+    intent = route_message("Hello there!", has_file=False, vocabulary=vocabulary)
+    assert intent.intent == "reply" and intent.reply == GREETING_MESSAGE
+
+
+def test_job_request_without_file_asks_for_resume(vocabulary):
+    intent = route_message("find jobs in pune", has_file=False, vocabulary=vocabulary)
+    assert intent.intent == "reply" and intent.reply == UPLOAD_FOR_JOBS_MESSAGE
+
+
+def test_job_request_with_file_parses_resume(vocabulary):
+    intent = route_message("show me matching jobs", has_file=True, vocabulary=vocabulary)
+    assert intent.intent == "parse"
+
+
+def test_candidate_search_mentioning_a_job_is_not_a_job_request(vocabulary):
+    intent = route_message("find candidates for a java developer job in pune", has_file=False, vocabulary=vocabulary)
+    assert intent is None
+
+
+def test_candidate_search_mentioning_a_job_with_file_is_not_a_job_request(vocabulary):
+    intent = route_message("find candidates for a java developer job in pune", has_file=True, vocabulary=vocabulary)
+    assert intent is None
+
+
+def test_parse_request_without_file_asks_for_file(vocabulary):
+    intent = route_message("parse this resume", has_file=False, vocabulary=vocabulary)
+    assert intent.intent == "reply" and intent.reply == NO_FILE_MESSAGE
+
+
+def test_parse_request_with_file_parses(vocabulary):
+    assert route_message("please add this profile", has_file=True, vocabulary=vocabulary).intent == "parse"
+
+
+def test_empty_message_with_file_parses(vocabulary):
+    assert route_message("", has_file=True, vocabulary=vocabulary).intent == "parse"
+    assert route_message("", has_file=False, vocabulary=vocabulary) is None
+
+
+def test_unknown_terms_go_to_the_agent(vocabulary):
+    assert route_message("find rust developers in pune", has_file=False, vocabulary=vocabulary) is None
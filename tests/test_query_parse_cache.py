@@ -0,0 +1,129 @@
+import pytest
+
+from app.api.services import intent_router
+from app.api.services.intent_router import IntentVocabulary
+from app.api.services.query_parse_cache import QueryParseCache, normalize_query, same_slots
+
+
+@pytest.fixture(autouse=True)
+def vocabulary(monkeypatch):
+    vocabulary = IntentVocabulary()
+    vocabulary.add("skills", "Python")
+    vocabulary.add("skills", "Django")
+    vocabulary.add("location", "Pune")
+    vocabulary.add("location", "Delhi")
+    monkeypatch.setattr(intent_router, "_vocabulary", vocabulary)
+    return vocabulary
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return QueryParseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=3600, max_entries=10, semantic=False)
+
+
+def _put(cache: QueryParseCache, query: str, result: dict, model: str = "model", prompt: str = "prompt") -> None:
+    normalized = normalize_query(query)
+    cache.put(cache.build_key(normalized, model, prompt), normalized, result, parse_seconds=1.0)
+
+
+def _get(cache: QueryParseCache, query: str, model: str = "model", prompt: str = "prompt"):
+    normalized = normalize_query(query)
+    return cache.get(cache.build_key(normalized, model, prompt), normalized)[0]
+
+
+def _params(**search_params):
+    return {"intent": "SEARCH", "searchparams": {"searchtype": "both", **search_params}}
+
+
+def _same(query: str, cached_query: str, cached_result: dict) -> bool:
+    return same_slots(normalize_query(query), normalize_query(cached_query), cached_result)
+
+
+def test_accepts_reworded_query_with_same_slots():
+    cached = _params(skills=["Python"], location=["Pune"])
+    assert _same("Show me Python developers in Pune", "find python developers in pune", cached)
+
+
+def test_rejects_different_known_city():
+    cached = _params(skills=["Python"], location=["Pune"])
+    assert not _same("python developers in delhi", "python developers in pune", cached)
+
+
+def test_rejects_city_missing_from_vocabulary():
+    cached = _params(skills=["Python"])
+    assert not _same("python developers in chennai", "python developers", cached)
+
+
+def test_rejects_extra_known_skill():
+    cached = _params(skills=["Python"])
+    assert not _same("python developers with django", "python developers", cached)
+
+
+def test_rejects_experience_swapped_for_salary():
+    cached = _params(skills=["Python"], experiencemin=5)
+    assert not _same("python developers with 5 lpa", "python developers with 5 years", cached)
+
+
+def test_rejects_different_number():
+    cached = _params(skills=["Python"], experiencemin=5)
+    assert not _same("python developers with 6 years", "python developers with 5 years", cached)
+
+
+def test_accepts_range_with_shared_unit():
+    cached = _params(skills=["Python"], experiencemin=5, experiencemax=10)
+    assert _same("python developers 5 to 10 years", "find python developers with 5 to 10 years", cached)
+
+
+def test_rejects_negation():
+    cached = _params(skills=["Python"], location=["Pune"])
+    assert not _same("python developers not in pune", "python developers in pune", cached)
+
+
+def test_rejects_when_cached_value_is_absent():
+    cached = _params(skills=["Python"], location=["Pune"])
+    assert not _same("python developers", "python developers", cached)
+
+
+def test_normalize_folds_case_and_whitespace():
+    assert normalize_query("  Python   Developers\tin PUNE \n") == "python developers in pune"
+
+
+def test_normalize_keeps_punctuation():
+    assert normalize_query("C++ devs, 5-10 years") == "c++ devs, 5-10 years"
+    assert normalize_query("5-10 years") != normalize_query("5 10 years")
+
+
+def test_normalize_handles_empty_query():
+    assert normalize_query(None) == ""
+    assert normalize_query("   ") == ""
+
+
+def test_exact_hit_for_case_and_whitespace_variant(cache):
+    cached = _params(skills=["Python"], location=["Pune"])
+    _put(cache, "python developers in pune", cached)
+    assert _get(cache, "  Python developers   in PUNE") == cached
+    assert cache.exact_hits == 1
+
+
+def test_exact_miss_for_punctuation_variant(cache):
+    _put(cache, "python developers with 5-10 years", _params(skills=["Python"]))
+    assert _get(cache, "python developers with 5 10 years") is None
+    assert cache.misses == 1
+
+
+def test_exact_miss_for_other_model_or_prompt(cache):
+    _put(cache, "python developers", _params(skills=["Python"]))
+    assert _get(cache, "python developers", model="other-model") is None
+    assert _get(cache, "python developers", prompt="other prompt") is None
+
+
+def test_exact_miss_after_ttl(cache):
+    _put(cache, "python developers", _params(skills=["Python"]))
+    cache.ttl_seconds = -1
+    assert _get(cache, "python developers") is None
+
+
+def test_disabled_cache_never_hits(tmp_path):
+    cache = QueryParseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=3600, max_entries=10, semantic=False, enabled=False)
+    _put(cache, "python developers", _params(skills=["Python"]))
+    assert _get(cache, "python developers") is None
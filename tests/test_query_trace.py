@@ -0,0 +1,45 @@
+import json
+
+from app.api.services import query_trace
+from app.api.services.query_trace import TraceCapture
+
+
+def _capture(summary: dict) -> TraceCapture:
+    capture = TraceCapture(requested=True)
+    capture.summaries.append(summary)
+    return capture
+
+
+def _summary(steps: int) -> dict:
+    return {
+        "trace_id": "abc123",
+        "timing_ms": {"query": 1.5, "search": 3.0},
+        "total_count": 42,
+        "phases_ms": {"first_phase": 0.4},
+        "container_ms": {f"searcher_{index}": index for index in range(steps)},
+        "nearest_neighbor": [{"field": "skills_embedding", "target_hits": 10}],
+    }
+
+
+def test_small_summary_is_sent_whole():
+    header = _capture(_summary(3)).header()
+    assert json.loads(header) == _summary(3)
+
+
+def test_large_summary_is_truncated_to_the_limit(monkeypatch):
+    monkeypatch.setattr(query_trace, "QUERY_TRACE_HEADER_MAX_BYTES", 300)
+    header = _capture(_summary(500)).header()
+    decoded = json.loads(header)
+    assert len(header) <= 300
+    assert decoded["truncated"] is True
+    assert "container_ms" not in decoded
+    assert decoded["trace_id"] == "abc123" and decoded["timing_ms"] == {"query": 1.5, "search": 3.0}
+
+
+def test_header_falls_back_to_trace_id(monkeypatch):
+    monkeypatch.setattr(query_trace, "QUERY_TRACE_HEADER_MAX_BYTES", 40)
+    assert json.loads(_capture(_summary(500)).header()) == {"trace_id": "abc123", "truncated": True}
+
+
+def test_no_traced_query_means_no_header():
+    assert TraceCapture(requested=True).header() is None